@@ -0,0 +1,410 @@
+"""JSON API для тонкого клієнта (templates/index.html) поруч зі Streamlit.
+
+Кожна дія в main.py — це повний rerun скрипта через websocket; для пілота на
+слабкому мобільному зв'язку це важко. Тут ті самі дії — вхід, список БпЛА,
+вильоти зміни, текст донесення, відправка в Telegram — як окремі невеликі
+JSON-запити. Логіка спільна з main.py: flight_logic (розбір часу, тривалість,
+рядок вильоту, текст донесення), DroneRegistry, FlightWriter, ArchiveMirror і
+TelegramOutbox. Відповіді стискаються gzip, GET /api/flights і /api/drones
+віддають ETag і 304 на If-None-Match без побудови тіла.
+
+Сервер — Starlette + uvicorn (обидва вже йдуть зі Streamlit):
+
+    python api_server.py --port 8600
+"""
+import argparse
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import TimeoutError as WriteTimeout
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import FileResponse, Response
+from starlette.routing import Route
+
+from archive_mirror import ArchiveMirror
+from archive_schema import merge_legacy_columns
+from battery_index import BatteryIndex
+from flight_keys import FlightKeyIndex
+from drone_registry import DroneRegistry, serials
+from flight_logic import (ADMIN_PASSWORD, RESULTS, UNITS, archive_rows, calculate_duration, flight_record,
+                          report_text, smart_time_parse)
+from flight_writer import FlightWriter, draft_rows
+from rollups import RollupStore
+from telegram_outbox import OUTBOX_DIR, TelegramOutbox
+
+INDEX_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "index.html")
+SESSION_COOKIE = "uav_session"
+SESSION_TTL = 12 * 3600  # с неактивності, після яких сесія забувається
+GZIP_MIN = 500           # байт; менші відповіді не стискаються
+WRITE_WAIT = 20          # с, скільки запит чекає підтвердження запису в таблицю
+# Окрема черга: скидання 'sending' при старті не має чіпати відправки процесу Streamlit
+API_OUTBOX_DIR = os.environ.get("UAV_API_OUTBOX_DIR", OUTBOX_DIR + "_api")
+
+
+class Session:
+    def __init__(self, role, unit, name):
+        self.role, self.unit, self.name = role, unit, name
+        self.flights, self.next_id, self.version = [], 1, 0
+        self.extra = {}  # id → поля клієнта, яких немає в архіві (висота); у Sheet1 не пишуться
+        self.seen = time.time()
+        self.lock = threading.Lock()
+
+    def add(self, record, extra=None):
+        with self.lock:
+            self.flights.append((self.next_id, record)); self.next_id += 1; self.version += 1
+            if extra: self.extra[self.next_id - 1] = extra
+            return self.next_id - 1
+
+    def remove(self, fid):
+        with self.lock:
+            before = len(self.flights)
+            self.flights = [(i, f) for i, f in self.flights if i != fid]
+            self.extra.pop(fid, None)
+            if len(self.flights) != before: self.version += 1
+            return len(self.flights) != before
+
+    def take(self):
+        with self.lock:
+            flights, self.flights = [f for _, f in self.flights], []
+            self.extra = {}
+            self.version += 1
+            return flights
+
+    def records(self):
+        with self.lock: return [f for _, f in self.flights]
+
+
+class Backend:
+    """Спільні об'єкти процесу API: записувач, дзеркало, реєстр БпЛА, черга Telegram і сесії."""
+
+    def __init__(self, sheets, tg_token=None, tg_chat_id=None, mirror_path=None, outbox_dir=API_OUTBOX_DIR):
+        self.sheets = sheets
+        self.mirror = ArchiveMirror(sheets, **({"path": mirror_path} if mirror_path else {}))
+        # Похідні таблиці в тому ж файлі дзеркала мають бачити й рядки, синхронізовані цим процесом
+        RollupStore(self.mirror); BatteryIndex(self.mirror)
+        self.keys = FlightKeyIndex(self.mirror)
+        self.writer = FlightWriter(sheets, landed=self.keys.landed)
+        self.writer.on_flush(lambda ws, recs: (self.mirror.mark_stale(ws), self.mirror.refresh(ws)))
+        self.tg_chat_id = tg_chat_id
+        self.outbox = TelegramOutbox(tg_token, path=outbox_dir) if tg_token else None
+        self.sessions = {}
+        self._registry = (None, DroneRegistry())
+        self._lock = threading.Lock()
+
+    # --- сесії ---
+    def login(self, role, unit, name):
+        token = secrets.token_urlsafe(24)
+        with self._lock:
+            now = time.time()
+            for t in [t for t, s in self.sessions.items() if now - s.seen > SESSION_TTL]: del self.sessions[t]
+            self.sessions[token] = sess = Session(role, unit, name)
+        return token, sess
+
+    def session(self, token):
+        sess = self.sessions.get(token) if token else None
+        if sess: sess.seen = time.time()
+        return sess
+
+    # --- дані ---
+    def registry(self):
+        """DroneRegistry на поточну версію DronesDB (як get_registry у main.py)."""
+        self.mirror.refresh("DronesDB")
+        version = self.mirror.version("DronesDB")
+        with self._lock:
+            if self._registry[0] != version:
+                df = self.mirror.query("DronesDB", sync=False)
+                self._registry = (version, DroneRegistry(df))
+            return self._registry[1]
+
+    def unit_of(self, operator):
+        """Підрозділ оператора з його останнього вильоту в архіві (тонкий клієнт при вході підрозділ не шле)."""
+        try: df = self.mirror.query("Sheet1", operator=operator, columns=["Підрозділ"])
+        except Exception: return None
+        units = [u for u in df["Підрозділ"].dropna().tolist() if u in UNITS] if "Підрозділ" in df.columns else []
+        return units[-1] if units else None
+
+    def drafts(self, operator):
+        try: df = self.mirror.query("Drafts", operator=operator)
+        except Exception: return []
+        if df is None or df.empty: return []
+        df = draft_rows(merge_legacy_columns(df.dropna(how="all")))
+        return [{k: v for k, v in r.items() if not (isinstance(v, float) and pd.isna(v))} for r in df.to_dict("records")]
+
+    def save_drafts(self, sess):
+        self.writer.save_drafts(sess.name, sess.records())
+
+    def archive(self, operator=None, date_from=None, date_to=None):
+        df = self.mirror.query("Sheet1", operator=operator, date_from=date_from, date_to=date_to)
+        return pd.DataFrame() if df is None else df.dropna(how="all")
+
+    def send(self, text):
+        if not self.outbox or not self.tg_chat_id: return False
+        self.outbox.enqueue(self.tg_chat_id, "sendMessage", {"text": text, "parse_mode": "Markdown"})
+        return True
+
+
+# --- відповіді ---
+def _json(data, status=200, headers=None):
+    body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+    return Response(body, status, headers=headers, media_type="application/json")
+
+
+def _fail(message, status=400):
+    return _json({"success": False, "message": message}, status)
+
+
+def _etag(*parts):
+    return '"' + hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:16] + '"'
+
+
+def _not_modified(request, etag):
+    match = request.headers.get("if-none-match", "")
+    return etag in [t.strip() for t in match.split(",")] or match.strip() == "*"
+
+
+def _token(request):
+    auth = request.headers.get("authorization", "")
+    return auth[7:] if auth.lower().startswith("bearer ") else request.cookies.get(SESSION_COOKIE)
+
+
+def _auth(request, pilot=True):
+    sess = request.app.state.backend.session(_token(request))
+    if sess is None: return None, _fail("Потрібен вхід", 401)
+    if pilot and sess.role != "Pilot": return None, _fail("Лише для пілотів", 403)
+    return sess, None
+
+
+async def _body(request):
+    try: data = await request.json()
+    except Exception: return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _parse_date(val):
+    if isinstance(val, date): return val
+    for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+        try: return datetime.strptime(str(val), fmt).date()
+        except (TypeError, ValueError): pass
+    return None
+
+
+def _public(fid, f, extra=None):
+    """Виліт у JSON: поля архіву плюс короткі ключі, якими користується templates/index.html."""
+    sn = serials([f.get("Дрон") or ""]).iloc[0]
+    return {"id": fid, **{k: v for k, v in f.items() if k != "files"},
+            "drone": f.get("Дрон"), "serial": "" if pd.isna(sn) else sn, "location": f.get("Маршрут"),
+            "duration": f.get("Тривалість (хв)"), "distance": f.get("Дистанція (м)"), "altitude": (extra or {}).get("altitude", ""),
+            "notes": f.get("Примітки"), "timestamp": f"{f.get('Дата')} {f.get('Зліт')}"}
+
+
+# --- обробники ---
+async def index(request):
+    return FileResponse(INDEX_HTML, media_type="text/html")
+
+
+async def login(request):
+    data, backend = await _body(request), request.app.state.backend
+    name, unit, password = str(data.get("name") or "").strip(), data.get("unit"), data.get("password")
+    if password and not name:
+        if password != ADMIN_PASSWORD: return _fail("Невірний пароль", 401)
+        token, sess = backend.login("Admin", "Адміністрація", "Адміністратор")
+    else:
+        if not name: return _fail("Вкажіть звання та прізвище")
+        # templates/index.html шле {name, email, password, phone} без підрозділу: тоді — з архіву,
+        # а для нового пілота — з реєстру за S/N першого вильоту (див. add_flight)
+        if unit and unit not in UNITS: return _fail("Невідомий підрозділ")
+        token, sess = backend.login("Pilot", unit or await run_in_threadpool(backend.unit_of, name), name)
+        for f in await run_in_threadpool(backend.drafts, name): sess.add(f)
+    resp = _json({"success": True, "message": f"✅ Вітаємо, {sess.name}!", "token": token,
+                  "user": {"role": sess.role, "unit": sess.unit, "name": sess.name}, "flights": len(sess.flights)})
+    resp.set_cookie(SESSION_COOKIE, token, max_age=SESSION_TTL, httponly=True, samesite="strict")
+    return resp
+
+
+async def drones(request):
+    sess, err = _auth(request, pilot=False)
+    if err: return err
+    backend = request.app.state.backend
+    if request.method == "POST":
+        data = await _body(request)
+        model, sn = str(data.get("model") or "").strip(), str(data.get("serial") or "").strip()
+        unit = data.get("unit") if sess.role == "Admin" else sess.unit
+        if not model: return _fail("Вкажіть модель БпЛА")
+        if unit not in UNITS: return _fail("Невідомий підрозділ")
+        if sn and (await run_in_threadpool(backend.registry)).by_sn(sn): return _fail(f"S/N {sn} вже є в реєстрі", 409)
+        await run_in_threadpool(backend.sheets.append_records, "DronesDB", [{"Підрозділ": unit, "Модель БпЛА": model, "s/n": sn}])
+        backend.mirror.mark_stale("DronesDB")
+        return _json({"success": True, "message": "✅ БпЛА додано до реєстру"})
+    unit = request.query_params.get("unit") if sess.role == "Admin" else sess.unit
+    registry = await run_in_threadpool(backend.registry)
+    etag = _etag("drones", backend.mirror.version("DronesDB"), unit)
+    if _not_modified(request, etag): return Response(status_code=304, headers={"ETag": etag})
+    return _json({"success": True, "drones": registry.records(unit)}, headers={"ETag": etag})
+
+
+async def flights(request):
+    sess, err = _auth(request, pilot=False)
+    if err: return err
+    backend = request.app.state.backend
+    if request.query_params.get("scope") == "archive":
+        # Архів з дзеркала: пілот — свій, адмін — усі; ETag за версією дзеркала й фільтрами
+        q = request.query_params
+        date_from, date_to = _parse_date(q.get("date_from")), _parse_date(q.get("date_to"))
+        operator = sess.name if sess.role == "Pilot" else q.get("operator")
+        await run_in_threadpool(backend.mirror.refresh, "Sheet1")
+        etag = _etag("archive", backend.mirror.version("Sheet1"), operator, date_from, date_to)
+        if _not_modified(request, etag): return Response(status_code=304, headers={"ETag": etag})
+        df = await run_in_threadpool(backend.archive, operator, date_from, date_to)
+        body = '{"success":true,"flights":' + (df.to_json(orient="records", force_ascii=False) if not df.empty else "[]") + "}"
+        return Response(body.encode("utf-8"), headers={"ETag": etag}, media_type="application/json")
+    if sess.role != "Pilot": return _fail("Лише для пілотів", 403)
+    etag = _etag("shift", _token(request), sess.version)
+    if _not_modified(request, etag): return Response(status_code=304, headers={"ETag": etag})
+    with sess.lock: items, extra = list(sess.flights), dict(sess.extra)
+    return _json({"success": True, "flights": [_public(i, f, extra.get(i)) for i, f in items]}, headers={"ETag": etag})
+
+
+async def add_flight(request):
+    sess, err = _auth(request)
+    if err: return err
+    data, backend = await _body(request), request.app.state.backend
+    t_off, t_land = smart_time_parse(str(data.get("takeoff") or "")), smart_time_parse(str(data.get("landing") or ""))
+    try: minutes = int(data.get("duration") or 0)
+    except (TypeError, ValueError): return _fail("Тривалість — ціле число хвилин")
+    day = _parse_date(data.get("date") or date.today())
+    if day is None: return _fail("Дата — ДД.ММ.РРРР або РРРР-ММ-ДД")
+    # templates/index.html шле лише тривалість: виліт щойно завершився (посадка — зараз)
+    if minutes > 0 and not (t_off and t_land):
+        if t_off: t_land = (datetime.combine(day, t_off) + timedelta(minutes=minutes)).time()
+        else:
+            land = datetime.combine(day, t_land) if t_land else datetime.now().replace(second=0, microsecond=0)
+            off = land - timedelta(minutes=minutes)
+            t_land, t_off = land.time(), off.time()
+            if not data.get("date"): day = off.date()
+    if not (t_off and t_land): return _fail("Вкажіть час зльоту й посадки (напр. 0930) або тривалість")
+    s_start, s_end = smart_time_parse(str(data.get("shift_start") or "0800")), smart_time_parse(str(data.get("shift_end") or "2000"))
+    if not (s_start and s_end): return _fail("Невірний час зміни")
+    drone = data.get("drone")
+    if not drone and data.get("serial"):
+        rec = (await run_in_threadpool(backend.registry)).by_sn(data["serial"])
+        drone = rec["display"] if rec else f"{data.get('drone_model') or ''} (S/N: {data['serial']})".strip()
+        if rec and not sess.unit: sess.unit = rec["unit"]
+    if not sess.unit: return _fail("Невідомий підрозділ: оберіть БпЛА з реєстру свого підрозділу")
+    result = data.get("result") or RESULTS[0]
+    if result not in RESULTS: return _fail("Невідомий результат")
+    try: distance, cycles = int(data.get("distance") or 0), int(data.get("cycles") or 0)
+    except (TypeError, ValueError): return _fail("Відстань і цикли АКБ — цілі числа")
+    record = flight_record(day, s_start, s_end, sess.unit, sess.name, drone or data.get("drone_model") or "Дрон не вказано",
+                           str(data.get("route") or data.get("location") or ""), t_off, t_land, distance,
+                           str(data.get("akb") or ""), cycles, result, str(data.get("notes") or ""))
+    record.pop("files")
+    fid = sess.add(record, {"altitude": data["altitude"]} if data.get("altitude") not in (None, "") else None)
+    if data.get("submit"): return await _submit(backend, sess)
+    backend.save_drafts(sess)
+    return _json({"success": True, "message": f"✅ Виліт додано ({calculate_duration(t_off, t_land)} хв)", "flight": _public(fid, record, sess.extra.get(fid))})
+
+
+async def delete_flight(request):
+    sess, err = _auth(request)
+    if err: return err
+    if not sess.remove(request.path_params["fid"]): return _fail("Виліт не знайдено", 404)
+    request.app.state.backend.save_drafts(sess)
+    return _json({"success": True, "message": "🗑️ Виліт видалено"})
+
+
+async def submit(request):
+    sess, err = _auth(request)
+    if err: return err
+    return await _submit(request.app.state.backend, sess)
+
+
+async def _submit(backend, sess):
+    flights = taken = sess.take()
+    if not flights: return _fail("Немає вильотів для відправки")
+    # Уже архівовані чи поставлені в чергу вильоти (повторне натискання, чернетки) — відсіюються до запису й Telegram
+    fresh = backend.keys.claim(flights)
+    dups = len(flights) - len(fresh)
+    if not fresh:
+        return _json({"success": True, "message": "ℹ️ Ці вильоти вже надіслано — повторно не відправляються.",
+                      "written": True, "telegram": False, "flights": 0, "duplicates": dups})
+    flights = fresh
+    # Той самий шлях, що й «ВІДПРАВИТИ ВСІ ДАНІ»: append у Sheet1 + очищення чернеток + Telegram
+    fut = backend.writer.submit_flights(archive_rows(flights), operator=sess.name)
+    fut.add_done_callback(lambda f: f.exception() and backend.keys.release(flights))  # запис не вдався — можна надіслати знову
+    try: await run_in_threadpool(fut.result, WRITE_WAIT); written = True
+    except WriteTimeout: written = False
+    except Exception as e:
+        # Записувач вичерпав спроби: вильоти повертаються в сесію (чернетки в Drafts теж лишились)
+        for f in taken: sess.add(f)
+        return _fail(f"❌ Вильоти не записано в таблицю ({e}). Список збережено — відправте ще раз пізніше.", 502)
+    sent = backend.send(report_text(flights))
+    msg = "✅ Надіслано!" if written else "⏳ Таблиця відповідає повільно — вильоти в черзі й будуть дописані автоматично."
+    return _json({"success": True, "message": msg, "written": written, "telegram": sent, "flights": len(flights), "duplicates": dups})
+
+
+async def generate_message(request):
+    sess, err = _auth(request)
+    if err: return err
+    flights = sess.records()
+    if not flights: return _fail("Немає вильотів за зміну")
+    return _json({"success": True, "message": report_text(flights)})
+
+
+async def send_telegram(request):
+    sess, err = _auth(request)
+    if err: return err
+    # Токен і чат беремо з налаштувань сервера, а не з тіла запиту
+    text = str((await _body(request)).get("message") or "").strip() or (report_text(sess.records()) if sess.records() else "")
+    if not text: return _fail("Порожнє повідомлення")
+    if not request.app.state.backend.send(text): return _fail("Telegram не налаштовано", 503)
+    return _json({"success": True, "message": "📤 Повідомлення поставлено в чергу відправки"})
+
+
+def make_app(backend):
+    app = Starlette(routes=[
+        Route("/", index),
+        Route("/api/login", login, methods=["POST"]),
+        Route("/api/drones", drones, methods=["GET", "POST"]),
+        Route("/api/flights", flights, methods=["GET"]),
+        Route("/api/flights", add_flight, methods=["POST"]),
+        Route("/api/flights/submit", submit, methods=["POST"]),
+        Route("/api/flights/{fid:int}", delete_flight, methods=["DELETE"]),
+        Route("/api/message/generate", generate_message, methods=["GET"]),
+        Route("/api/message/send-telegram", send_telegram, methods=["POST"]),
+    ], middleware=[Middleware(GZipMiddleware, minimum_size=GZIP_MIN)])
+    app.state.backend = backend
+    return app
+
+
+def make_backend():
+    """Backend на справжньому Google Sheets; налаштування — з .streamlit/secrets.toml, як у main.py."""
+    import streamlit as st
+    from streamlit_gsheets import GSheetsConnection
+    from sheets_io import SheetsIO
+
+    def get_secret(key):
+        val = os.environ.get(key) or st.secrets.get(key)
+        if val: return val
+        try: return st.secrets["connections"]["gsheets"].get(key)
+        except Exception: return None
+
+    conn = GSheetsConnection("gsheets")
+    return Backend(SheetsIO(conn), get_secret("TELEGRAM_BOT_TOKEN"), get_secret("TELEGRAM_CHAT_ID"))
+
+
+if __name__ == "__main__":
+    import uvicorn
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8600)
+    a = ap.parse_args()
+    uvicorn.run(make_app(make_backend()), host=a.host, port=a.port, log_level="warning")
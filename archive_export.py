@@ -0,0 +1,120 @@
+"""Експорт архіву польотів у XLSX, CSV або Parquet.
+
+Файл будується лише на запит (кнопка завантаження) і потоково: рядки йдуть
+пачками прямо з дзеркала SQLite, XLSX пишеться в режимі constant_memory,
+тож пам'ять не залежить від розміру архіву. Ширина колонок — з агрегату
+MAX(LENGTH(...)) у SQLite, без проходу по даних у pandas. Готовий файл
+кешується на диску за версією даних дзеркала та фільтрами: повторне
+завантаження того самого архіву не будує файл заново.
+"""
+import csv
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from perf import cache_event, span
+
+EXPORT_DIR = os.environ.get("UAV_EXPORT_DIR", os.path.join(".cache", "exports"))
+KEEP_FILES = 20
+CHUNK = 5000
+RENAME = {"Дрон": "БпЛА"}
+EXPORT_COLUMNS = [
+    "Дата", "Час завдання", "Підрозділ", "Оператор", "Дрон",
+    "Маршрут", "Зліт", "Посадка", "Тривалість (хв)",
+    "Дистанція (м)", "Номер АКБ", "Цикли АКБ",
+]
+INT_COLUMNS = ("Тривалість (хв)", "Дистанція (м)", "Цикли АКБ")
+FORMATS = {
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV", "text/csv"),
+    "parquet": ("Parquet", "application/octet-stream"),
+}
+
+
+def export_archive(mirror, fmt="xlsx", ws="Sheet1", **filters):
+    """Шлях до файлу експорту (фільтри — як у ArchiveMirror.query). Будує файл, лише якщо його ще немає."""
+    mirror.refresh(ws)
+    cols = [c for c in EXPORT_COLUMNS if c in mirror.columns(ws)]
+    key = json.dumps([ws, mirror.version(ws), fmt, cols, sorted((k, str(v)) for k, v in filters.items() if v is not None)], ensure_ascii=False)
+    path = os.path.join(EXPORT_DIR, hashlib.sha1(key.encode()).hexdigest()[:20] + "." + fmt)
+    cache_event("export", os.path.exists(path))
+    if os.path.exists(path): return path
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    chunks = mirror.iter_rows(ws, cols, chunk=CHUNK, **filters)
+    with span(f"export.{fmt}") as s:
+        if fmt == "xlsx": _write_xlsx(tmp, cols, chunks, mirror.max_lengths(ws, cols, **filters))
+        elif fmt == "csv": _write_csv(tmp, cols, chunks)
+        elif fmt == "parquet": _write_parquet(tmp, cols, chunks)
+        else: raise ValueError(f"Невідомий формат експорту: {fmt}")
+        s.bytes = os.path.getsize(tmp)
+    os.replace(tmp, path)
+    _prune()
+    return path
+
+
+def export_bytes(mirror, fmt="xlsx", ws="Sheet1", **filters):
+    """Вміст файлу експорту — для відкладеного data= у st.download_button."""
+    with open(export_archive(mirror, fmt, ws, **filters), "rb") as fh: return fh.read()
+
+
+def _prune():
+    files = sorted((os.path.join(EXPORT_DIR, f) for f in os.listdir(EXPORT_DIR) if not f.endswith(".tmp")), key=os.path.getmtime)
+    for f in files[:-KEEP_FILES]:
+        try: os.remove(f)
+        except OSError: pass
+
+
+def _parse_date(v):
+    try: return datetime.strptime(v, "%d.%m.%Y")
+    except (TypeError, ValueError): return None
+
+
+def _write_xlsx(path, cols, chunks, lengths):
+    import xlsxwriter
+    wb = xlsxwriter.Workbook(path, {"constant_memory": True})
+    sheet = wb.add_worksheet("Архів_Польотів")
+    border = wb.add_format({"border": 1, "align": "center", "valign": "vcenter", "text_wrap": True})
+    date_fmt = wb.add_format({"border": 1, "align": "center", "valign": "vcenter", "num_format": "DD.MM.YYYY"})
+    header = wb.add_format({"bold": True, "bg_color": "#2E7D32", "color": "white", "border": 1, "align": "center", "valign": "vcenter"})
+    names = [RENAME.get(c, c) for c in cols]
+    for i, name in enumerate(names):
+        sheet.set_column(i, i, min(max(lengths.get(cols[i], 0), len(name)) + 2, 30), border)
+        sheet.write(0, i, name, header)
+    date_i = cols.index("Дата") if "Дата" in cols else -1
+    r = 1
+    for rows in chunks:
+        for row in rows:
+            for i, v in enumerate(row):
+                if v is None: continue
+                if i == date_i:
+                    d = _parse_date(v)
+                    if d: sheet.write_datetime(r, i, d, date_fmt); continue
+                sheet.write(r, i, v)
+            r += 1
+    wb.close()
+
+
+def _write_csv(path, cols, chunks):
+    with open(path, "w", newline="", encoding="utf-8-sig") as fh:
+        w = csv.writer(fh)
+        w.writerow([RENAME.get(c, c) for c in cols])
+        for rows in chunks: w.writerows(rows)
+
+
+def _write_parquet(path, cols, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    names = [RENAME.get(c, c) for c in cols]
+    schema = pa.schema([(n, pa.timestamp("ms") if c == "Дата" else pa.int32() if c in INT_COLUMNS else pa.string()) for c, n in zip(cols, names)])
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in chunks:
+            df = pd.DataFrame.from_records(rows, columns=cols)
+            for c in cols:
+                if c == "Дата": df[c] = pd.to_datetime(df[c], format="%d.%m.%Y", errors="coerce")
+                elif c in INT_COLUMNS: df[c] = pd.to_numeric(df[c], errors="coerce").round().astype("Int32")
+                else: df[c] = df[c].astype("string")
+            writer.write_table(pa.Table.from_pandas(df.rename(columns=dict(zip(cols, names))), schema=schema, preserve_index=False))
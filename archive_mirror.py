@@ -0,0 +1,454 @@
+"""Локальне дзеркало аркушів Sheet1, DronesDB та Drafts у SQLite на диску.
+
+Дзеркало спільне для всіх сесій і воркерів (один файл), синхронізується
+інкрементально: зберігаємо «водяний знак» — номер останнього забраного рядка
+аркуша — і хеш OVERLAP рядків перед ним. Наступна синхронізація тягне лише
+хвіст аркуша від цього місця; якщо ці рядки змінились або змінився заголовок —
+повне перезавантаження. Правку вище за хвіст перевірка хвоста не бачить, тож
+раз на FULL_RESYNC аркуш усе одно перечитується цілком.
+Перед цим — ще дешевша перевірка: час останньої зміни таблиці (Drive
+modifiedTime, один запит на всі аркуші); якщо він той самий, що й при
+попередній синхронізації, аркуш не читається взагалі. Власні записи
+(mark_stale) обходять цю перевірку. Ревізія зберігається лише після повного
+перечитування: вона змінюється й від правки будь-де в таблиці, тож нову
+ревізію підтверджує повне перечитування (не частіше VERIFY_AFTER, а до того —
+лише хвіст), інакше правка вище за хвіст загубилась би назавжди.
+
+Читання не чекає Google (stale-while-revalidate): query() віддає те, що є в
+дзеркалі, а звірення запускає у фоні через refresh(); блокує лише найперше
+наповнення аркуша. Невдала спроба повторюється не раніше ніж за RETRY_AFTER.
+Читання йдуть SQL-запитами з фільтрами (оператор, підрозділ, діапазон дат),
+тож відфільтрований архів не проходить через pandas цілком.
+
+Архів (PARTITIONED) лежить помісячними таблицями-партиціями з маніфестом:
+кількість рядків, мін./макс. дата, оператори й підрозділи кожного місяця.
+Читання відкидає партиції, що не перетинаються з діапазоном дат або не містять
+потрібного оператора/підрозділу, тож вартість залежить від запитаного вікна, а
+не від усієї історії. Дзеркало старого формату (одна таблиця) розбивається на
+партиції один раз при відкритті.
+
+Для посторінкового перегляду sorted_keys() один раз сортує в SQLite лише
+ключі (_row, партиція) під фільтром, а fetch() бере сторінку за первинним
+ключем — вартість гортання не залежить від розміру архіву; підсумки під
+фільтром рахує totals() агрегатом.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from perf import cache_event, span
+
+MIRROR_PATH = os.environ.get("UAV_MIRROR_PATH", os.path.join(".cache", "uav_mirror.sqlite"))
+OVERLAP = 20  # рядків перед водяним знаком, якими перевіряємо відсутність редагувань
+FULL_RESYNC = 6 * 3600  # с між плановими повними перечитуваннями (правки вище за хвіст)
+VERIFY_AFTER = 300      # с: нова ревізія звіряється повним перечитуванням не частіше
+SYNC_INTERVAL = {"Sheet1": 15, "Drafts": 10, "DronesDB": 60}  # с між звіреннями з Google (перевірка ревізії дешева)
+REVISION_TTL = 2    # с, протягом яких одна перевірка ревізії спільна для всіх аркушів
+RETRY_AFTER = 30    # с до повтору фонової синхронізації після помилки (немає мережі)
+NUMERIC_COLUMNS = ("Тривалість (хв)", "Дистанція (м)", "Цикли АКБ")
+DATE_COLUMN = "Дата"
+PARTITIONED = ("Sheet1",)  # аркуші, що зберігаються помісячними партиціями
+FULL_SYNC = ("Drafts",)    # малі аркуші, що правляться на місці (не лише дописуються): щоразу цілком
+UNDATED = "undated"        # партиція рядків без розпізнаної дати
+
+
+def _table(ws):
+    return "ws_" + "".join(ch if ch.isalnum() else "_" for ch in ws)
+
+
+def _part_table(ws, part):
+    return f"{_table(ws)}__{part.replace('-', '_')}"
+
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _clean_header(raw):
+    header, seen = [], set()
+    for i, h in enumerate(raw):
+        h = (h or "").strip() or f"col{i + 1}"
+        while h in seen or h.startswith("_"): h = h + "_"
+        seen.add(h); header.append(h)
+    return header
+
+
+def _rows_hash(rows):
+    h = hashlib.sha1()
+    for r in rows: h.update("\x1f".join(r).encode("utf-8")); h.update(b"\x1e")
+    return h.hexdigest()
+
+
+class ArchiveMirror:
+    table = staticmethod(_table)
+
+    def __init__(self, sheets, path=MIRROR_PATH):
+        self.sheets = sheets
+        self.path = path
+        self._stale = set()
+        self._locks = {}
+        self._hooks = {}
+        self._pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="mirror-refresh")
+        self._inflight, self._retry_at = {}, {}
+        self._bg_lock = threading.Lock()
+        self._rev = (0.0, None)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS sync_meta (ws TEXT PRIMARY KEY, header TEXT, watermark INTEGER, tail_hash TEXT, synced_at REAL, full_at REAL, revision TEXT)")
+            if "revision" not in [r[1] for r in db.execute("PRAGMA table_info(sync_meta)")]:
+                db.execute("ALTER TABLE sync_meta ADD COLUMN revision TEXT")
+            db.execute("""CREATE TABLE IF NOT EXISTS partitions (ws TEXT, part TEXT, tbl TEXT, rows INTEGER,
+                          min_date TEXT, max_date TEXT, operators TEXT, units TEXT, PRIMARY KEY (ws, part))""")
+            for ws in PARTITIONED:
+                if self._exists(db, _table(ws)): self._migrate(db, ws)
+
+    @contextmanager
+    def _connect(self, immediate=False):
+        """immediate=True — транзакція одразу бере блокування запису (BEGIN IMMEDIATE)."""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                if immediate: db.execute("BEGIN IMMEDIATE")
+                yield db
+        finally: db.close()
+
+    @staticmethod
+    def _exists(db, table):
+        return db.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is not None
+
+    def _meta(self, db, ws):
+        r = db.execute("SELECT header, watermark, tail_hash, synced_at, revision, full_at FROM sync_meta WHERE ws=?", (ws,)).fetchone()
+        if not r: return None
+        return {"header": json.loads(r[0]), "watermark": r[1], "tail_hash": r[2], "synced_at": r[3], "revision": r[4], "full_at": r[5]}
+
+    # --- синхронізація ---
+    def add_hook(self, ws, hook):
+        """hook.on_store(db, rows_df, full) викликається в тій самій транзакції, що й запис рядків ws.
+
+        rows_df — нові непорожні рядки текстом (при full=True — увесь аркуш).
+        """
+        self._hooks.setdefault(ws, []).append(hook)
+
+    def mark_stale(self, ws):
+        """Наступне читання ws звіриться з Google, не чекаючи SYNC_INTERVAL (після власних записів)."""
+        self._stale.add(ws)
+
+    def reset(self, ws):
+        """Забуває стан синхронізації ws: наступний sync перечитає аркуш повністю (після видалення рядків)."""
+        with self._connect() as db: db.execute("DELETE FROM sync_meta WHERE ws=?", (ws,))
+
+    def _revision(self, ws):
+        """Ревізія таблиці з коротким кешем у пам'яті; None — якщо API її не дає (тоді лише перевірка хвоста)."""
+        at, rev = self._rev
+        if time.monotonic() - at < REVISION_TTL: return rev
+        try: rev = self.sheets.revision(ws)
+        except Exception: rev = None
+        self._rev = (time.monotonic(), rev)
+        return rev
+
+    def sync(self, ws, force=False):
+        """Підтягує зміни аркуша. Повертає 'skip', 'unchanged', 'append', 'full' або 'raced' (хвіст уже дописав інший)."""
+        lock = self._locks.setdefault(ws, threading.Lock())
+        with lock:
+            with self._connect() as db:
+                meta = self._meta(db, ws)
+            fresh = meta and time.time() - meta["synced_at"] < SYNC_INTERVAL.get(ws, 60)
+            own = ws in self._stale
+            if fresh and not force and not own:
+                cache_event(f"mirror:{ws}", True); return "skip"
+            # Ревізію беремо до читання: зміна під час читання буде помічена наступного разу
+            rev = self._revision(ws)
+            if meta and not force and not own and rev is not None and rev == meta["revision"]:
+                with self._connect() as db: db.execute("UPDATE sync_meta SET synced_at=? WHERE ws=?", (time.time(), ws))
+                cache_event(f"mirror:{ws}", True); return "unchanged"
+            cache_event(f"mirror:{ws}", False)
+            self._stale.discard(ws)
+            age = time.time() - ((meta or {}).get("full_at") or 0)
+            # Нова ревізія за збіглого хвоста може означати правку вище — підтверджується повним перечитуванням
+            full = age > FULL_RESYNC or (rev is not None and rev != (meta or {}).get("revision") and age > VERIFY_AFTER)
+            with span(f"mirror.sync:{ws}"): return self._pull(ws, None if full else meta, rev)
+
+    def refresh(self, ws, force=False):
+        """Stale-while-revalidate: звірення ws з Google у фоні, читач не чекає.
+
+        Синхронно — лише коли в дзеркалі ще немає ws. Повертає 'skip', 'pending' або результат sync.
+        """
+        with self._connect() as db:
+            meta = self._meta(db, ws)
+        if meta is None:
+            try: return self.sync(ws, force)
+            except Exception: self._retry_at[ws] = time.time() + RETRY_AFTER; return "error"
+        own = ws in self._stale
+        if not force and not own and (time.time() - meta["synced_at"] < SYNC_INTERVAL.get(ws, 60) or time.time() < self._retry_at.get(ws, 0)):
+            return "skip"
+        with self._bg_lock:
+            fut = self._inflight.get(ws)
+            if fut is None or fut.done(): self._inflight[ws] = self._pool.submit(self._refresh, ws, force)
+        return "pending"
+
+    def _refresh(self, ws, force):
+        try: return self.sync(ws, force)
+        except Exception:
+            self._retry_at[ws] = time.time() + RETRY_AFTER
+            raise
+
+    def wait_refresh(self, ws, timeout=None):
+        """Чекає фонове звірення ws, якщо воно йде (для скриптів і перевірок)."""
+        fut = self._inflight.get(ws)
+        if fut is not None:
+            try: return fut.result(timeout)
+            except Exception: return "error"
+
+    def _pull(self, ws, meta, rev=None):
+        """Хвіст від водяного знака meta (meta=None — повне перечитування, після якого зберігається ревізія rev)."""
+        if meta and meta["watermark"] > 1 and ws not in FULL_SYNC:
+            start = max(2, meta["watermark"] - OVERLAP + 1)
+            raw_header, rows = self.sheets.header_and_values(ws, start_row=start)
+            overlap, n = meta["watermark"] - start + 1, len(meta["header"])
+            head = [(r + [""] * (n - len(r)))[:n] for r in rows[:overlap]]
+            # Перестановка колонок чи правка старих рядків — лише повне перезавантаження
+            if len(rows) >= overlap and _rows_hash(head) == meta["tail_hash"] and _clean_header(raw_header) == meta["header"]:
+                stored = self._store(ws, meta["header"], rows[overlap:], first_row=meta["watermark"] + 1, tail=head, full=False, base=meta)
+                return "append" if stored else "raced"
+        values = self.sheets.values(ws, start_row=1)
+        header = _clean_header(values[0]) if values else []
+        self._store(ws, header, values[1:], first_row=2, tail=[], full=True, revision=rev)
+        return "full"
+
+    def _store(self, ws, header, rows, first_row, tail, full, base=None, revision=None):
+        """Записує забрані рядки (і хуки) однією транзакцією. Повертає False, якщо дописування хвоста скасовано.
+
+        Хвіст, забраний від водяного знака base, дописується лише якщо водяний знак у файлі за цей час
+        не зрушив: інакше той самий хвіст уже записав інший процес чи дзеркало, і хуки-лічильники
+        (UPSERT n = n + ...) порахували б його двічі.
+        """
+        n = len(header)
+        rows = [(r + [""] * (n - len(r)))[:n] for r in rows]
+        table = _table(ws)
+        with self._connect(immediate=True) as db:
+            now = self._meta(db, ws)
+            if not full:
+                if now is None or (now["watermark"], now["tail_hash"]) != (base["watermark"], base["tail_hash"]): return False
+            if full:
+                self._drop(db, ws)
+                if ws not in PARTITIONED: self._create(db, table, header)
+            df = pd.DataFrame(rows, columns=header)
+            df.insert(0, "_row", range(first_row, first_row + len(rows)))
+            df = df[(df[header] != "").any(axis=1)] if n else df.iloc[:0]
+            for hook in self._hooks.get(ws, []): hook.on_store(db, df.drop(columns="_row"), full)
+            if not df.empty:
+                dates = pd.to_datetime(df[DATE_COLUMN], format="%d.%m.%Y", errors="coerce") if DATE_COLUMN in df.columns else None
+                df.insert(1, "_date", dates.dt.strftime("%Y-%m-%d") if dates is not None else None)
+                df = df.astype(object)
+                df = df.where(df.notna() & (df != ""), None)
+                if ws in PARTITIONED:
+                    for part, grp in df.groupby(df["_date"].str.slice(0, 7).fillna(UNDATED), sort=False):
+                        self._insert_part(db, ws, header, part, grp)
+                else: self._insert(db, table, df)
+            all_tail = (tail + rows)[-OVERLAP:]
+            watermark = first_row + len(rows) - 1 if rows else (first_row - 1)
+            # Дописаний хвіст не підтверджує нову ревізію — лишається та, що була при повному перечитуванні
+            db.execute("INSERT OR REPLACE INTO sync_meta (ws, header, watermark, tail_hash, synced_at, full_at, revision) VALUES (?, ?, ?, ?, ?, ?, ?)", (
+                ws, json.dumps(header, ensure_ascii=False), watermark, _rows_hash(all_tail), time.time(),
+                time.time() if full else now["full_at"], revision if full else now["revision"]))
+        return True
+
+    @staticmethod
+    def _create(db, table, header):
+        cols = ", ".join(f"{_q(c)} {'NUMERIC' if c in NUMERIC_COLUMNS else 'TEXT'}" for c in header)
+        db.execute(f"CREATE TABLE IF NOT EXISTS {table} (_row INTEGER PRIMARY KEY, _date TEXT{', ' + cols if cols else ''})")
+        for suffix, c in (("op", "Оператор"), ("unit", "Підрозділ"), ("date", "_date")):
+            if c == "_date" or c in header:
+                db.execute(f"CREATE INDEX IF NOT EXISTS {table}_{suffix} ON {table} ({_q(c)})")
+
+    @staticmethod
+    def _insert(db, table, df):
+        placeholders = ", ".join("?" * len(df.columns))
+        db.executemany(f"INSERT OR REPLACE INTO {table} ({', '.join(_q(c) for c in df.columns)}) VALUES ({placeholders})", df.itertuples(index=False, name=None))
+
+    def _drop(self, db, ws):
+        self._drop_parts(db, ws)
+        db.execute(f"DROP TABLE IF EXISTS {_table(ws)}")
+
+    @staticmethod
+    def _drop_parts(db, ws):
+        for (tbl,) in db.execute("SELECT tbl FROM partitions WHERE ws=?", (ws,)).fetchall(): db.execute(f"DROP TABLE IF EXISTS {tbl}")
+        db.execute("DELETE FROM partitions WHERE ws=?", (ws,))
+
+    def _insert_part(self, db, ws, header, part, df):
+        """Дописує рядки одного місяця в його партицію й оновлює запис маніфесту."""
+        tbl = _part_table(ws, part)
+        self._create(db, tbl, header)
+        self._insert(db, tbl, df)
+        dates = df["_date"].dropna()
+        ops = set(df["Оператор"].dropna()) if "Оператор" in df.columns else set()
+        units = set(df["Підрозділ"].dropna()) if "Підрозділ" in df.columns else set()
+        old = db.execute("SELECT rows, min_date, max_date, operators, units FROM partitions WHERE ws=? AND part=?", (ws, part)).fetchone()
+        if old:
+            if old[1]: dates = pd.concat([dates, pd.Series([old[1], old[2]])])
+            ops |= set(json.loads(old[3])); units |= set(json.loads(old[4]))
+        db.execute("INSERT OR REPLACE INTO partitions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+            ws, part, tbl, (old[0] if old else 0) + len(df), dates.min() if len(dates) else None, dates.max() if len(dates) else None,
+            json.dumps(sorted(ops), ensure_ascii=False), json.dumps(sorted(units), ensure_ascii=False)))
+
+    def _migrate(self, db, ws):
+        """Одноразово розбиває таблицю старого формату на помісячні партиції (усе в SQL, без pandas)."""
+        legacy = _table(ws)
+        meta = self._meta(db, ws)
+        header = meta["header"] if meta else [r[1] for r in db.execute(f"PRAGMA table_info({legacy})") if not r[1].startswith("_")]
+        month = f"COALESCE(substr(_date, 1, 7), '{UNDATED}')"
+        with span(f"mirror.migrate:{ws}"):
+            self._drop_parts(db, ws)
+            for (part,) in db.execute(f"SELECT DISTINCT {month} FROM {legacy}").fetchall():
+                tbl = _part_table(ws, part)
+                self._create(db, tbl, header)
+                db.execute(f"INSERT OR REPLACE INTO {tbl} SELECT * FROM {legacy} WHERE {month} = ?", (part,))
+                ops = [r[0] for r in db.execute(f"SELECT DISTINCT {_q('Оператор')} FROM {tbl} WHERE {_q('Оператор')} IS NOT NULL")] if "Оператор" in header else []
+                units = [r[0] for r in db.execute(f"SELECT DISTINCT {_q('Підрозділ')} FROM {tbl} WHERE {_q('Підрозділ')} IS NOT NULL")] if "Підрозділ" in header else []
+                cnt, lo, hi = db.execute(f"SELECT COUNT(*), MIN(_date), MAX(_date) FROM {tbl}").fetchone()
+                db.execute("INSERT OR REPLACE INTO partitions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+                    ws, part, tbl, cnt, lo, hi, json.dumps(sorted(ops), ensure_ascii=False), json.dumps(sorted(units), ensure_ascii=False)))
+            db.execute(f"DROP TABLE {legacy}")
+
+    def manifest(self, ws="Sheet1"):
+        """Маніфест партицій ws: місяць, рядки, мін./макс. дата, кількість операторів і підрозділів."""
+        with self._connect() as db:
+            rows = db.execute("SELECT part, rows, min_date, max_date, operators, units FROM partitions WHERE ws=? ORDER BY part", (ws,)).fetchall()
+        return pd.DataFrame([(p, n, lo, hi, len(json.loads(o)), len(json.loads(u))) for p, n, lo, hi, o, u in rows],
+                            columns=["Партиція", "Рядків", "Від", "До", "Операторів", "Підрозділів"])
+
+    def version(self, ws):
+        """Версія даних ws у дзеркалі: змінюється з кожним дописаним рядком і повним перезавантаженням."""
+        with self._connect() as db:
+            r = db.execute("SELECT watermark, full_at FROM sync_meta WHERE ws=?", (ws,)).fetchone()
+        return f"{r[0]}:{r[1]}" if r else "empty"
+
+    # --- читання ---
+    @staticmethod
+    def _where(operator=None, unit=None, date_from=None, date_to=None, result=None, drone=None):
+        where, params = [], []
+        if operator is not None: where.append(f"{_q('Оператор')} = ?"); params.append(operator)
+        if unit is not None: where.append(f"{_q('Підрозділ')} = ?"); params.append(unit)
+        if result is not None: where.append(f"{_q('Результат')} = ?"); params.append(result)
+        if drone is not None: where.append(f"{_q('Дрон')} = ?"); params.append(drone)
+        if date_from is not None: where.append("_date >= ?"); params.append(str(date_from))
+        if date_to is not None: where.append("_date <= ?"); params.append(str(date_to))
+        return (" WHERE " + " AND ".join(where) if where else ""), params
+
+    def _sources(self, db, ws, operator=None, unit=None, date_from=None, date_to=None, **_):
+        """Таблиці, які треба читати: для партиційного аркуша — лише ті, що за маніфестом можуть містити рядки."""
+        if ws not in PARTITIONED: return [_table(ws)] if self._exists(db, _table(ws)) else []
+        lo = str(date_from)[:10] if date_from is not None else None
+        hi = str(date_to)[:10] if date_to is not None else None
+        out = []
+        for tbl, mn, mx, ops, units in db.execute("SELECT tbl, min_date, max_date, operators, units FROM partitions WHERE ws=? ORDER BY part", (ws,)):
+            if (lo or hi) and mn is None: continue  # рядки без дати не потрапляють у жоден діапазон
+            if (lo and mx < lo) or (hi and mn > hi): continue
+            if operator is not None and operator not in json.loads(ops): continue
+            if unit is not None and unit not in json.loads(units): continue
+            out.append(tbl)
+        return out
+
+    def select_sql(self, db, ws, columns=None, **filters):
+        """(sql, params) для рядків ws з фільтрами у порядку аркуша або None, якщо жодна партиція не підходить.
+
+        columns=None — усі колонки разом зі службовими _row і _date; "_row" можна назвати й у columns.
+        """
+        tables = self._sources(db, ws, **filters)
+        if not tables: return None
+        where, params = self._where(**filters)
+        inner = "*" if not columns else ", ".join(["_row"] + [_q(c) for c in columns if c != "_row"])
+        outer = "*" if not columns else ", ".join(_q(c) for c in columns)
+        if len(tables) == 1: return f"SELECT {outer} FROM {tables[0]}{where} ORDER BY _row", params
+        union = " UNION ALL ".join(f"SELECT {inner} FROM {t}{where}" for t in tables)
+        return f"SELECT {outer} FROM ({union}) ORDER BY _row", params * len(tables)
+
+    def sorted_keys(self, ws, sort_by=None, descending=False, **filters):
+        """Ключі рядків під фільтром у порядку sort_by: масив (_row, № таблиці) і список таблиць.
+
+        Сортування в SQLite за типізованою колонкою («Дата» — за _date, числові — як числа);
+        рівні значення — у порядку аркуша.
+        """
+        with self._connect() as db:
+            tables = self._sources(db, ws, **filters)
+            if not tables: return np.empty((0, 2), dtype=np.int64), []
+            where, params = self._where(**filters)
+            col = "_date" if sort_by in (None, DATE_COLUMN) else _q(sort_by)
+            union = " UNION ALL ".join(f"SELECT _row, {i} AS _t, {col} AS _k FROM {t}{where}" for i, t in enumerate(tables))
+            d = " DESC" if descending else ""
+            with span(f"mirror.sort_keys:{ws}") as s:
+                keys = np.array(db.execute(f"SELECT _row, _t FROM ({union}) ORDER BY _k{d}, _row{d}", params * len(tables)).fetchall(), dtype=np.int64).reshape(-1, 2)
+                s.rows = len(keys)
+        return keys, tables
+
+    def fetch(self, ws, keys, tables, columns=None):
+        """Рядки за ключами з sorted_keys (зазвичай — одна сторінка) у порядку ключів."""
+        if not len(keys): return pd.DataFrame(columns=columns or self.columns(ws))
+        sel = "*" if not columns else ", ".join(["_row"] + [_q(c) for c in columns])
+        parts, params = [], []
+        for t in np.unique(keys[:, 1]):
+            rows = keys[keys[:, 1] == t, 0].tolist()
+            parts.append(f"SELECT {sel} FROM {tables[t]} WHERE _row IN ({', '.join('?' * len(rows))})"); params += rows
+        with self._connect() as db:
+            df = pd.read_sql_query(" UNION ALL ".join(parts), db, params=params)
+        df = df.set_index("_row").reindex(keys[:, 0]).reset_index(drop=True)
+        return df.drop(columns=["_date"], errors="ignore")
+
+    def totals(self, ws, **filters):
+        """Підсумки під фільтром одним агрегатом: вильоти, хвилини, метри, затримання, виявлення, оператори."""
+        with self._connect() as db:
+            q = self.select_sql(db, ws, ["Оператор", "Тривалість (хв)", "Дистанція (м)", "Результат"], **filters)
+            if q is None: return {"Вильотів": 0, "Хв": 0, "Метрів": 0, "Затримань": 0, "Виявлень": 0, "Операторів": 0}
+            r = db.execute(f"""SELECT COUNT(*), COALESCE(SUM({_q('Тривалість (хв)')}), 0), COALESCE(SUM({_q('Дистанція (м)')}), 0),
+                               COALESCE(SUM({_q('Результат')} = 'Затримання'), 0), COALESCE(SUM({_q('Результат')} = 'Виявлення цілі'), 0),
+                               COUNT(DISTINCT {_q('Оператор')}) FROM ({q[0]})""", q[1]).fetchone()
+        return dict(zip(["Вильотів", "Хв", "Метрів", "Затримань", "Виявлень", "Операторів"], (int(v or 0) for v in r)))
+
+    def columns(self, ws):
+        """Колонки аркуша ws у дзеркалі (порядок заголовка)."""
+        with self._connect() as db:
+            meta = self._meta(db, ws)
+        return meta["header"] if meta else []
+
+    def query(self, ws, operator=None, unit=None, date_from=None, date_to=None, columns=None, sync=True):
+        """Рядки аркуша ws з фільтрами, виконаними в SQLite. Дати — datetime.date або 'YYYY-MM-DD'.
+
+        sync=True — звірення з Google у фоні (refresh): віддається поточний стан дзеркала.
+        """
+        if sync: self.refresh(ws)
+        with self._connect() as db:
+            try:
+                q = self.select_sql(db, ws, columns, operator=operator, unit=unit, date_from=date_from, date_to=date_to)
+                if q is None: return pd.DataFrame(columns=columns or (self._meta(db, ws) or {"header": []})["header"])
+                with span(f"mirror.read:{ws}") as s:
+                    df = pd.read_sql_query(q[0], db, params=q[1]); s.rows = len(df)
+            except (sqlite3.OperationalError, pd.errors.DatabaseError): return pd.DataFrame()
+        return df.drop(columns=["_row", "_date"], errors="ignore")
+
+    def iter_rows(self, ws, columns, chunk=5000, **filters):
+        """Потокове читання: генератор пачок кортежів (columns у заданому порядку), пам'ять — одна пачка."""
+        with self._connect() as db:
+            q = self.select_sql(db, ws, columns, **filters)
+            if q is None: return
+            cur = db.execute(*q)
+            while True:
+                rows = cur.fetchmany(chunk)
+                if not rows: break
+                yield rows
+
+    def max_lengths(self, ws, columns, **filters):
+        """Найдовше значення кожної колонки (агрегат у SQLite) — для ширини колонок експорту."""
+        with self._connect() as db:
+            q = self.select_sql(db, ws, columns, **filters)
+            r = db.execute(f"SELECT {', '.join(f'MAX(LENGTH({_q(c)}))' for c in columns)} FROM ({q[0]})", q[1]).fetchone() if q else None
+        return {c: (v or 0) for c, v in zip(columns, r or [])}
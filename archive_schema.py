@@ -0,0 +1,43 @@
+"""Типізація архіву польотів: один прохід на кожне завантаження даних.
+
+Аркуші зберігають усе текстом (astype(str) на кожному записі), тому без цього
+кроку «Дата» сортується як рядок дд.мм.рррр, а аналітика щоразу розбирає дати
+заново. Після normalize_archive:
+  * «Дата» — datetime64;
+  * тривалість, дистанція та цикли АКБ — компактні цілі з пропусками (Int16 /
+    Int32): порожнє, нерозпізнане чи поза межами типу — <NA>, а не 0;
+  * підрозділ, оператор, результат і дрон — categorical;
+  * стара колонка «Взльот» (з першої версії кабінету) злита в «Зліт».
+"""
+import numpy as np
+import pandas as pd
+
+DATE_FORMAT = "%d.%m.%Y"
+LEGACY_COLUMNS = {"Взльот": "Зліт"}
+INT_COLUMNS = {"Тривалість (хв)": "Int16", "Дистанція (м)": "Int32", "Цикли АКБ": "Int16"}
+CATEGORY_COLUMNS = ("Підрозділ", "Оператор", "Результат", "Дрон")
+
+
+def merge_legacy_columns(df):
+    """Переносить значення зі старих колонок у нові (лише там, де нової немає)."""
+    for old, new in LEGACY_COLUMNS.items():
+        if old not in df.columns: continue
+        if new in df.columns: df[new] = df[new].where(df[new].notna() & (df[new] != ""), df[old])
+        else: df[new] = df[old]
+        df = df.drop(columns=[old])
+    return df
+
+
+def normalize_archive(df):
+    """Повертає нову типізовану копію архіву (вхідний DataFrame не змінюється)."""
+    if df is None or df.empty: return pd.DataFrame()
+    df = merge_legacy_columns(df.copy())
+    if "Дата" in df.columns:
+        df["Дата"] = pd.to_datetime(df["Дата"], format=DATE_FORMAT, errors="coerce")
+    for col, dtype in INT_COLUMNS.items():
+        if col in df.columns:
+            num, lim = pd.to_numeric(df[col], errors="coerce").round(), np.iinfo(dtype.lower())
+            df[col] = num.where(num.between(lim.min, lim.max)).astype(dtype)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns: df[col] = df[col].astype("category")
+    return df
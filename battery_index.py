@@ -0,0 +1,101 @@
+"""Стан акумуляторів (АКБ) за вильотами архіву.
+
+Рядок на (підрозділ, номер АКБ): останні введені цикли, кількість вильотів,
+хвилини нальоту, перший і останній виліт. Як і зведення аналітики, таблиця
+живе в SQLite дзеркала й оновлюється в одній транзакції з ним: нові рядки
+Sheet1 додаються UPSERT-ом, повне перезавантаження перебудовує її векторно.
+Картка однієї АКБ — пошук за первинним ключем, огляд парку — читання
+таблиці, тож жодне з них не залежить від кількості вильотів.
+"""
+import os
+
+import pandas as pd
+
+from perf import span
+
+TABLE = "battery_state"
+KEYS = ["Підрозділ", "АКБ"]
+AKB_MAX_CYCLES = int(os.environ.get("UAV_AKB_MAX_CYCLES", 300))  # ресурс АКБ у циклах заряду
+AKB_WARN = 0.8  # частка ресурсу, після якої АКБ показується як зношена
+
+
+def akb_key(value):
+    """Номер АКБ у вигляді ключа: без пробілів по краях, великими літерами (а01-03 = А01-03)."""
+    return str(value or "").strip().upper()
+
+
+def aggregate(df):
+    """Векторне зведення рядків архіву до стану АКБ у межах пачки (по рядку на KEYS)."""
+    cols = KEYS + ["Цикли", "Вильоти", "Хв", "Перший виліт", "Останній виліт"]
+    if df is None or df.empty or not {"Підрозділ", "Номер АКБ", "Дата"} <= set(df.columns): return pd.DataFrame(columns=cols)
+    dates = df["Дата"] if pd.api.types.is_datetime64_any_dtype(df["Дата"]) else pd.to_datetime(df["Дата"], format="%d.%m.%Y", errors="coerce")
+    cyc = pd.to_numeric(df["Цикли АКБ"], errors="coerce") if "Цикли АКБ" in df.columns else pd.Series(float("nan"), index=df.index)
+    flat = pd.DataFrame({
+        "Підрозділ": df["Підрозділ"].astype(str), "АКБ": df["Номер АКБ"].map(akb_key),
+        "Цикли": cyc.where(cyc > 0),  # 0 — значення поля за замовчуванням, а не показ лічильника
+        "Хв": pd.to_numeric(df["Тривалість (хв)"], errors="coerce").fillna(0) if "Тривалість (хв)" in df.columns else 0,
+        "_d": dates,
+    })
+    flat = flat[flat["АКБ"] != ""]
+    if flat.empty: return pd.DataFrame(columns=cols)
+    # «Останні» цикли — з найпізнішого за датою рядка (за рівних дат — пізніше записаного)
+    flat = flat.sort_values("_d", kind="stable", na_position="first")
+    out = flat.groupby(KEYS, sort=False).agg(Цикли=("Цикли", "last"), Вильоти=("АКБ", "size"), Хв=("Хв", "sum"),
+                                             first=("_d", "min"), last=("_d", "max")).reset_index()
+    out["Перший виліт"], out["Останній виліт"] = out.pop("first").dt.strftime("%Y-%m-%d"), out.pop("last").dt.strftime("%Y-%m-%d")
+    out["Хв"] = out["Хв"].round().astype(int)
+    return out[cols]
+
+
+class BatteryIndex:
+    def __init__(self, mirror, ws="Sheet1"):
+        self.mirror, self.ws = mirror, ws
+        with mirror._connect(immediate=True) as db:  # побудова й запис хвоста іншим процесом — по черзі
+            exists = db.execute("SELECT 1 FROM sqlite_master WHERE name=?", (TABLE,)).fetchone()
+            db.execute(f"""CREATE TABLE IF NOT EXISTS {TABLE} ("Підрозділ" TEXT, "АКБ" TEXT, "Цикли" INTEGER, "Вильоти" INTEGER,
+                           "Хв" INTEGER, "Перший виліт" TEXT, "Останній виліт" TEXT, PRIMARY KEY ("Підрозділ", "АКБ"))""")
+            # Дзеркало, синхронізоване до появи індексу: одноразова побудова з нього
+            q = None if exists else mirror.select_sql(db, ws, ["Дата", "Підрозділ", "Номер АКБ", "Цикли АКБ", "Тривалість (хв)"])
+            if q: self._insert(db, aggregate(pd.read_sql_query(q[0], db, params=q[1])))
+        mirror.add_hook(ws, self)
+
+    def on_store(self, db, rows, full):
+        if full: db.execute(f"DELETE FROM {TABLE}")
+        self._insert(db, aggregate(rows))
+
+    def _insert(self, db, agg):
+        if agg.empty: return
+        db.executemany(f"""
+            INSERT INTO {TABLE} VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT ("Підрозділ", "АКБ") DO UPDATE SET
+                "Цикли" = CASE WHEN excluded."Цикли" IS NULL THEN "Цикли"
+                               WHEN "Цикли" IS NULL OR COALESCE(excluded."Останній виліт", '') >= COALESCE("Останній виліт", '') THEN excluded."Цикли"
+                               ELSE "Цикли" END,
+                "Вильоти" = "Вильоти" + excluded."Вильоти", "Хв" = "Хв" + excluded."Хв",
+                "Перший виліт" = COALESCE(MIN("Перший виліт", excluded."Перший виліт"), "Перший виліт", excluded."Перший виліт"),
+                "Останній виліт" = COALESCE(MAX("Останній виліт", excluded."Останній виліт"), "Останній виліт", excluded."Останній виліт")""",
+            agg.astype(object).where(agg.notna(), None).itertuples(index=False, name=None))
+
+    @staticmethod
+    def _derive(df):
+        df["Наліт, год"] = (df["Хв"] / 60).round(1)
+        df["Хв/виліт"] = (df["Хв"] / df["Вильоти"].where(df["Вильоти"] > 0)).round(1)
+        df["Ресурс, %"] = (100 * df["Цикли"] / AKB_MAX_CYCLES).round(0)
+        return df
+
+    def get(self, unit, akb):
+        """Стан однієї АКБ (dict) або None — пошук за первинним ключем."""
+        key = akb_key(akb)
+        if not key: return None
+        with self.mirror._connect() as db:
+            cur = db.execute(f'SELECT * FROM {TABLE} WHERE "Підрозділ" = ? AND "АКБ" = ?', (unit, key))
+            row = cur.fetchone()
+            if not row: return None
+            names = [d[0] for d in cur.description]
+        return self._derive(pd.DataFrame([row], columns=names)).iloc[0].to_dict()
+
+    def fleet(self, unit=None):
+        """Усі АКБ (або АКБ підрозділу), найзношеніші першими."""
+        self.mirror.refresh(self.ws)
+        sql = f'SELECT * FROM {TABLE}' + (' WHERE "Підрозділ" = ?' if unit else "") + ' ORDER BY "Цикли" DESC, "Хв" DESC'
+        with span("batteries.fleet"), self.mirror._connect() as db:
+            return self._derive(pd.read_sql_query(sql, db, params=(unit,) if unit else ()))
@@ -0,0 +1,95 @@
+"""Розподіл вильотів для ЦУС («До 00:00» / «Після 00:00») над архівом.
+
+Та сама логіка, що й flight_logic.split_midnight для списку зміни, але
+векторно для будь-якого діапазону дат і всіх підрозділів одразу. Зміна —
+(дата, підрозділ, оператор, «Час завдання»); вильоти після півночі мають
+дату початку зміни. Виліт іде в «Після 00:00», якщо посадка раніше зльоту,
+зліт раніше початку зміни або він записаний після такого вильоту в тій самій
+зміні (липкий прапорець — cummax у порядку рядків архіву). Блоки — на
+(дата, підрозділ, зміна, частина); у блоці вильоти впорядковані від початку
+зміни.
+
+    blocks = cus_blocks(mirror.query("Sheet1", date_from=d0, date_to=d1, columns=COLUMNS, sync=False))
+    text = cus_report(blocks, UNITS)
+"""
+import numpy as np
+import pandas as pd
+
+from flight_logic import UNITS
+from perf import span
+
+COLUMNS = ["Дата", "Час завдання", "Підрозділ", "Оператор", "Зліт", "Посадка", "Дистанція (м)", "Тривалість (хв)"]
+PARTS = ("До 00:00", "Після 00:00")
+SHIFT = ["Дата", "Підрозділ", "Оператор", "Час завдання"]
+
+
+def _per_unique(s, fn):
+    """fn над унікальними значеннями s і розкладка назад: часи, дати й числа в архіві сильно повторюються."""
+    codes, uniq = pd.factorize(s)
+    return pd.Series(fn(pd.Series(uniq, dtype=object)).to_numpy()).reindex(codes).set_axis(s.index)
+
+
+def _minutes(s):
+    """'HH:MM' (або 'HH:MM - HH:MM' — береться початок) → хвилини від 00:00; нерозпізнане — NaN."""
+    def parse(u):
+        u = u.astype(str).str.strip().str.slice(0, 5)
+        h, m = pd.to_numeric(u.str.slice(0, 2), errors="coerce"), pd.to_numeric(u.str.slice(3, 5), errors="coerce")
+        return (h * 60 + m).where(u.str.fullmatch(r"\d{2}:\d{2}") & (h < 24) & (m < 60))
+    return _per_unique(s, parse)
+
+
+def _int_text(s):
+    return _per_unique(s, lambda u: pd.to_numeric(u, errors="coerce").fillna(0).round().astype(int).astype(str))
+
+
+def split_frame(df):
+    """Рядки архіву з колонками «Частина» (0 — до півночі, 1 — після) і «Хв від початку» для сортування."""
+    if df is None or df.empty or not set(COLUMNS) <= set(df.columns): return pd.DataFrame(columns=COLUMNS + ["Частина", "Хв від початку"])
+    df = df[COLUMNS].reset_index(drop=True)
+    start, off, land = _minutes(df["Час завдання"]), _minutes(df["Зліт"]), _minutes(df["Посадка"])
+    keep = (start.notna() & off.notna() & land.notna()).to_numpy()
+    df, start, off, land = df[keep], start[keep], off[keep], land[keep]
+    cross = ((land < off) | (off < start)).astype(np.int8)
+    # Після першого переходу через північ — усі наступні вильоти зміни (порядок рядків архіву)
+    cross = cross.groupby([df[c] for c in SHIFT], sort=False, dropna=False).cummax()  # порожній оператор — теж зміна
+    return df.assign(**{"Частина": cross.to_numpy(), "Хв від початку": ((off - start) % 1440).astype(int).to_numpy()})
+
+
+def cus_blocks(df):
+    """Блоки ЦУС: по рядку на (Дата, Підрозділ, Час завдання, Частина) з текстом, кількістю вильотів і хвилинами."""
+    cols = ["Дата", "Підрозділ", "Час завдання", "Частина", "Текст", "Вильотів", "Хв"]
+    with span("cus.blocks", rows=0 if df is None else len(df)):
+        f = split_frame(df)
+        day = _per_unique(f["Дата"], lambda u: pd.to_datetime(u, format="%d.%m.%Y", errors="coerce")).to_numpy("datetime64[ns]")
+        f = f[~np.isnat(day)]; day = day[~np.isnat(day)]
+        if f.empty: return pd.DataFrame(columns=cols)
+        # Сортування кодами замість рядків: дата → підрозділ → зміна → частина → від початку зміни
+        unit = pd.factorize(f["Підрозділ"], sort=True)[0]
+        shift = pd.factorize(f["Час завдання"], sort=True)[0]
+        part = f["Частина"].to_numpy()
+        order = np.lexsort((f["Хв від початку"].to_numpy(), part, shift, unit, day))
+        day, unit, shift, part = day[order], unit[order], shift[order], part[order]
+        f = f.iloc[order]
+        lines = (f["Зліт"].astype(str) + " - " + f["Посадка"].astype(str) + " - " + _int_text(f["Дистанція (м)"])
+                 + " м (" + _int_text(f["Тривалість (хв)"]) + " хв)").tolist()
+        new = np.r_[True, (day[1:] != day[:-1]) | (unit[1:] != unit[:-1]) | (shift[1:] != shift[:-1]) | (part[1:] != part[:-1])]
+        starts = np.flatnonzero(new); ends = np.r_[starts[1:], len(f)]
+        mins = pd.to_numeric(f["Тривалість (хв)"], errors="coerce").fillna(0).to_numpy()
+        head = f.iloc[starts]
+        return pd.DataFrame({
+            "Дата": head["Дата"].to_numpy(), "Підрозділ": head["Підрозділ"].to_numpy(), "Час завдання": head["Час завдання"].to_numpy(),
+            "Частина": np.array(PARTS, dtype=object)[part[starts]],
+            "Текст": ["\n".join(lines[a:b]) for a, b in zip(starts, ends)],
+            "Вильотів": ends - starts, "Хв": np.add.reduceat(mins, starts).round().astype(int),
+        }, columns=cols)
+
+
+def cus_report(blocks, units=UNITS):
+    """Один текст ЦУС для всіх units: підрозділ → зміна → «До 00:00» / «Після 00:00»."""
+    by_unit = {}
+    for day, unit, shift, part, text in zip(*(blocks[c].tolist() for c in ("Дата", "Підрозділ", "Час завдання", "Частина", "Текст"))):
+        lines = by_unit.setdefault(unit, [])
+        head = f"📅 {day}, {shift}"
+        if head not in lines[-2:]: lines.append(head)  # «Після 00:00» тієї ж зміни — під тим самим заголовком
+        lines.append(f"{'🌙' if part == PARTS[0] else '☀️'} {part}:\n{text}")
+    return "\n\n".join(f"■ {u}\n" + ("\n".join(by_unit[u]) if u in by_unit else "— вильотів не було") for u in units)
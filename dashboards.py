@@ -0,0 +1,64 @@
+"""Графіки нальоту для вкладки «Аналітика».
+
+Вхід — уже агреговані кошики з RollupStore.buckets (день / тиждень / місяць ×
+підрозділ, оператор, БпЛА чи результат), тож розмір фігури й час її
+відмальовки залежать від кількості кошиків, а не вильотів. Серій не більше
+MAX_SERIES (решта — «Інші»); коли точок понад WEBGL_POINTS (денні кошики за
+роки), замість стовпців малюються WebGL-лінії (Scattergl).
+
+    fig = hours_figure(rollups.buckets("Тиждень", "Підрозділ"), "Підрозділ")
+    fig = units_figure(rollups.buckets("Місяць", "Підрозділ"), UNITS)
+"""
+import pandas as pd
+import plotly.graph_objects as go
+
+WEBGL_POINTS = 1000
+MAX_SERIES = 12
+OTHER = "Інші"
+
+
+def _hours(df, by):
+    """Кошики → таблиця годин: рядки — «Період» (datetime), колонки — значення by (найбільші першими)."""
+    if df.empty: return pd.DataFrame()
+    df = df.assign(**{by: df[by].fillna("").replace("", "—")})
+    totals = df.groupby(by)["Хв"].sum().sort_values(ascending=False)
+    if len(totals) > MAX_SERIES:
+        df = df.assign(**{by: df[by].where(df[by].isin(totals.index[:MAX_SERIES - 1]), OTHER)})
+        totals = df.groupby(by)["Хв"].sum().sort_values(ascending=False)
+    wide = df.pivot_table(index="Період", columns=by, values="Хв", aggfunc="sum", fill_value=0)[totals.index]
+    wide.index = pd.to_datetime(wide.index)
+    return (wide / 60).round(1)
+
+
+def _layout(fig, title):
+    fig.update_layout(title=title, margin=dict(l=10, r=10, t=40, b=10), legend=dict(orientation="h", y=-0.15),
+                      yaxis_title="Наліт, год", hovermode="x unified")
+    return fig
+
+
+def hours_figure(df, by, title="Наліт"):
+    """Наліт за кошиками з розбивкою by: стовпці з накопиченням або WebGL-лінії при великій кількості точок."""
+    wide = _hours(df, by)
+    fig = go.Figure()
+    if wide.empty: return _layout(fig, title)
+    gl = wide.size > WEBGL_POINTS
+    for name in wide.columns:
+        y = wide[name].to_numpy()
+        if gl: fig.add_trace(go.Scattergl(x=wide.index, y=y, name=str(name), mode="lines"))
+        else: fig.add_trace(go.Bar(x=wide.index, y=y, name=str(name)))
+    if not gl: fig.update_layout(barmode="stack")
+    return _layout(fig, title)
+
+
+def units_figure(df, units, title="Наліт підрозділів"):
+    """Теплова карта підрозділ × кошик (години): усі units, зокрема без вильотів, у заданому порядку."""
+    if df.empty: wide = pd.DataFrame(0.0, index=pd.DatetimeIndex([]), columns=list(units))
+    else:
+        wide = df.pivot_table(index="Період", columns="Підрозділ", values="Хв", aggfunc="sum", fill_value=0).reindex(columns=list(units), fill_value=0)
+        wide.index = pd.to_datetime(wide.index)
+        wide = (wide / 60).round(1)
+    fig = go.Figure(go.Heatmap(z=wide.T.to_numpy(), x=wide.index, y=list(units), colorscale="Blues",
+                               colorbar=dict(title="год"), hovertemplate="%{y}<br>%{x|%d.%m.%Y}: %{z} год<extra></extra>"))
+    fig.update_layout(title=title, margin=dict(l=10, r=10, t=40, b=10), height=max(300, 24 * len(units) + 80),
+                      yaxis=dict(autorange="reversed"))
+    return fig
@@ -0,0 +1 @@
+"""Локальні замінники зовнішніх сервісів і інструменти перевірки продуктивності."""
@@ -0,0 +1,120 @@
+"""Порівняння затримки: додавання вильоту через JSON API та через Streamlit.
+
+Обидва шляхи працюють на однакових даних у FakeConnection (без Google) і з
+однаковим дзеркалом. Для API міряється повний HTTP-запит (uvicorn, gzip) і
+розмір відповіді; для Streamlit — прогін скрипта в AppTest після натискання
+«ДОДАТИ У СПИСОК», тобто нижня межа: без передачі дельти через websocket і
+рендерингу в браузері.
+
+    python -m devtools.api_latency --flights 30 --rows 5000 --out api_latency.json
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UNIT, OPERATOR = "впс Кодима", "ст.с-т Тест"
+
+
+def _pct(xs):
+    xs = sorted(xs)
+    return {"n": len(xs), "p50_ms": round(1000 * statistics.median(xs), 2),
+            "p95_ms": round(1000 * xs[min(len(xs) - 1, int(0.95 * len(xs)))], 2), "max_ms": round(1000 * xs[-1], 2)}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+
+def bench_api(data, flights, latency, workdir):
+    import uvicorn
+    from api_server import Backend, make_app
+    from devtools.fake_sheets import FakeConnection
+    from sheets_io import SheetsIO
+
+    backend = Backend(SheetsIO(FakeConnection(data, latency)), mirror_path=os.path.join(workdir, "api.sqlite"))
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(make_app(backend), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started: time.sleep(0.05)
+    base, s = f"http://127.0.0.1:{port}", requests.Session()
+    try:
+        s.post(f"{base}/api/login", json={"name": OPERATOR, "unit": UNIT}).raise_for_status()
+        add, sizes = [], []
+        for i in range(flights):
+            body = {"takeoff": f"{8 + i % 12:02d}00", "landing": f"{8 + i % 12:02d}40", "drone": "Mavic 3T (S/N: 1AB)", "distance": 1200}
+            t0 = time.perf_counter(); r = s.post(f"{base}/api/flights", json=body); add.append(time.perf_counter() - t0)
+            r.raise_for_status(); sizes.append(len(r.content))
+        t0 = time.perf_counter(); r = s.get(f"{base}/api/flights"); first = time.perf_counter() - t0
+        etag = r.headers["ETag"]
+        t0 = time.perf_counter(); r304 = s.get(f"{base}/api/flights", headers={"If-None-Match": etag}); cached = time.perf_counter() - t0
+        arch = s.get(f"{base}/api/flights", params={"scope": "archive"}, stream=True)
+        raw = arch.raw.read(decode_content=False)
+        t0 = time.perf_counter(); s.post(f"{base}/api/flights/submit"); submit = time.perf_counter() - t0
+        return {"add_flight": _pct(add), "add_flight_response_bytes": int(statistics.median(sizes)),
+                "list_ms": round(1000 * first, 2), "list_304_ms": round(1000 * cached, 2), "list_304_status": r304.status_code,
+                "archive_gzip_bytes": len(raw), "archive_encoding": arch.headers.get("content-encoding"),
+                "submit_ms": round(1000 * submit, 2)}
+    finally:
+        server.should_exit = True
+
+
+def bench_streamlit(data, flights, latency, workdir):
+    from streamlit.testing.v1 import AppTest
+    from archive_mirror import ArchiveMirror
+    from devtools.fake_sheets import FakeConnection
+    from sheets_io import SheetsIO
+
+    # Дзеркало наповнюється з тих самих даних: main.py читає архів і реєстр з нього
+    path = os.path.join(workdir, "st.sqlite")
+    mirror = ArchiveMirror(SheetsIO(FakeConnection(data, latency)), path=path)
+    for ws in data: mirror.sync(ws, force=True)
+    os.environ["UAV_MIRROR_PATH"] = path
+    at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=120)
+    at.secrets["TELEGRAM_BOT_TOKEN"] = ""
+    at.secrets["connections"] = {"gsheets": {"spreadsheet": "local"}}
+    at.run(); at.run()
+    at.selectbox[0].set_value(UNIT); at.text_input[0].input(OPERATOR); at.button[0].click(); at.run()
+    add = []
+    for i in range(flights):
+        [t for t in at.text_input if t.label == "Зліт"][0].input(f"{8 + i % 12:02d}00")
+        [t for t in at.text_input if t.label == "Посадка"][0].input(f"{8 + i % 12:02d}40")
+        btn = [b for b in at.button if "ДОДАТИ У СПИСОК" in b.label][0]
+        t0 = time.perf_counter(); btn.click(); at.run(); add.append(time.perf_counter() - t0)
+    return {"add_flight": _pct(add), "shift_flights": len(at.session_state["temp_flights"]), "exceptions": [str(e.value) for e in at.exception]}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--flights", type=int, default=20)
+    ap.add_argument("--rows", type=int, default=3000, help="рядків у синтетичному Sheet1")
+    ap.add_argument("--latency", type=float, default=0.0, help="с штучної затримки на виклик Sheets")
+    ap.add_argument("--skip-streamlit", action="store_true")
+    ap.add_argument("--out")
+    a = ap.parse_args()
+    sys.path.insert(0, ROOT)
+    from devtools.synthetic import synthetic_sheets
+    data, workdir = synthetic_sheets(a.rows), tempfile.mkdtemp(prefix="uav_latency_")
+    try:
+        res = {"params": vars(a), "api": bench_api(data, a.flights, a.latency, workdir)}
+        if not a.skip_streamlit: res["streamlit"] = bench_streamlit(data, a.flights, a.latency, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    out = json.dumps(res, ensure_ascii=False, indent=2)
+    print(out)
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as fh: fh.write(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Бенчмарки гарячих шляхів main.py на синтетичному архіві.
+
+Дані — devtools.synthetic (детерміновані за seed), Google замінює
+FakeConnection із затримкою на запит і на рядок. Кожен бенчмарк має
+неміряну підготовку й міряний прогін; результат — JSON з медіаною, мінімумом
+і максимумом, який можна порівняти з попереднім релізом (--baseline): вихід
+з кодом 1, якщо медіана будь-якого бенчмарку зросла більше ніж у --tolerance
+разів.
+
+    python -m devtools.bench --rows 10000 100000 --out bench.json
+    python -m devtools.bench --rows 100000 --only load_data --baseline bench.json
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import time as d_time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+import archive_export  # noqa: E402
+from archive_mirror import ArchiveMirror  # noqa: E402
+from archive_schema import normalize_archive  # noqa: E402
+from battery_index import BatteryIndex  # noqa: E402
+from cus_engine import COLUMNS as CUS_COLUMNS, cus_blocks, cus_report  # noqa: E402
+from dashboards import hours_figure, units_figure  # noqa: E402
+from devtools.fake_sheets import FakeConnection  # noqa: E402
+from devtools.synthetic import HEADER, operators, synthetic_sheets  # noqa: E402
+from drone_registry import DroneRegistry  # noqa: E402
+from flight_checks import archive_conflicts  # noqa: E402
+from flight_import import parse_text  # noqa: E402
+from flight_logic import UNITS, cus_text, split_midnight  # noqa: E402
+from flight_writer import FlightWriter  # noqa: E402
+from rollups import RollupStore, aggregate  # noqa: E402
+from sheets_io import SheetsIO  # noqa: E402
+
+BENCHES = {}
+
+
+def bench(name, repeat=5):
+    """Реєструє бенчмарк. Функція отримує Context і повертає run або (setup, run): setup() -> arg, run(arg)."""
+    def deco(fn):
+        BENCHES[name] = (fn, repeat)
+        return fn
+    return deco
+
+
+class Context:
+    def __init__(self, rows, seed, latency, row_latency, workdir):
+        self.rows, self.workdir = rows, workdir
+        self.data = synthetic_sheets(rows, seed)
+        self.conn = FakeConnection(self.data, latency, row_latency)
+        self.sheets = SheetsIO(self.conn)
+        self.mirror = ArchiveMirror(self.sheets, path=self.path("mirror.sqlite"))
+        for ws in ("Sheet1", "DronesDB", "Drafts"): self.mirror.sync(ws, force=True)
+        self.operator = operators(self.data, UNITS[0])[0]
+        self._typed = None
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+    def typed(self):
+        if self._typed is None: self._typed = normalize_archive(self.mirror.query("Sheet1", sync=False))
+        return self._typed
+
+
+# --- дзеркало та load_data ---
+@bench("mirror.full_sync", repeat=3)
+def _full_sync(ctx):
+    n = iter(range(1000))
+    return (lambda: ArchiveMirror(ctx.sheets, path=ctx.path(f"full_{next(n)}.sqlite")),
+            lambda m: m.sync("Sheet1", force=True))
+
+
+@bench("mirror.append_sync")
+def _append_sync(ctx):
+    tail = ctx.data["Sheet1"][-50:]
+    def setup(): ctx.conn.data["Sheet1"].extend(list(r) for r in tail)
+    return setup, lambda _: ctx.mirror.sync("Sheet1", force=True)
+
+
+@bench("mirror.probe_unchanged")
+def _probe(ctx):
+    # Звірення незміненої таблиці: лише ревізія (Drive modifiedTime), без читання аркуша
+    def setup():
+        with ctx.mirror._connect() as db: db.execute("UPDATE sync_meta SET synced_at = 0")
+        ctx.mirror._rev = (0.0, None)
+    setup(); ctx.mirror.sync("Sheet1")
+    return setup, lambda _: ctx.mirror.sync("Sheet1")
+
+
+@bench("load_data.operator")
+def _load_operator(ctx):
+    return lambda: normalize_archive(ctx.mirror.query("Sheet1", operator=ctx.operator, sync=False))
+
+
+@bench("load_data.unit_month")
+def _load_unit_month(ctx):
+    return lambda: ctx.mirror.query("Sheet1", unit=UNITS[0], date_from=pd.Timestamp("2025-12-01"), date_to=pd.Timestamp("2025-12-31"), sync=False)
+
+
+@bench("load_data.all", repeat=3)
+def _load_all(ctx):
+    return lambda: normalize_archive(ctx.mirror.query("Sheet1", sync=False))
+
+
+# --- запис ---
+@bench("submit.shift_20")
+def _submit(ctx):
+    writer = FlightWriter(ctx.sheets)
+    rows = [dict(zip(HEADER, r)) for r in ctx.data["Sheet1"][1:21]]
+    return lambda: writer.submit_flights(rows, operator=ctx.operator).result(120)
+
+
+# --- аналітика ---
+@bench("analytics.aggregate", repeat=3)
+def _aggregate(ctx):
+    df = ctx.typed()
+    return lambda: aggregate(df)
+
+
+@bench("analytics.rollup_monthly")
+def _rollup(ctx):
+    store = RollupStore(ctx.mirror)
+    return lambda: store.monthly()
+
+
+@bench("analytics.dashboard", repeat=3)
+def _dashboard(ctx):
+    # Тижневі кошики по операторах і теплова карта підрозділів разом із серіалізацією фігур
+    store = RollupStore(ctx.mirror)
+    return lambda: (hours_figure(store.buckets("Тиждень", "Оператор"), "Оператор").to_json(),
+                    units_figure(store.buckets("Тиждень", "Підрозділ"), UNITS).to_json())
+
+
+# --- експорт (колишній convert_df_to_excel) ---
+@bench("export.xlsx", repeat=1)
+def _export_xlsx(ctx):
+    def setup():
+        archive_export.EXPORT_DIR = ctx.path("exports")
+        shutil.rmtree(archive_export.EXPORT_DIR, ignore_errors=True)
+    return setup, lambda _: archive_export.export_archive(ctx.mirror, "xlsx")
+
+
+@bench("export.csv", repeat=1)
+def _export_csv(ctx):
+    def setup():
+        archive_export.EXPORT_DIR = ctx.path("exports")
+        shutil.rmtree(archive_export.EXPORT_DIR, ignore_errors=True)
+    return setup, lambda _: archive_export.export_archive(ctx.mirror, "csv")
+
+
+# --- ЦУС і реєстр БпЛА ---
+@bench("cus.split_shifts", repeat=3)
+def _cus(ctx):
+    cols = ["Дата", "Оператор", "Час завдання", "Зліт", "Посадка", "Дистанція (м)", "Тривалість (хв)"]
+    df = pd.DataFrame([r[:len(HEADER)] for r in ctx.data["Sheet1"][1:]], columns=HEADER)[cols]
+    shifts = [(d_time(int(k[2][:2]), int(k[2][3:5])), g.to_dict("records")) for k, g in df.groupby(["Дата", "Оператор", "Час завдання"], sort=False)]
+    def run():
+        for start, flights in shifts:
+            before, after = split_midnight(flights, start)
+            cus_text(before); cus_text(after)
+        return len(shifts)
+    return run
+
+
+@bench("cus.engine_all_units", repeat=3)
+def _cus_engine(ctx):
+    # Той самий розподіл векторно над архівом: блоки й текст для всіх підрозділів
+    return lambda: cus_report(cus_blocks(ctx.mirror.query("Sheet1", columns=CUS_COLUMNS, sync=False)))
+
+
+@bench("batteries.lookup")
+def _batteries(ctx):
+    index = BatteryIndex(ctx.mirror)
+    akb = ctx.data["Sheet1"][1][10]
+    return lambda: (index.get(UNITS[0], akb), index.fleet())
+
+
+@bench("checks.archive_sweep", repeat=3)
+def _checks(ctx):
+    # Перетини оператор / БпЛА / АКБ по всьому архіву
+    return lambda: archive_conflicts(ctx.mirror)
+
+
+@bench("import.parse_text", repeat=3)
+def _import(ctx):
+    # Увесь архів як вставлений список зміни: «09:00 - 09:30 - 1200 м»
+    i_off, i_land, i_dist = (HEADER.index(c) for c in ("Зліт", "Посадка", "Дистанція (м)"))
+    text = "\n".join(f"{r[i_off]} - {r[i_land]} - {r[i_dist]} м" for r in ctx.data["Sheet1"][1:])
+    return lambda: parse_text(text)
+
+
+@bench("drones.registry")
+def _drones(ctx):
+    def run():
+        registry = DroneRegistry(ctx.mirror.query("DronesDB", sync=False))
+        return [registry.for_unit(u) for u in UNITS]
+    return run
+
+
+def run_bench(name, ctx):
+    fn, repeat = BENCHES[name]
+    made = fn(ctx)
+    setup, run = made if isinstance(made, tuple) else (None, made)
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0 = time.perf_counter()
+        run(arg) if setup else run()
+        times.append(time.perf_counter() - t0)
+    return {"name": name, "rows": ctx.rows, "runs": repeat, "median_s": round(statistics.median(times), 6),
+            "min_s": round(min(times), 6), "max_s": round(max(times), 6)}
+
+
+def _meta(args):
+    try: rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError: rev = ""
+    return {"git": rev, "python": platform.python_version(), "pandas": pd.__version__, "platform": platform.platform(),
+            "cpus": os.cpu_count(), "at": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(args)}
+
+
+def compare(results, baseline_path, tolerance):
+    """Рядки порівняння з базовим файлом і ознака регресії."""
+    with open(baseline_path, encoding="utf-8") as fh: base = {(r["name"], r["rows"]): r for r in json.load(fh)["results"]}
+    lines, regressed = [], False
+    for r in results:
+        b = base.get((r["name"], r["rows"]))
+        if not b or not b["median_s"]: continue
+        ratio = r["median_s"] / b["median_s"]
+        bad = ratio > tolerance; regressed |= bad
+        lines.append(f"{'РЕГРЕСІЯ' if bad else 'ok':9} {r['name']:26} {r['rows']:>9} {b['median_s']:.4f} → {r['median_s']:.4f} с (×{ratio:.2f})")
+    return lines, regressed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000])
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--latency", type=float, default=0.0, help="с на кожен запит до Sheets")
+    ap.add_argument("--row-latency", type=float, default=0.0, help="с на кожен переданий рядок")
+    ap.add_argument("--only", nargs="*", default=[], help="шаблони назв (fnmatch), напр. load_data*")
+    ap.add_argument("--skip", nargs="*", default=[])
+    ap.add_argument("--out")
+    ap.add_argument("--baseline")
+    ap.add_argument("--tolerance", type=float, default=1.3)
+    ap.add_argument("--list", action="store_true")
+    a = ap.parse_args()
+    names = [n for n in BENCHES
+             if (not a.only or any(fnmatch.fnmatch(n, p + ("*" if "*" not in p else "")) for p in a.only))
+             and not any(fnmatch.fnmatch(n, p) for p in a.skip)]
+    if a.list: print("\n".join(names)); return
+    results = []
+    for rows in a.rows:
+        workdir = tempfile.mkdtemp(prefix="uav_bench_")
+        try:
+            t0 = time.perf_counter()
+            ctx = Context(rows, a.seed, a.latency, a.row_latency, workdir)
+            print(f"# {rows} рядків: дані й дзеркало за {time.perf_counter() - t0:.1f} с", file=sys.stderr)
+            for name in names:
+                res = run_bench(name, ctx)
+                results.append(res)
+                print(f"{name:26} {rows:>9} {res['median_s']:.4f} с", file=sys.stderr)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    report = {"meta": _meta(a), "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1), "results": results}
+    out = json.dumps(report, ensure_ascii=False, indent=2)
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as fh: fh.write(out)
+    else: print(out)
+    if a.baseline:
+        lines, regressed = compare(results, a.baseline, a.tolerance)
+        print("\n".join(lines), file=sys.stderr)
+        if regressed: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Замінник GSheetsConnection у пам'яті для перевірок без Google.
+
+Реалізує рівно те, чим користується SheetsIO: conn.client._select_worksheet()
+з row_values / update("A1") / append_rows / get_values / batch_get /
+batch_update (діапазони «A<n>»),
+spreadsheet.batch_update (лише deleteDimension; sheetId — назва аркуша) і
+spreadsheet.get_lastUpdateTime() (лічильник записів через фейк; після ручної
+правки conn.data викличте conn.touch()), а також conn.read і conn.update. Кожен виклик може мати штучну затримку, як у
+справжнього Sheets API: latency на запит плюс row_latency на кожен переданий
+рядок (великий аркуш читається довше). error_rate — частка викликів, що падають
+до виконання; lost_ack_rate — частка записів, які виконано, але відповідь
+загублено (клієнт бачить помилку — як таймаут після коміту на боці Google).
+
+    conn = FakeConnection({"Sheet1": [header, *rows]}, latency=0.3, row_latency=2e-5)
+    conn = FakeConnection(data, latency=0.2, error_rate=0.05, lost_ack_rate=0.02, seed=1)
+    sheets = SheetsIO(conn)
+"""
+import random
+import re
+import threading
+import time
+
+import pandas as pd
+
+_RANGE = re.compile(r"^A(\d+):ZZ(\d*)$")
+_CELL = re.compile(r"^A(\d+)$")
+
+
+class FakeAPIError(ConnectionError):
+    """Штучний збій виклику (error_rate / lost_ack_rate)."""
+
+
+class _Spreadsheet:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def get_lastUpdateTime(self):
+        self.owner._call("drive_metadata")
+        return f"rev-{self.owner.revision}"
+
+    def batch_update(self, body):
+        self.owner._call("batch_update")
+        with self.owner.lock:
+            for req in body["requests"]:
+                rng = req["deleteDimension"]["range"]
+                del self.owner.data[rng["sheetId"]][rng["startIndex"]:rng["endIndex"]]
+            self.owner.touch()
+        self.owner._ack("batch_update")
+
+
+class FakeWorksheet:
+    def __init__(self, owner, rows, name=None):
+        self.owner, self.rows, self.id = owner, rows, name
+        self.spreadsheet = _Spreadsheet(owner)
+
+    def _rows_from(self, rng):
+        m = _RANGE.match(rng)
+        if not m: raise ValueError(f"FakeWorksheet не розуміє діапазон {rng}")
+        start, end = int(m.group(1)), int(m.group(2) or 0) or None
+        return [list(r) for r in self.rows[start - 1:end]]
+
+    def row_values(self, n):
+        self.owner._call("row_values", 1)
+        return list(self.rows[n - 1]) if len(self.rows) >= n else []
+
+    def update(self, range_name="A1", values=None):
+        self.owner._call("update")
+        with self.owner.lock:
+            if range_name != "A1": raise ValueError(f"FakeWorksheet підтримує лише update('A1'), не {range_name}")
+            if self.rows: self.rows[0] = list(values[0])
+            else: self.rows.append(list(values[0]))
+            self.owner.touch()
+        self.owner._ack("update")
+
+    def append_rows(self, values, **kwargs):
+        self.owner._call("append_rows", len(values))
+        with self.owner.lock: self.rows.extend(list(r) for r in values); self.owner.touch()
+        self.owner._ack("append_rows")
+
+    def batch_update(self, data, **kwargs):
+        self.owner._call("batch_update_values", len(data))
+        with self.owner.lock:
+            for item in data:
+                m = _CELL.match(item["range"])
+                if not m: raise ValueError(f"FakeWorksheet не розуміє діапазон {item['range']}")
+                n = int(m.group(1))
+                while len(self.rows) < n: self.rows.append([])
+                self.rows[n - 1] = list(item["values"][0])
+            self.owner.touch()
+        self.owner._ack("batch_update_values")
+
+    def get_values(self, rng):
+        with self.owner.lock: out = self._rows_from(rng)
+        self.owner._call("get_values", len(out))
+        return out
+
+    def batch_get(self, ranges):
+        with self.owner.lock: out = [self._rows_from(r) for r in ranges]
+        self.owner._call("batch_get", sum(map(len, out)))
+        return out
+
+
+class _Client:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def _select_worksheet(self, worksheet=None):
+        with self.owner.lock:
+            return FakeWorksheet(self.owner, self.owner.data.setdefault(worksheet, []), worksheet)
+
+
+class FakeConnection:
+    def __init__(self, data=None, latency=0.0, row_latency=0.0, error_rate=0.0, lost_ack_rate=0.0, seed=None):
+        self.data = {ws: [list(r) for r in rows] for ws, rows in (data or {}).items()}
+        self.latency, self.row_latency = latency, row_latency
+        self.error_rate, self.lost_ack_rate = error_rate, lost_ack_rate
+        self._rnd = random.Random(seed)
+        self.calls = {}
+        self.revision = 0
+        self.lock = threading.RLock()
+        self.client = _Client(self)
+
+    def touch(self):
+        with self.lock: self.revision += 1
+
+    def _call(self, name, rows=0):
+        self._count(name)
+        delay = self.latency + self.row_latency * rows
+        if delay: time.sleep(delay)
+        if self.error_rate and self._chance(self.error_rate):
+            self._count("errors"); raise FakeAPIError(f"fake: {name} failed")
+
+    def _ack(self, name):
+        """Після виконаного запису: з імовірністю lost_ack_rate відповідь «губиться»."""
+        if self.lost_ack_rate and self._chance(self.lost_ack_rate):
+            self._count("lost_acks"); raise FakeAPIError(f"fake: {name} applied, response lost")
+
+    def _chance(self, p):
+        with self.lock: return self._rnd.random() < p
+
+    def _count(self, name):
+        with self.lock: self.calls[name] = self.calls.get(name, 0) + 1
+
+    def read(self, worksheet=None, ttl=None, **kwargs):
+        with self.lock: rows = [list(r) for r in self.data.get(worksheet, [])]
+        self._call("read", len(rows))
+        if not rows: return pd.DataFrame()
+        width = len(rows[0])
+        return pd.DataFrame([(r + [""] * width)[:width] for r in rows[1:]], columns=rows[0])
+
+    def update(self, worksheet=None, data=None, **kwargs):
+        self._call("update", len(data))
+        with self.lock:
+            self.data.setdefault(worksheet, [])[:] = [list(data.columns)] + data.astype(str).values.tolist()
+            self.touch()
+        self._ack("update")
@@ -0,0 +1,77 @@
+"""Локальний замінник Telegram Bot API для перевірки відправки без мережі.
+
+Приймає POST /bot<token>/<method> (sendMessage, sendPhoto, sendMediaGroup, ...),
+запам'ятовує виклики й відповідає як Bot API. Затримку, частку помилок 5xx і
+частку відповідей 429 з retry_after можна налаштувати.
+
+    python -m devtools.fake_telegram --port 8081 --latency 0.3 --flood-rate 0.1
+    TELEGRAM_API_BASE=http://127.0.0.1:8081 streamlit run main.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeTelegram:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, flood_rate=0.0, retry_after=1, seed=None):
+        self.latency, self.error_rate, self.flood_rate, self.retry_after = latency, error_rate, flood_rate, retry_after
+        self.calls = []
+        self._lock = threading.Lock()
+        self._rnd = random.Random(seed)
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                method = self.path.rsplit("/", 1)[-1]
+                if fake.latency: time.sleep(fake.latency)
+                with fake._lock:
+                    roll = fake._rnd.random()
+                    if roll < fake.flood_rate:
+                        code, resp = 429, {"ok": False, "error_code": 429, "description": "Too Many Requests: retry later",
+                                           "parameters": {"retry_after": fake.retry_after}}
+                    elif roll < fake.flood_rate + fake.error_rate:
+                        code, resp = 502, {"ok": False, "error_code": 502, "description": "Bad Gateway"}
+                    else:
+                        code, resp = 200, {"ok": True, "result": {"message_id": len(fake.calls) + 1}}
+                    fake.calls.append({"method": method, "bytes": len(body), "status": code,
+                                       "content_type": self.headers.get("Content-Type", ""), "body": body, "at": time.time()})
+                raw = json.dumps(resp).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, *args): pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def delivered(self, method=None):
+        return [c for c in self.calls if c["status"] == 200 and (method is None or c["method"] == method)]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--port", type=int, default=8081)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--flood-rate", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=int, default=1)
+    a = ap.parse_args()
+    fake = FakeTelegram(port=a.port, latency=a.latency, error_rate=a.error_rate, flood_rate=a.flood_rate, retry_after=a.retry_after)
+    print(f"Fake Bot API на {fake.url}")
+    try: fake.server.serve_forever()
+    except KeyboardInterrupt: pass
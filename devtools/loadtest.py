@@ -0,0 +1,264 @@
+"""Навантажувальний тест «зміна змін»: N пілотів відправляють зміну одночасно.
+
+Кожен пілот — окремий AppTest з main.py у власному потоці; cache_resource
+спільний, тож усі сесії ділять записувач, дзеркало й outbox, як на одному
+сервері. Самі прогони скрипта йдуть по одному (AppTest створює й знищує
+глобальний Runtime на кожен прогін): p50/p95 кроків у «steps_serialized» —
+час одного прогону без конкуренції з іншими сесіями за процесор і GIL, а не
+затримка під одночасним навантаженням; окремо «wait» — черга до прогону. Паралельно
+у своїх потоках працюють лише записувач, outbox і фейки. Google Sheets
+замінює FakeConnection (затримка, частка збоїв, частка записів із загубленою
+відповіддю), Telegram — devtools.fake_telegram.
+Сценарій пілота: вхід (частина пілотів має чернетки в Drafts), додавання
+вильотів зі скріншотами, «Зберегти в Хмару», очікування решти пілотів і
+одночасне «ВІДПРАВИТИ ВСІ ДАНІ». Звіт: p50/p95 кроків (по одному) і черги
+до прогону, RSS процесу, втрачені й задвоєні рядки Sheet1, залишки Drafts і
+донесення в Telegram. Код виходу 1, якщо є втрачені чи задвоєні рядки.
+
+    python -m devtools.loadtest --pilots 20 --flights 4 --photos 1 --latency 0.3 --out loadtest.json
+    python -m devtools.loadtest --pilots 10 --errors 0.05 --lost-acks 0.05 --tg-errors 0.1
+"""
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from datetime import datetime
+from urllib.parse import unquote_plus
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN, CHAT = "loadtest", "-100"
+_RUN = threading.Lock()  # AppTest.run не потокобезпечний: Runtime — синглтон процесу
+
+
+def _pct(xs):
+    xs = sorted(xs)
+    if not xs: return {"n": 0}
+    return {"n": len(xs), "p50_ms": round(1000 * statistics.median(xs), 1),
+            "p95_ms": round(1000 * xs[min(len(xs) - 1, int(0.95 * len(xs)))], 1), "max_ms": round(1000 * xs[-1], 1)}
+
+
+def _rss_mb():
+    with open("/proc/self/statm") as fh: pages = int(fh.read().split()[1])
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / 1048576, 1)
+
+
+def _screenshot(seed):
+    """JPEG, схожий на скріншот (шум + градієнт), ~100 КБ."""
+    from PIL import Image
+    rnd = random.Random(seed)
+    img = Image.effect_noise((640, 360), 40).convert("RGB")
+    img = Image.blend(img, Image.linear_gradient("L").resize((640, 360)).convert("RGB"), rnd.uniform(0.3, 0.7))
+    buf = io.BytesIO(); img.save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+def _slot(k):
+    """k-й виліт пілота: 20 хв кожні 30 хв від 08:00 (без перетинів)."""
+    m = 8 * 60 + 30 * k
+    return f"{m // 60:02d}{m % 60:02d}", f"{(m + 20) // 60:02d}{(m + 20) % 60:02d}"
+
+
+class Pilot:
+    def __init__(self, n, unit, a, photo):
+        self.n, self.unit, self.a, self.photo = n, unit, a, photo
+        self.name = f"ст.с-т Навантаження {n:03d}"
+        self.times, self.errors, self.drafts_loaded, self.submitted = {}, [], 0, 0
+
+    def _timed(self, step, at):
+        t0 = time.perf_counter()
+        with _RUN:
+            t1 = time.perf_counter(); at.run()
+        self.times.setdefault(step, []).append(time.perf_counter() - t1)
+        self.times.setdefault("wait", []).append(t1 - t0)
+        if at.exception: self.errors.extend(f"{step}: {e.value}" for e in at.exception)
+
+    def run(self, barrier):
+        from streamlit.testing.v1 import AppTest
+        try:
+            at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=self.a.timeout)
+            self._timed("open", at); self._timed("open", at)
+            at.selectbox[0].set_value(self.unit); at.text_input[0].input(self.name); at.button[0].click()
+            self._timed("login", at)
+            self.drafts_loaded = len(at.session_state["temp_flights"])
+            for k in range(self.a.flights):
+                off, land = _slot(k)
+                [t for t in at.text_input if t.label == "Зліт"][0].input(off)
+                [t for t in at.text_input if t.label == "Посадка"][0].input(land)
+                if self.a.photos: at.file_uploader[0].set_value([(f"shot_{k}_{i}.jpg", self.photo, "image/jpeg") for i in range(self.a.photos)])
+                [b for b in at.button if "ДОДАТИ У СПИСОК" in b.label][0].click()
+                self._timed("add_flight", at)
+            [b for b in at.button if "Зберегти в Хмару" in b.label][0].click()
+            self._timed("save_drafts", at)
+            self.submitted = len(at.session_state["temp_flights"])
+        except Exception as e:
+            self.errors.append(f"setup: {e!r} @ {traceback.extract_tb(e.__traceback__)[-1].line}")
+            barrier.abort(); return
+        try: barrier.wait()
+        except threading.BrokenBarrierError: return
+        try:
+            [b for b in at.button if "ВІДПРАВИТИ ВСІ ДАНІ" in b.label][0].click()
+            self._timed("submit", at)
+        except Exception as e: self.errors.append(f"submit: {e!r}")
+
+
+def _drafts(pilots, n_drafts, header):
+    """Рядки Drafts: по n_drafts вильотів до 08:00 для кожного пілота з чернетками."""
+    today = datetime.now().strftime("%d.%m.%Y")
+    rows = []
+    for p in pilots:
+        for k in range(n_drafts):
+            rec = {"Дата": today, "Час завдання": "06:00 - 20:00", "Підрозділ": p.unit, "Оператор": p.name, "Дрон": "Дрон не вказано",
+                   "Маршрут": "", "Зліт": f"06:{k * 25:02d}", "Посадка": f"06:{k * 25 + 20:02d}", "Тривалість (хв)": "20",
+                   "Дистанція (м)": "0", "Номер АКБ": "", "Цикли АКБ": "0", "Результат": "", "Примітки": "чернетка"}
+            rows.append([rec.get(c, "") for c in header])
+    return rows
+
+
+def _wait(cond, timeout):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if cond(): return True
+        time.sleep(0.25)
+    return cond()
+
+
+def _tg_summary(tg):
+    by = {}
+    for c in tg.calls:
+        codes = by.setdefault(c["method"], {}); codes[str(c["status"])] = codes.get(str(c["status"]), 0) + 1
+    return {"requests": len(tg.calls), "bytes": sum(c["bytes"] for c in tg.calls), "by_method": by}
+
+
+def run(a):
+    workdir = tempfile.mkdtemp(prefix="uav_loadtest_")
+    sys.path.insert(0, ROOT)
+    from devtools.fake_telegram import FakeTelegram
+    tg = FakeTelegram(latency=a.tg_latency, error_rate=a.tg_errors, flood_rate=a.tg_flood, seed=a.seed).start()
+    # До першого імпорту модулів застосунку: шляхи й адреса Bot API читаються під час імпорту
+    os.environ.update({"UAV_MIRROR_PATH": os.path.join(workdir, "mirror.sqlite"), "UAV_UPLOAD_DIR": os.path.join(workdir, "uploads"),
+                       "UAV_OUTBOX_DIR": os.path.join(workdir, "outbox"), "TELEGRAM_API_BASE": tg.url})
+    import pandas as pd
+    import streamlit as st
+    from streamlit.runtime.secrets import Secrets
+    from devtools.fake_sheets import FakeConnection
+    from devtools.synthetic import HEADER, synthetic_sheets
+    from flight_keys import key_text
+    from flight_logic import UNITS
+
+    rnd = random.Random(a.seed)
+    photo = _screenshot(a.seed)
+    pilots = [Pilot(n, UNITS[n % len(UNITS)], a, photo) for n in range(a.pilots)]
+    with_drafts = rnd.sample(pilots, int(round(a.drafts * len(pilots))))
+    data = synthetic_sheets(a.rows, a.seed)
+    data["Drafts"] = [HEADER[:-1]] + _drafts(with_drafts, 2, HEADER[:-1])
+    conn = FakeConnection(data, a.latency, a.row_latency, error_rate=a.errors, lost_ack_rate=a.lost_acks, seed=a.seed)
+    st.connection = lambda *args, **kwargs: conn  # main.py бере з'єднання через st.connection("gsheets", ...)
+    # Секрети — один раз для процесу: AppTest.secrets підміняє глобальний st.secrets на час прогону,
+    # і паралельні прогони відновлювали б його один одному посеред виконання
+    st.secrets = Secrets()
+    st.secrets._secrets = {"TELEGRAM_BOT_TOKEN": TOKEN, "TELEGRAM_CHAT_ID": CHAT, "connections": {"gsheets": {"spreadsheet": "loadtest"}}}
+    base_rows = len(data["Sheet1"]) - 1
+
+    try:
+        # «Сервер уже працює»: один прогін прогріває cache_resource і дзеркало до зміни змін
+        from streamlit.testing.v1 import AppTest
+        warm = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=a.timeout)
+        warm.run(); warm.run()
+
+        barrier = threading.Barrier(len(pilots))
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=p.run, args=(barrier,), name=f"pilot-{p.n}") for p in pilots]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        wall = time.perf_counter() - t0
+
+        names = {p.name for p in pilots}
+        expected = sum(p.submitted for p in pilots)
+
+        def sheet1():
+            with conn.lock: rows = [list(r) for r in conn.data["Sheet1"]]
+            df = pd.DataFrame([(r + [""] * len(rows[0]))[:len(rows[0])] for r in rows[1:]], columns=rows[0])
+            return df[df["Оператор"].isin(names)]
+
+        def reports():
+            got = {}
+            for c in tg.delivered():
+                body = c["body"].decode("utf-8", "replace")
+                if "urlencoded" in c["content_type"]: body = unquote_plus(body)
+                for p in pilots:
+                    if f"Пілот:** {p.name}" in body: got[p.name] = got.get(p.name, 0) + 1
+            return got
+
+        # Дочекатися записувача (повтори після збоїв) і outbox
+        _wait(lambda: len(sheet1()) >= expected, a.drain)
+        _wait(lambda: len(reports()) >= sum(1 for p in pilots if p.submitted), a.drain)
+        time.sleep(1.0)  # запізнілі повтори, що можуть задвоїти рядки
+        own = sheet1()
+        counts = key_text(own).value_counts()
+        with conn.lock:
+            d_head = conn.data["Drafts"][0]
+            i_op, i_off = d_head.index("Оператор"), d_head.index("Зліт")
+            # Порожні місця (лише «Оператор») лишаються за пілотом після очищення — це не чернетки
+            drafts_left = sum(1 for r in conn.data["Drafts"][1:] if len(r) > i_off and r[i_op] in names and r[i_off])
+        got = reports()
+        steps = {}
+        for p in pilots:
+            for k, v in p.times.items(): steps.setdefault(k, []).extend(v)
+        res = {
+            "params": vars(a), "wall_s": round(wall, 2),
+            "steps_serialized": {k: _pct(v) for k, v in steps.items() if k != "wait"},
+            "steps_note": "прогони AppTest по одному (спільний Runtime): час кроку без конкуренції сесій",
+            "wait": _pct(steps.get("wait", [])),
+            "rss_mb": {"end": _rss_mb(), "peak": max(_rss_mb(), round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1))},
+            "sheet1": {"base_rows": base_rows, "expected": expected, "written": len(own), "unique": int(len(counts)),
+                       "lost": max(0, expected - int(len(counts))), "duplicated": int((counts - 1).sum())},
+            "drafts": {"loaded": sum(p.drafts_loaded for p in pilots), "left_after_submit": drafts_left},
+            "telegram": dict(_tg_summary(tg), pilots_without_report=sum(1 for p in pilots if p.submitted and not got.get(p.name)),
+                             duplicate_reports=sum(v - 1 for v in got.values() if v > 1)),
+            "sheets_calls": dict(conn.calls),
+            "errors": [e for p in pilots for e in p.errors][:20],
+        }
+    finally:
+        tg.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--pilots", type=int, default=10)
+    ap.add_argument("--flights", type=int, default=4, help="вильотів на пілота")
+    ap.add_argument("--photos", type=int, default=1, help="скріншотів на виліт")
+    ap.add_argument("--drafts", type=float, default=0.3, help="частка пілотів із чернетками в Drafts")
+    ap.add_argument("--rows", type=int, default=3000, help="рядків у синтетичному Sheet1")
+    ap.add_argument("--latency", type=float, default=0.2, help="с затримки на виклик Sheets")
+    ap.add_argument("--row-latency", type=float, default=2e-5, help="с затримки на переданий рядок Sheets")
+    ap.add_argument("--errors", type=float, default=0.0, help="частка викликів Sheets, що падають")
+    ap.add_argument("--lost-acks", type=float, default=0.0, help="частка записів Sheets із загубленою відповіддю")
+    ap.add_argument("--tg-latency", type=float, default=0.1)
+    ap.add_argument("--tg-errors", type=float, default=0.0, help="частка відповідей Telegram 502")
+    ap.add_argument("--tg-flood", type=float, default=0.0, help="частка відповідей Telegram 429")
+    ap.add_argument("--drain", type=float, default=60.0, help="с очікування записувача й outbox після відправки")
+    ap.add_argument("--timeout", type=float, default=120.0, help="с на один прогін AppTest")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out")
+    a = ap.parse_args()
+    res = run(a)
+    out = json.dumps(res, ensure_ascii=False, indent=2)
+    print(out)
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as fh: fh.write(out)
+    sys.exit(1 if res["sheet1"]["lost"] or res["sheet1"]["duplicated"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Детермінований генератор синтетичного архіву польотів.
+
+Рядки такі, як їх пише main.py: 20 підрозділів з UNITS, у кожному свої
+оператори, БпЛА з S/N і АКБ; денні (08:00 - 20:00) та нічні (20:00 - 08:00)
+зміни, де вильоти після півночі мають дату початку зміни. Генерація векторна
+(numpy), а значення комірок беруться з невеликих пулів рядків, тож навіть
+1 млн рядків займає лише посилання на спільні об'єкти.
+
+    data = synthetic_sheets(100_000, seed=7)      # {"Sheet1": [...], "DronesDB": [...], "Drafts": [...]}
+    conn = FakeConnection(data, latency=0.2)
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from flight_logic import RESULTS, UNITS
+
+HEADER = ["Дата", "Час завдання", "Підрозділ", "Оператор", "Дрон", "Маршрут", "Зліт", "Посадка",
+          "Тривалість (хв)", "Дистанція (м)", "Номер АКБ", "Цикли АКБ", "Результат", "Примітки", "Медіа (статус)"]
+DRONES_HEADER = ["Підрозділ", "Модель БпЛА", "s/n"]
+RANKS = ["сол.", "ст.сол.", "мол.с-т", "с-т", "ст.с-т", "гол.с-т", "ст-на", "мол.л-т", "л-т"]
+SURNAMES = ["Іваненко", "Петренко", "Коваль", "Бондар", "Шевчук", "Мельник", "Ткаченко", "Кравець", "Олійник",
+            "Савчук", "Руденко", "Марченко", "Лисенко", "Гончар", "Павленко", "Мороз", "Поліщук", "Кузьменко"]
+MODELS = ["Mavic 3T", "Matrice 30T", "Autel EVO II Dual", "Matrice 300 RTK", "Mavic 3 Enterprise"]
+ROUTES = ["вздовж ДКУ", "р-н н.п.", "ділянка відділу", "прикордонна смуга", "р-н КПП"]
+RESULT_WEIGHTS = [0.86, 0.04, 0.10]
+END_DATE = date(2025, 12, 31)
+
+
+def _fleet(rnd):
+    """Оператори, БпЛА та АКБ кожного підрозділу."""
+    fleet = []
+    for ui, unit in enumerate(UNITS):
+        ops = [f"{rnd.choice(RANKS)} {rnd.choice(SURNAMES)}" for _ in range(rnd.integers(3, 9))]
+        drones = [f"{rnd.choice(MODELS)} (S/N: {ui:02d}{chr(65 + k)}{rnd.integers(1000, 9999)})" for k in range(rnd.integers(2, 5))]
+        akb = [f"А{ui:02d}-{k:02d}" for k in range(rnd.integers(4, 13))]
+        fleet.append((unit, list(dict.fromkeys(ops)), drones, akb))
+    return fleet
+
+
+def synthetic_archive(rows, seed=1, days=None):
+    """Рядки Sheet1 (заголовок + rows) у порядку дописування, від старих до нових."""
+    rnd = np.random.default_rng(seed)
+    fleet = _fleet(rnd)
+    days = days or max(30, min(3 * 365, rows // 40))
+    date_pool = np.array([(END_DATE - timedelta(days=days - 1 - d)).strftime("%d.%m.%Y") for d in range(days)], dtype=object)
+    time_pool = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)], dtype=object)
+    num_pool = np.array([str(i) for i in range(5001)], dtype=object)
+    shifts = np.array(["08:00 - 20:00", "20:00 - 08:00"], dtype=object)
+
+    day = np.sort(rnd.integers(0, days, rows))
+    unit_i = rnd.integers(0, len(UNITS), rows)
+    night = rnd.random(rows) < 0.55
+    # Зліт усередині зміни: денна 08:00–19:20, нічна 20:00–07:20 (через північ)
+    off = (np.where(night, 20 * 60, 8 * 60) + rnd.integers(0, 11 * 60 + 20, rows)) % 1440
+    dur = rnd.integers(8, 61, rows)
+    land = (off + dur) % 1440
+
+    ops, drones, akb = np.empty(rows, dtype=object), np.empty(rows, dtype=object), np.empty(rows, dtype=object)
+    for ui, (unit, u_ops, u_drones, u_akb) in enumerate(fleet):
+        m = unit_i == ui; n = int(m.sum())
+        ops[m] = np.array(u_ops, dtype=object)[rnd.integers(0, len(u_ops), n)]
+        drones[m] = np.array(u_drones, dtype=object)[rnd.integers(0, len(u_drones), n)]
+        akb[m] = np.array(u_akb, dtype=object)[rnd.integers(0, len(u_akb), n)]
+
+    cols = [
+        date_pool[day], shifts[night.astype(int)], np.array(UNITS, dtype=object)[unit_i], ops, drones,
+        np.array(ROUTES, dtype=object)[rnd.integers(0, len(ROUTES), rows)],
+        time_pool[off], time_pool[land], num_pool[dur], num_pool[rnd.integers(0, 50, rows) * 100],
+        akb, num_pool[rnd.integers(1, 400, rows)],
+        np.array(RESULTS, dtype=object)[rnd.choice(len(RESULTS), rows, p=RESULT_WEIGHTS)],
+        np.array(["", "", "", "погодні умови"], dtype=object)[rnd.integers(0, 4, rows)],
+        np.array(["Текст", "З фото"], dtype=object)[(rnd.random(rows) < 0.3).astype(int)],
+    ]
+    return [HEADER] + np.column_stack(cols).tolist()
+
+
+def synthetic_drones(seed=1):
+    """Рядки DronesDB для тих самих підрозділів і S/N, що й synthetic_archive(seed)."""
+    out = [DRONES_HEADER]
+    for unit, _, drones, _ in _fleet(np.random.default_rng(seed)):
+        for d in drones:
+            model, sn = d[:-1].split(" (S/N: ")
+            out.append([unit, model, sn])
+    return out
+
+
+def synthetic_sheets(rows, seed=1):
+    """Усі аркуші для FakeConnection."""
+    return {"Sheet1": synthetic_archive(rows, seed), "DronesDB": synthetic_drones(seed), "Drafts": [HEADER[:-1]]}
+
+
+def operators(data, unit=None):
+    """Оператори в згенерованому Sheet1 (для вибору «свого» пілота в бенчмарках)."""
+    return sorted({r[3] for r in data["Sheet1"][1:] if unit is None or r[2] == unit})
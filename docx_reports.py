@@ -0,0 +1,159 @@
+"""Донесення про політ у DOCX за шаблоном Донесення_УПЗ_template.docx.
+
+Шаблон розбирається один раз на процес: усі частини архіву DOCX лишаються в
+пам'яті, а word/document.xml — текстом із плейсхолдерами {{DATE}}, {{UNIT}},
+{{FLIGHTS_LIST}}, {{ROUTE}}, {{UAV_SYSTEMS}}, {{CREW}}, {{RESULTS}}. Кожне
+донесення — це підстановка рядків у document.xml і запис zip із готових
+частин (зображення 1 МБ іде без перестискання), без повторного відкриття та
+розбору шаблону. Пакет «усі підрозділи × діапазон дат» рендериться в
+паралельних процесах і складається в один zip. Донесення важить близько
+1 МБ, тож пакет обмежено MAX_BATCH_DAYS днями й MAX_BATCH_REPORTS
+донесеннями, а в REPORTS_DIR лишаються KEEP_BATCHES останніх пакетів.
+"""
+import io
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+from perf import cache_event, record, span
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Донесення_УПЗ_template.docx")
+DOCUMENT_PART = "word/document.xml"
+STORED_EXT = (".png", ".jpg", ".jpeg", ".gif", ".emf", ".wmf")
+REPORTS_DIR = os.environ.get("UAV_REPORTS_DIR", os.path.join(".cache", "reports"))
+MAX_BATCH_DAYS = 31
+MAX_BATCH_REPORTS = 300  # ≈ 300 МБ zip
+KEEP_BATCHES = 3
+PARALLEL_MIN = 8  # менші пакети дешевше зробити в поточному процесі, ніж запускати пул
+_PLACEHOLDER = re.compile(r"\{\{([A-Z_]+)\}\}")
+_TEMPLATE = {}
+
+
+class DocxTemplate:
+    def __init__(self, path):
+        with zipfile.ZipFile(path) as z:
+            self.parts = [(i.filename, z.read(i.filename)) for i in z.infolist()]
+        self.document = dict(self.parts)[DOCUMENT_PART].decode("utf-8")
+        self.placeholders = sorted(set(_PLACEHOLDER.findall(self.document)))
+
+    def render(self, values):
+        """DOCX (bytes) з підставленими значеннями; переноси рядків стають <w:br/>."""
+        def sub(m):
+            val = escape(str(values.get(m.group(1), "")))
+            return val.replace("\n", '</w:t><w:br/><w:t xml:space="preserve">')
+        doc = _PLACEHOLDER.sub(sub, self.document).encode("utf-8")
+        out = io.BytesIO()
+        with zipfile.ZipFile(out, "w") as z:
+            for name, data in self.parts:
+                if name == DOCUMENT_PART: data = doc
+                stored = name.lower().endswith(STORED_EXT)
+                z.writestr(name, data, compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+        return out.getvalue()
+
+
+def get_template(path=TEMPLATE_PATH):
+    """Шаблон із кешу процесу (перечитується лише при зміні файлу)."""
+    key = (path, os.path.getmtime(path))
+    cache_event("docx_template", key in _TEMPLATE)
+    if key not in _TEMPLATE:
+        _TEMPLATE.clear()
+        _TEMPLATE[key] = DocxTemplate(path)
+    return _TEMPLATE[key]
+
+
+def _minutes(hhmm):
+    try: h, m = str(hhmm).split(":")[:2]; return int(h) * 60 + int(m)
+    except (ValueError, TypeError): return 0
+
+
+def _join_unique(series):
+    return ", ".join(dict.fromkeys(str(v) for v in series.dropna() if str(v).strip()))
+
+
+def build_context(unit, day, flights):
+    """Значення плейсхолдерів для донесення підрозділу за день. flights — рядки архіву (DataFrame)."""
+    f = flights.copy()
+    shift_start = f["Час завдання"].astype(str).str.slice(0, 5).map(_minutes) if "Час завдання" in f.columns else 0
+    off = f["Зліт"].map(_minutes)
+    # Вильоти після півночі нічної зміни йдуть після вечірніх
+    f["_order"] = off + (off < shift_start) * 1440
+    f = f.sort_values("_order")
+    lines = [f"{i}. {r['Зліт']} - {r['Посадка']} ({int(r['Тривалість (хв)']) if pd.notna(r['Тривалість (хв)']) else 0} хв)"
+             + (f", {int(r['Дистанція (м)'])} м" if pd.notna(r.get("Дистанція (м)")) and r.get("Дистанція (м)") else "")
+             for i, (_, r) in enumerate(f.iterrows(), 1)]
+    results = f["Результат"].astype(str).value_counts() if "Результат" in f.columns else pd.Series(dtype=int)
+    day_str = day.strftime("%d.%m.%Y") if hasattr(day, "strftime") else str(day)
+    return {
+        "DATE": day_str, "UNIT": unit, "FLIGHTS_LIST": "\n".join(lines),
+        "ROUTE": _join_unique(f["Маршрут"]) if "Маршрут" in f.columns else "",
+        "UAV_SYSTEMS": _join_unique(f["Дрон"]) if "Дрон" in f.columns else "",
+        "CREW": _join_unique(f["Оператор"]) if "Оператор" in f.columns else "",
+        "RESULTS": "; ".join(f"{k} — {v}" for k, v in results.items()),
+    }
+
+
+def render_context(ctx):
+    with span("docx.render") as s:
+        data = get_template().render(ctx); s.bytes = len(data)
+    return data
+
+
+def _render_named(item):
+    name, ctx = item
+    return name, render_context(ctx)
+
+
+def report_contexts(archive, units=None, date_from=None, date_to=None):
+    """(ім'я файлу, контекст) для кожної пари підрозділ × день, що має вильоти. archive — типізований архів."""
+    if archive is None or "Дата" not in archive.columns: return []  # порожня вибірка дзеркала — без колонок
+    df = archive.dropna(subset=["Дата"])
+    if units is not None: df = df[df["Підрозділ"].isin(units)]
+    if date_from is not None: df = df[df["Дата"] >= pd.Timestamp(date_from)]
+    if date_to is not None: df = df[df["Дата"] <= pd.Timestamp(date_to)]
+    out = []
+    for (day, unit), grp in df.groupby(["Дата", "Підрозділ"], observed=True, sort=True):
+        safe_unit = re.sub(r"[^\w\-]+", "_", str(unit)).strip("_")
+        out.append((f"{day:%Y-%m-%d}_{safe_unit}.docx", build_context(str(unit), day, grp)))
+    return out
+
+
+def generate_batch(archive, units=None, date_from=None, date_to=None, workers=None, path=None):
+    """Пакет донесень у zip (у файл path або в bytes).
+
+    Повертає (path або bytes, статистика: кількість, секунди, мс на донесення, воркери).
+    Період довший за MAX_BATCH_DAYS чи понад MAX_BATCH_REPORTS донесень — ValueError.
+    """
+    t0 = time.perf_counter()
+    if date_from is None or date_to is None or (pd.Timestamp(date_to) - pd.Timestamp(date_from)).days >= MAX_BATCH_DAYS:
+        raise ValueError(f"Пакет — не довше {MAX_BATCH_DAYS} днів: звузьте період")
+    items = report_contexts(archive, units, date_from, date_to)
+    if len(items) > MAX_BATCH_REPORTS:
+        raise ValueError(f"{len(items)} донесень — більше за {MAX_BATCH_REPORTS}: звузьте період чи оберіть підрозділи")
+    workers = workers or min(os.cpu_count() or 1, 8)
+    out = path or io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as z:
+        if len(items) < PARALLEL_MIN or workers == 1:
+            workers = 1
+            for name, ctx in items: z.writestr(name, render_context(ctx))
+        else:
+            # spawn: воркери не успадковують потоки сервера Streamlit; шаблон кожен читає раз
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"), initializer=get_template) as pool:
+                for name, data in pool.map(_render_named, items, chunksize=max(1, len(items) // (workers * 4))):
+                    z.writestr(name, data)
+    if path: _prune(os.path.dirname(path))
+    elapsed = time.perf_counter() - t0
+    record("docx.batch", elapsed, rows=len(items))
+    return (path or out.getvalue()), {"reports": len(items), "seconds": elapsed, "ms_per_report": 1000 * elapsed / max(1, len(items)), "workers": workers}
+
+
+def _prune(folder):
+    files = sorted((os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".zip")), key=os.path.getmtime)
+    for f in files[:-KEEP_BATCHES]:
+        try: os.remove(f)
+        except OSError: pass
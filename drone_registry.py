@@ -0,0 +1,61 @@
+"""Реєстр БпЛА з аркуша DronesDB.
+
+Аркуш читається один раз на версію дзеркала і розкладається в індекси: список
+рядків для вибору по підрозділу та запис по серійному номеру. Рядки
+«Модель (S/N: ...)» будуються векторно, без iterrows. Реєстр незмінний і
+спільний для всіх сесій; новий будується лише тоді, коли змінилась версія
+DronesDB у дзеркалі.
+"""
+import pandas as pd
+
+UNIT_COLUMN, MODEL_COLUMN, SN_COLUMN = "Підрозділ", "Модель БпЛА", "s/n"
+_SN_IN_DISPLAY = r"\(S/N:\s*(.+?)\)\s*$"
+
+
+def _text(df, col):
+    return df[col].fillna("").astype(str).str.strip() if col in df.columns else pd.Series("", index=df.index)
+
+
+def display_name(model, sn):
+    return f"{model} (S/N: {sn})" if sn else model
+
+
+def serials(drones):
+    """S/N з рядків «Модель (S/N: ...)» (наприклад, колонки Дрон архіву); без номера — NaN."""
+    return pd.Series(drones, dtype="string").str.extract(_SN_IN_DISPLAY, expand=False)
+
+
+class DroneRegistry:
+    def __init__(self, df=None):
+        df = pd.DataFrame() if df is None else df
+        flat = pd.DataFrame({"unit": _text(df, UNIT_COLUMN), "model": _text(df, MODEL_COLUMN), "sn": _text(df, SN_COLUMN)})
+        flat = flat[flat["model"] != ""]
+        flat["display"] = flat["model"].where(flat["sn"] == "", flat["model"] + " (S/N: " + flat["sn"] + ")")
+        self.frame = flat.reset_index(drop=True)
+        self._by_unit = {u: list(dict.fromkeys(g)) for u, g in self.frame.groupby("unit", sort=False)["display"]}
+        with_sn = self.frame[self.frame["sn"] != ""].drop_duplicates("sn", keep="last")
+        self._by_sn = with_sn.set_index("sn")[["unit", "model", "display"]].to_dict("index")
+
+    def __len__(self):
+        return len(self.frame)
+
+    def units(self):
+        return list(self._by_unit)
+
+    def for_unit(self, unit):
+        """Рядки для вибору БпЛА підрозділу (порожній список, якщо в реєстрі нічого немає)."""
+        return list(self._by_unit.get(unit, []))
+
+    def records(self, unit=None):
+        """Записи {unit, model, sn, display} (для JSON API), за підрозділом або всі."""
+        df = self.frame if unit is None else self.frame[self.frame["unit"] == unit]
+        return df[["unit", "model", "sn", "display"]].to_dict("records")
+
+    def by_sn(self, sn):
+        """Запис {unit, model, display} за серійним номером або None."""
+        return self._by_sn.get(str(sn).strip()) if sn is not None else None
+
+    def lookup(self, display):
+        """Запис за рядком «Модель (S/N: ...)», як його зберігає колонка Дрон."""
+        sn = serials([display]).iloc[0]
+        return self.by_sn(sn) if pd.notna(sn) else None
@@ -0,0 +1,113 @@
+"""Перетини вильотів: той самий оператор, БпЛА (за S/N) чи АКБ у двох вильотах водночас.
+
+Виліт — абсолютний інтервал [зліт, посадка) у хвилинах. «Дата» — дата початку
+зміни, тож зліт раніше початку зміни («Час завдання») переноситься на наступну
+добу, а посадка раніше зльоту — перехід через північ. Для кожної перевірки рядки
+сортуються за (ключ, зліт) і проходяться один раз із поточним максимумом посадки
+в групі: O(n log n) замість попарного порівняння, тож годиться й для всього
+архіву. Дотик (посадка 09:20, наступний зліт 09:20) перетином не вважається.
+
+    conflicts = archive_conflicts(mirror, date_from=d0, date_to=d1)
+    conflicts = live_conflicts(temp_flights, archive_same_days)
+"""
+import numpy as np
+import pandas as pd
+
+from battery_index import akb_key
+from drone_registry import serials
+from flight_keys import frame_keys
+from perf import span
+
+COLUMNS = ["Дата", "Час завдання", "Підрозділ", "Оператор", "Дрон", "Номер АКБ", "Зліт", "Посадка"]
+RESULT = ["Перевірка", "Значення", "Дата", "Виліт 1", "Виліт 2", "Оператор 1", "Оператор 2", "Джерело 1", "Джерело 2"]
+_EPOCH = pd.Timestamp("1970-01-01")
+
+
+def _text(df, col):
+    return df[col].fillna("").astype(str).str.strip() if col in df.columns else pd.Series("", index=df.index)
+
+
+def _per_unique(s, fn):
+    codes, uniq = pd.factorize(s)
+    return pd.Series(np.asarray(fn(pd.Series(uniq, dtype=object)), dtype=float)).reindex(codes).to_numpy()
+
+
+def _clock(s):
+    """'HH:MM' (для «Час завдання» — початок 'HH:MM - HH:MM') → хвилини від 00:00; нерозпізнане — NaN."""
+    def parse(u):
+        t = pd.to_datetime(u, format="%H:%M", errors="coerce")
+        return t.dt.hour * 60 + t.dt.minute
+    return _per_unique(s.str.slice(0, 5), parse)
+
+
+def intervals(df):
+    """Масиви (зліт, посадка) у хвилинах від 1970-01-01 для кожного рядка; нерозпізнані — NaN."""
+    day = _per_unique(_text(df, "Дата"), lambda u: (pd.to_datetime(u, format="%d.%m.%Y", errors="coerce") - _EPOCH).dt.total_seconds() / 60)
+    off, land, start = _clock(_text(df, "Зліт")), _clock(_text(df, "Посадка")), _clock(_text(df, "Час завдання"))
+    off = off + np.where(off < np.nan_to_num(start, nan=0), 1440, 0)  # після півночі — наступна доба зміни
+    begin = day + off
+    return begin, begin + (land - off) % 1440
+
+
+def _sweep(key, begin, end):
+    """Пари позицій (i, j): j починається раніше, ніж закінчився якийсь попередній виліт i тієї ж групи."""
+    codes = pd.factorize(key)[0]
+    idx = np.flatnonzero((codes >= 0) & (key != "").to_numpy() & ~np.isnan(begin) & ~np.isnan(end))
+    if len(idx) < 2: return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = idx[np.lexsort((begin[idx], codes[idx]))]
+    c, s, e = codes[order], begin[order], end[order]
+    # Поточний максимум посадки з обнуленням на межі групи: зсув кожної групи вище за всі попередні
+    lo = min(s.min(), e.min())
+    shift = (np.cumsum(np.r_[True, c[1:] != c[:-1]]) - 1) * (max(s.max(), e.max()) - lo + 1)
+    run = np.maximum.accumulate(e - lo + shift)
+    who = np.maximum.accumulate(np.where(e - lo + shift == run, np.arange(len(e)), 0))  # позиція поточного максимуму
+    k = np.flatnonzero((c[1:] == c[:-1]) & (s[1:] - lo + shift[1:] < run[:-1])) + 1
+    return order[who[k - 1]], order[k]
+
+
+def find_conflicts(df, source=None):
+    """Перетини в df за трьома перевірками; source — підпис рядка (Series за індексом df), інакше «рядок N»."""
+    if df is None or df.empty: return pd.DataFrame(columns=RESULT)
+    with span("checks.conflicts", rows=len(df)):
+        df = df.reset_index(drop=True)
+        src = (pd.Series(source).reset_index(drop=True) if source is not None else "рядок " + pd.Series(np.arange(1, len(df) + 1)).astype(str)).to_numpy()
+        begin, end = intervals(df)
+        op, unit = _text(df, "Оператор"), _text(df, "Підрозділ")
+        akb = _text(df, "Номер АКБ").map(akb_key)
+        checks = {
+            "Оператор": op,
+            "БпЛА": serials(df["Дрон"]).fillna("").astype(object) if "Дрон" in df.columns else pd.Series("", index=df.index),
+            "АКБ": (unit + " / " + akb).where(akb != "", ""),  # номери АКБ — у межах підрозділу
+        }
+        flight = (_text(df, "Зліт") + "–" + _text(df, "Посадка")).to_numpy()
+        dates, ops = _text(df, "Дата").to_numpy(), op.to_numpy()
+        out = []
+        for name, key in checks.items():
+            i, j = _sweep(key, begin, end)
+            if not len(i): continue
+            out.append(pd.DataFrame({"Перевірка": name, "Значення": key.to_numpy()[j], "Дата": dates[j],
+                                     "Виліт 1": flight[i], "Виліт 2": flight[j], "Оператор 1": ops[i], "Оператор 2": ops[j],
+                                     "Джерело 1": src[i], "Джерело 2": src[j]}))
+        return pd.concat(out, ignore_index=True) if out else pd.DataFrame(columns=RESULT)
+
+
+def archive_conflicts(mirror, ws="Sheet1", **filters):
+    """Пакетна перевірка архіву (або періоду date_from/date_to); джерело — номер рядка аркуша."""
+    with mirror._connect() as db:
+        q = mirror.select_sql(db, ws, ["_row"] + [c for c in COLUMNS if c in mirror.columns(ws)], **filters)
+        df = pd.read_sql_query(q[0], db, params=q[1]) if q else pd.DataFrame()
+    if df.empty: return pd.DataFrame(columns=RESULT)
+    return find_conflicts(df, "рядок " + df["_row"].astype(str))
+
+
+def live_conflicts(flights, archive=None):
+    """Перетини, у яких бере участь хоча б один виліт списку зміни (з ним самим або з архівом тих самих днів)."""
+    if not flights: return pd.DataFrame(columns=RESULT)
+    cur = pd.DataFrame(flights).reindex(columns=COLUMNS)
+    if archive is not None and not archive.empty:
+        archive = archive.reindex(columns=COLUMNS)
+        archive = archive[~frame_keys(archive).isin(set(frame_keys(cur)))]  # той самий виліт, уже записаний, — не перетин
+    else: archive = cur.iloc[:0]
+    source = [f"список №{n}" for n in range(1, len(cur) + 1)] + ["архів"] * len(archive)
+    found = find_conflicts(pd.concat([cur, archive], ignore_index=True), source)
+    return found[(found["Джерело 1"] != "архів") | (found["Джерело 2"] != "архів")].reset_index(drop=True)
@@ -0,0 +1,162 @@
+"""Масове внесення вильотів зміни: вставлений текст або CSV-журнал.
+
+Текст — рядок на виліт у тому ж вигляді, що друкує ЦУС:
+«09:00 - 09:30 - 1200 м (30 хв)»; хвилини в дужках ігноруються, «АКБ 5» (чи
+«АКБ №5») після відстані — у «Номер АКБ», назва результату з RESULTS
+(«Затримання») — у «Результат», решта рядка — в «Примітки».
+CSV (зокрема експорт журналу польотного контролера) — колонки за синонімами
+з ALIASES, роздільник визначається сам. Час приймається як у формі («930»,
+«0930», «9», «9:30») або повною датою-часом журналу. Усе розбирається
+векторно по унікальних значеннях, тривалість — з переходом через північ;
+результат — одна таблиця перегляду (PREVIEW) з колонкою «Помилка», у список
+ідуть лише рядки без помилок.
+
+    preview = parse_text(pasted)                  # або parse_csv(uploaded.getvalue())
+    flights = to_flights(preview, date, start, end, unit, operator, drone, route)
+"""
+import io
+from datetime import time as d_time
+
+import numpy as np
+import pandas as pd
+
+from flight_logic import RESULTS, flight_record
+from perf import span
+
+PREVIEW = ["Рядок", "Зліт", "Посадка", "Тривалість (хв)", "Дистанція (м)", "Номер АКБ", "Цикли АКБ", "Результат", "Примітки", "Помилка"]
+# Колонка списку → назви в CSV (без регістру й пробілів по краях)
+ALIASES = {
+    "Зліт": ["зліт", "взльот", "зльот", "takeoff", "takeoff time", "start", "start time", "begin"],
+    "Посадка": ["посадка", "landing", "landing time", "end", "end time", "stop"],
+    "Тривалість (хв)": ["тривалість (хв)", "тривалість", "хв", "duration", "duration (min)", "flight time (min)"],
+    "Дистанція (м)": ["дистанція (м)", "дистанція", "відстань", "відстань (м)", "distance", "distance (m)", "max distance (m)"],
+    "Номер АКБ": ["номер акб", "акб", "battery", "battery sn", "battery serial"],
+    "Цикли АКБ": ["цикли акб", "цикли", "cycles", "battery cycles", "cycle count"],
+    "Результат": ["результат", "result"],
+    "Примітки": ["примітки", "примітка", "notes", "note", "comment"],
+}
+_TIME = r"\d{1,2}[:.]\d{2}|\d{1,4}"
+_LINE = (rf"^\s*(?:\d+[.)]\s+)?(?P<off>{_TIME})\s*[-–—]\s*(?P<land>{_TIME})"
+         r"(?:\s*[-–—]\s*(?P<dist>\d+(?: \d{3})*)\s*м?\b)?(?:\s*\(\s*\d+\s*хв\s*\))?\s*[-–—,;]?\s*(?P<note>.*?)\s*$")
+_AKB = r"(?:^|\s)АКБ\s*[№#]?\s*(\S+)"
+_RESULT = r"(?i)(?:^|[\s,;])(без\s+)?(" + "|".join(RESULTS) + r")(?:$|[\s,;.])"  # «без затримання» — не результат
+
+
+def _per_unique(s, fn):
+    codes, uniq = pd.factorize(s)
+    return pd.Series(np.asarray(fn(pd.Series(uniq, dtype=object)), dtype=float)).reindex(codes).set_axis(s.index)
+
+
+def _clock(s):
+    """Час зі списку чи журналу → хвилини від 00:00; нерозпізнане — NaN.
+
+    «9» → 09:00, «930» → 09:30, «0930»/«09:30»/«9.30» → 09:30 (як smart_time_parse);
+    «2024-05-01 21:47:12» чи «21:47:12» — година й хвилина з дати-часу.
+    """
+    def parse(u):
+        u = u.fillna("").astype(str).str.strip()
+        full = u.str.contains(r"\d[-./]\d{1,2}[-./]\d|\d:\d{2}:\d{2}")
+        t = pd.to_datetime(u.where(full), format="mixed", errors="coerce")
+        d = u.str.replace(r"\D", "", regex=True)
+        n = d.str.len()
+        h = pd.to_numeric(d.where(n <= 2, d.str.slice(0, 1).where(n == 3, d.str.slice(0, 2))), errors="coerce")
+        m = pd.to_numeric(pd.Series("0", index=u.index).where(n <= 2, d.str.slice(1, 3).where(n == 3, d.str.slice(2, 4))), errors="coerce")
+        short = ((h * 60 + m).where(n.between(1, 4) & (h < 24) & (m < 60)))
+        return (t.dt.hour * 60 + t.dt.minute).where(full, short)
+    return _per_unique(s, parse)
+
+
+def _hhmm(mins):
+    ok = mins.notna()
+    v = mins.fillna(0).astype(int)
+    return ((v // 60).astype(str).str.zfill(2) + ":" + (v % 60).astype(str).str.zfill(2)).where(ok, "")
+
+
+def _count(s):
+    """Ціле число з тексту («1 200 м» → 1200); порожнє — 0, нерозпізнане — NaN."""
+    def parse(u):
+        u = u.fillna("").astype(str).str.replace("[\\s\u00a0]", "", regex=True).str.replace(",", ".")
+        num = pd.to_numeric(u.str.extract(r"^(\d+(?:\.\d+)?)", expand=False), errors="coerce").round()
+        return num.where(u != "", 0)
+    return _per_unique(s, parse)
+
+
+def _text(df, col):
+    return df[col].fillna("").astype(str).str.strip() if col in df.columns else pd.Series("", index=df.index)
+
+
+def validate(raw):
+    """Сирі текстові колонки (Зліт, Посадка, ... з ALIASES) → таблиця PREVIEW.
+
+    Без «Посадки», але з «Тривалістю» (журнали контролерів) посадка = зліт + тривалість.
+    """
+    if raw is None or raw.empty: return pd.DataFrame(columns=PREVIEW)
+    with span("import.validate", rows=len(raw)):
+        raw = raw.reset_index(drop=True)
+        off, land = _clock(_text(raw, "Зліт")), _clock(_text(raw, "Посадка"))
+        if "Посадка" not in raw.columns and "Тривалість (хв)" in raw.columns:
+            dur = _text(raw, "Тривалість (хв)")
+            land = ((off + _count(dur)) % 1440).where(dur != "")
+        dist, cyc = _count(_text(raw, "Дистанція (м)")), _count(_text(raw, "Цикли АКБ"))
+        res = _text(raw, "Результат")
+        canon = {r.lower(): r for r in RESULTS}
+        result = res.str.lower().map(canon).where(res != "", RESULTS[0])
+        errors = pd.Series("", index=raw.index)
+        for bad, msg in [(result.isna(), "невідомий результат"), (cyc.isna(), "цикли АКБ?"), (dist.isna(), "відстань?"),
+                         (land.isna(), "посадка?"), (off.isna(), "зліт?")]:
+            errors = errors.mask(bad, msg + ("; " + errors).where(errors != "", ""))
+        if "Помилка" in raw.columns: errors = errors.mask(raw["Помилка"].fillna("") != "", raw["Помилка"])
+        return pd.DataFrame({
+            "Рядок": raw["Рядок"] if "Рядок" in raw.columns else pd.Series(np.arange(1, len(raw) + 1)),
+            "Зліт": _hhmm(off), "Посадка": _hhmm(land),
+            "Тривалість (хв)": ((land - off) % 1440).astype("Int64"),  # посадка раніше зльоту — через північ
+            "Дистанція (м)": dist.fillna(0).astype(int), "Номер АКБ": _text(raw, "Номер АКБ"),
+            "Цикли АКБ": cyc.fillna(0).astype(int), "Результат": result.fillna(res),
+            "Примітки": _text(raw, "Примітки"), "Помилка": errors,
+        })[PREVIEW]
+
+
+def parse_text(text):
+    """Вставлений текст (рядок на виліт) → таблиця PREVIEW; порожні рядки пропускаються."""
+    lines = pd.Series((text or "").splitlines(), dtype=object)
+    lines = lines[lines.str.strip() != ""]
+    if lines.empty: return pd.DataFrame(columns=PREVIEW)
+    raw = lines.str.extract(_LINE).rename(columns={"off": "Зліт", "land": "Посадка", "dist": "Дистанція (м)", "note": "Примітки"})
+    note = raw["Примітки"].fillna("")
+    raw["Номер АКБ"] = note.str.extract(_AKB, expand=False).fillna("").str.rstrip(",;")
+    note = note.str.replace(_AKB, "", n=1, regex=True)
+    res = note.str.extract(_RESULT).fillna("")
+    found = (res[0] == "") & (res[1] != "")
+    raw["Результат"] = res[1].where(found, "")
+    raw["Примітки"] = note.where(~found, note.str.replace(_RESULT, " ", n=1, regex=True)).str.strip(" ,;-–—")
+    raw["Рядок"] = lines.index + 1
+    raw["Помилка"] = pd.Series("", index=raw.index).where(raw["Зліт"].notna(), "не розпізнано: " + lines.str.strip().str.slice(0, 40))
+    return validate(raw)
+
+
+def parse_csv(data):
+    """CSV/TSV (bytes) → таблиця PREVIEW; колонки — за ALIASES, решта ігнорується."""
+    raw = None
+    for enc in ("utf-8-sig", "cp1251"):
+        try: raw = pd.read_csv(io.BytesIO(data), sep=None, engine="python", dtype=str, encoding=enc); break
+        except UnicodeDecodeError: continue
+        except Exception: return pd.DataFrame(columns=PREVIEW)
+    if raw is None or raw.empty: return pd.DataFrame(columns=PREVIEW)
+    names = {a: col for col, aliases in ALIASES.items() for a in aliases}
+    found = {}
+    for c in raw.columns:
+        col = names.get(str(c).strip().lower())
+        if col and col not in found: found[col] = c
+    raw = raw[list(found.values())].set_axis(list(found), axis=1)
+    raw["Рядок"] = np.arange(2, len(raw) + 2)  # як у табличному редакторі: 1 — заголовок
+    if "Зліт" not in found: raw["Помилка"] = "немає колонки зльоту (" + ", ".join(ALIASES["Зліт"][:2]) + ")"
+    return validate(raw)
+
+
+def to_flights(preview, date, shift_start, shift_end, unit, operator, drone, route):
+    """Рядки PREVIEW без помилок → вильоти списку зміни (як flight_record з форми, без скріншотів)."""
+    ok = preview[preview["Помилка"] == ""]
+    return [flight_record(date, shift_start, shift_end, unit, operator, drone, route,
+                          d_time(*map(int, r["Зліт"].split(":"))), d_time(*map(int, r["Посадка"].split(":"))),
+                          int(r["Дистанція (м)"]), r["Номер АКБ"], int(r["Цикли АКБ"]), r["Результат"], r["Примітки"])
+            for r in ok.to_dict("records")]
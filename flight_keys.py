@@ -0,0 +1,176 @@
+"""Ключі вильотів: захист від повторної відправки та пошук дублікатів архіву.
+
+Ключ вильоту — хеш (Оператор, Дата, Зліт, Посадка, Дрон) після обрізання
+пробілів. Множина ключів живе в SQLite дзеркала й оновлюється в одній
+транзакції з ним (як зведення аналітики); вильоти, поставлені в чергу запису,
+але ще не підтягнуті дзеркалом, тримаються в пам'яті (release знімає їх, якщо
+запис не вдався). Тож перевірка пачки з k вильотів — k пошуків за первинним
+ключем, незалежно від розміру архіву.
+
+    fresh = keys.claim(flights)   # лише нові вильоти, вже зарезервовані
+    fut.add_done_callback(lambda f: f.exception() and keys.release(fresh))
+    dups = keys.duplicates()      # адмін: зайві копії в архіві (рядки Sheet1)
+    keys.remove_duplicates(dups)
+"""
+import hashlib
+import threading
+import time
+
+import pandas as pd
+
+from perf import span
+
+TABLE = "flight_keys"
+KEY_COLUMNS = ["Оператор", "Дата", "Зліт", "Посадка", "Дрон"]
+LEGACY = {"Зліт": "Взльот"}  # старі рядки архіву тримають час зльоту в «Взльот»
+PENDING_TTL = 24 * 3600  # с: довше записувач не тримає вильоти в черзі
+BATCH = 500  # ключів в одному IN (...)
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:20]
+
+
+def flight_key(flight):
+    """Ключ одного вильоту (dict з колонками архіву або списку зміни)."""
+    vals = [flight.get(c) for c in KEY_COLUMNS]
+    if not str(vals[2] or "").strip(): vals[2] = flight.get(LEGACY["Зліт"])
+    return _digest("\x1f".join("" if v is None else str(v).strip() for v in vals))
+
+
+def key_text(df):
+    """Векторно: нормалізований текст ключа для кожного рядка DataFrame (до хешування)."""
+    cols = []
+    for c in KEY_COLUMNS:
+        s = df[c].fillna("").astype(str).str.strip() if c in df.columns else pd.Series("", index=df.index)
+        old = LEGACY.get(c)
+        if old in df.columns: s = s.where(s != "", df[old].fillna("").astype(str).str.strip())
+        cols.append(s)
+    out = cols[0]
+    for s in cols[1:]: out = out + "\x1f" + s
+    return out
+
+
+def frame_keys(df):
+    """Ключі рядків DataFrame: хеш лише унікальних текстів."""
+    codes, uniq = pd.factorize(key_text(df))
+    return pd.Series([_digest(t) for t in uniq.tolist()], dtype=object).reindex(codes).set_axis(df.index)
+
+
+class FlightKeyIndex:
+    def __init__(self, mirror, ws="Sheet1"):
+        self.mirror, self.ws = mirror, ws
+        self._pending = {}  # ключ → час резервування (ще не в дзеркалі)
+        self._lock = threading.Lock()
+        with mirror._connect(immediate=True) as db:  # побудова й запис хвоста іншим процесом — по черзі
+            exists = db.execute("SELECT 1 FROM sqlite_master WHERE name=?", (TABLE,)).fetchone()
+            db.execute(f"CREATE TABLE IF NOT EXISTS {TABLE} (key TEXT PRIMARY KEY, n INTEGER)")
+            # Дзеркало, синхронізоване до появи індексу: одноразова побудова з нього
+            q = None if exists else mirror.select_sql(db, ws, [c for c in KEY_COLUMNS + list(LEGACY.values()) if c in mirror.columns(ws)])
+            if q:
+                with span("flight_keys.build") as s:
+                    df = pd.read_sql_query(q[0], db, params=q[1]); s.rows = len(df)
+                    self._insert(db, df)
+        mirror.add_hook(ws, self)
+
+    def on_store(self, db, rows, full):
+        if full: db.execute(f"DELETE FROM {TABLE}")
+        keys = self._insert(db, rows)
+        with self._lock:
+            for k in keys: self._pending.pop(k, None)
+
+    @staticmethod
+    def _insert(db, df):
+        if df is None or df.empty: return []
+        counts = frame_keys(df).value_counts()
+        db.executemany(f"INSERT INTO {TABLE} VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET n = n + excluded.n",
+                       zip(counts.index.tolist(), counts.astype(int).tolist()))
+        return counts.index.tolist()
+
+    def _archived(self, keys):
+        found = set()
+        with self.mirror._connect() as db:
+            for i in range(0, len(keys), BATCH):
+                part = keys[i:i + BATCH]
+                found.update(r[0] for r in db.execute(f"SELECT key FROM {TABLE} WHERE key IN ({', '.join('?' * len(part))})", part))
+        return found
+
+    def known(self, flights):
+        """Для кожного вильоту: чи він уже в архіві (без резервування).
+
+        Черга запису не враховується: вильоти з черги, що так і не записались, мають повернутись у список.
+        """
+        keys = [flight_key(f) for f in flights]
+        found = self._archived(list(set(keys)))
+        return [k in found for k in keys]
+
+    def landed(self, flights):
+        """Для кожного вильоту: чи він уже в Sheet1 — за свіжим хвостом аркуша, без черги запису.
+
+        Для FlightWriter перед повтором після збою: запис міг пройти, а відповідь загубитись.
+        """
+        self.mirror.sync(self.ws, force=True)
+        keys = [flight_key(f) for f in flights]
+        found = self._archived(list(set(keys)))
+        return [k in found for k in keys]
+
+    def claim(self, flights):
+        """Нові вильоти пачки (без уже архівованих, поставлених у чергу та повторів усередині пачки).
+
+        Повернуті вильоти резервуються: повторний claim тих самих поверне [] ще до того,
+        як записувач допише їх у Sheet1.
+        """
+        with span("flight_keys.claim", rows=len(flights)):
+            keys = [flight_key(f) for f in flights]
+            with self._lock:
+                now = time.time()
+                self._pending = {k: t for k, t in self._pending.items() if now - t < PENDING_TTL}
+                taken = self._archived(list(set(keys))) | set(self._pending)
+                fresh = []
+                for k, f in zip(keys, flights):
+                    if k in taken: continue
+                    taken.add(k); self._pending[k] = now; fresh.append(f)
+        return fresh
+
+    def release(self, flights):
+        """Знімає резервування claim з вильотів, запис яких не вдався: їх можна надіслати знову."""
+        with self._lock:
+            for f in flights: self._pending.pop(flight_key(f), None)
+
+    def stats(self):
+        with self.mirror._connect() as db:
+            keys, dups = db.execute(f"SELECT COUNT(*), COALESCE(SUM(n - 1), 0) FROM {TABLE}").fetchone()
+        return {"keys": keys, "duplicates": dups, "pending": len(self._pending)}
+
+    # --- адмін: дублікати в архіві ---
+    def duplicates(self):
+        """Зайві копії вильотів архіву (перша копія лишається): DataFrame з «Рядок» (№ рядка Sheet1) і колонками ключа."""
+        cols = [c for c in KEY_COLUMNS + list(LEGACY.values()) if c in self.mirror.columns(self.ws)]
+        with span("flight_keys.duplicates") as s, self.mirror._connect() as db:
+            q = self.mirror.select_sql(db, self.ws, ["_row"] + cols)
+            df = pd.read_sql_query(q[0], db, params=q[1]) if q else pd.DataFrame(columns=["_row"] + cols)
+            s.rows = len(df)
+        dup = key_text(df).duplicated(keep="first")
+        out = df[dup.to_numpy()].rename(columns={"_row": "Рядок"})
+        old = LEGACY["Зліт"]
+        if old in out.columns and "Зліт" in out.columns:  # старі рядки: час зльоту з «Взльот», як у ключі
+            off = out["Зліт"].fillna("").astype(str).str.strip()
+            out = out.assign(**{"Зліт": off.where(off != "", out[old])})
+        return out[["Рядок"] + [c for c in KEY_COLUMNS if c in out.columns]].reset_index(drop=True)
+
+    def remove_duplicates(self, dups):
+        """Видаляє рядки dups (з duplicates()) з Sheet1 і перечитує дзеркало повністю. Повертає кількість.
+
+        Перед видаленням рядки перечитуються з аркуша: якщо після пошуку аркуш правили чи сортували
+        й за номером рядка вже інший виліт, нічого не видаляється (ValueError) — пошук треба повторити.
+        """
+        rows = dups["Рядок"].astype(int).tolist()
+        if not rows: return 0
+        head, vals = self.mirror.sheets.rows(self.ws, rows)
+        now = pd.DataFrame([(v + [""] * len(head))[:len(head)] for v in vals], columns=head)
+        moved = (key_text(now).to_numpy() != key_text(dups.reset_index(drop=True)).to_numpy()).sum()
+        if moved: raise ValueError(f"Sheet1 змінився після пошуку дублікатів ({moved} рядк. уже не ті) — знайдіть дублікати ще раз")
+        self.mirror.sheets.delete_rows(self.ws, rows)
+        self.mirror.reset(self.ws)
+        self.mirror.sync(self.ws, force=True)
+        return len(rows)
@@ -0,0 +1,93 @@
+"""Спільна логіка польотів без залежності від Streamlit.
+
+Довідники, розбір часу, тривалість, рядок вильоту, розподіл для ЦУС і текст
+донесення для Telegram. Використовується і main.py (Streamlit), і
+api_server.py (JSON API), тож обидва шляхи формують однакові рядки архіву й
+однакові повідомлення.
+"""
+from datetime import datetime, time as d_time
+
+UNITS = [
+    "впс Кодима", "віпс Шершенці", "віпс Загнітків", "впс Станіславка",
+    "віпс Тимкове", "віпс Чорна", "впс Окни", "віпс Ткаченкове",
+    "віпс Гулянка", "віпс Новосеменівка", "впс Великокомарівка",
+    "віпс Павлівка", "впс Велика Михайлівка", "віпс Слов'яносербка",
+    "віпс Гребеники", "впс Степанівка", "впс Кучурган",
+    "віпс Лиманське", "віпс Лучинське", "УПЗ"
+]
+ADMIN_PASSWORD = "admin_secret"
+RESULTS = ["Без ознак порушення", "Затримання", "Виявлення цілі"]
+
+UKR_MONTHS = {1: "січень", 2: "лютий", 3: "березень", 4: "квітень", 5: "травень", 6: "червень", 7: "липень", 8: "серпень", 9: "вересень", 10: "жовтень", 11: "листопад", 12: "грудень"}
+
+
+def smart_time_parse(val):
+    if not val: return None
+    val = "".join(filter(str.isdigit, val))
+    if not val: return None
+    try:
+        if len(val) <= 2: h, m = int(val), 0
+        elif len(val) == 3: h, m = int(val[0]), int(val[1:])
+        elif len(val) == 4: h, m = int(val[:2]), int(val[2:])
+        else: return None
+        if 0 <= h < 24 and 0 <= m < 60: return d_time(h, m)
+    except: pass
+    return None
+
+def calculate_duration(start, end):
+    s, e = start.hour * 60 + start.minute, end.hour * 60 + end.minute
+    d = e - s
+    return d if d >= 0 else d + 1440
+
+def format_to_time_str(total_minutes):
+    try:
+        hours = total_minutes // 60
+        minutes = total_minutes % 60
+        return f"{int(hours):02d}:{int(minutes):02d}"
+    except: return "00:00"
+
+def split_midnight(flights, shift_start):
+    """Вильоти зміни до та після 00:00 (для ЦУС). Після першого переходу через північ — усі наступні."""
+    before, after, crossed = [], [], False
+    for f in flights:
+        fs, fe = datetime.strptime(f["Зліт"], "%H:%M").time(), datetime.strptime(f['Посадка'], "%H:%M").time()
+        if crossed or fe < fs or fs < shift_start: crossed = True; after.append(f)
+        else: before.append(f)
+    return before, after
+
+def cus_text(flights):
+    return "\n".join([f"{f['Зліт']} - {f['Посадка']} - {f['Дистанція (м)']} м ({f['Тривалість (хв)']} хв)" for f in flights])
+
+def flight_record(date, shift_start, shift_end, unit, operator, drone, route, t_off, t_land,
+                  distance=0, akb="", cycles=0, result=RESULTS[0], notes="", files=None):
+    """Рядок вильоту в тому вигляді, як його тримає список зміни (дата — date, час — time)."""
+    return {
+        "Дата": date.strftime("%d.%m.%Y"),
+        "Час завдання": f"{shift_start.strftime('%H:%M')} - {shift_end.strftime('%H:%M')}",
+        "Підрозділ": unit, "Оператор": operator,
+        "Дрон": drone, "Маршрут": route,
+        "Зліт": t_off.strftime("%H:%M"), "Посадка": t_land.strftime("%H:%M"),
+        "Тривалість (хв)": calculate_duration(t_off, t_land), "Дистанція (м)": distance,
+        "Номер АКБ": akb, "Цикли АКБ": cycles, "Результат": result, "Примітки": notes, "files": files
+    }
+
+def archive_rows(flights):
+    """Рядки для Sheet1: без файлів, зі статусом медіа."""
+    rows = []
+    for f in flights:
+        row = dict(f); row.pop('files', None); row["Медіа (статус)"] = "З фото" if f.get('files') else "Текст"
+        rows.append(row)
+    return rows
+
+def report_text(all_fl):
+    """Текст донесення зміни для Telegram (Markdown)."""
+    first = all_fl[0]
+    flights_details = []
+    for i, f in enumerate(all_fl):
+        flight_text = f"{i+1}. {f['Зліт']}-{f['Посадка']} ({f['Тривалість (хв)']} хв)"
+        if f.get('Результат'): flight_text += f"\n   Результат: {f['Результат']}"
+        if f.get('Примітки'): flight_text += f"\n   Примітки: {f['Примітки']}"
+        flights_details.append(flight_text)
+
+    flights_txt = "\n".join(flights_details)
+    return f"🚁 **Донесення: {first['Підрозділ']}**\n👤 **Пілот:** {first['Оператор']}\n📅 **Дата:** {first['Дата']}\n⏰ **Час завдання:** {first['Час завдання']}\n🛡 **БпЛА:** {first['Дрон']}\n🗺 **Маршрут:** {first['Маршрут']}\n━━━━━━━━━━━━━━━\n🚀 **Вильоти:**\n{flights_txt}"
@@ -0,0 +1,188 @@
+"""Єдиний записувач для Sheet1 та Drafts.
+
+Усі сесії Streamlit кладуть нові вильоти в одну чергу, а фоновий потік скидає її
+пакетами через append — лише нові рядки, без читання архіву. Зміни чернеток
+(Drafts) зводяться по оператору: з кількох збережень за один цикл лишається
+останнє, і рядки операторів переписуються на місці один раз на цикл, а не на
+кожне натискання.
+
+Збій запису повторюється не більше MAX_ATTEMPTS разів, далі Future отримує
+виняток, а пакет знімається з черги й не блокує наступні записи. Перед
+повтором landed(records) перевіряє, чи рядки вже в Sheet1: запис міг пройти,
+а загубилась лише відповідь — тоді повторний append задвоїв би вильоти.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from perf import span
+from sheets_io import to_cell
+
+FLUSH_INTERVAL = 0.5   # с, скільки чекаємо, щоб зібрати пакет
+MAX_BATCH = 500        # рядків Sheet1 за один append
+RETRY_DELAY = 2.0      # с, пауза після помилки запису (рядки лишаються в черзі)
+MAX_ATTEMPTS = 5       # спроб на пакет; далі Future отримує виняток
+
+
+def draft_rows(df):
+    """Рядки чернеток без порожніх місць, що лишаються за оператором після скорочення його списку."""
+    if df is None or df.empty or "Зліт" not in df.columns: return df
+    return df[df["Зліт"].fillna("").astype(str).str.strip() != ""]
+
+
+class FlightWriter:
+    def __init__(self, sheets, archive_ws="Sheet1", drafts_ws="Drafts", landed=None):
+        """landed(records) -> [bool]: які рядки вже в Sheet1 (перевірка перед повтором); None — без перевірки."""
+        self.sheets, self.landed = sheets, landed
+        self.archive_ws, self.drafts_ws = archive_ws, drafts_ws
+        self._tries = {}  # Future / ("drafts", оператор) → невдалих спроб
+        self._q = queue.Queue()
+        self._listeners = []
+        self._thread = threading.Thread(target=self._run, name="flight-writer", daemon=True)
+        self._thread.start()
+
+    # --- API для сесій ---
+    def submit_flights(self, rows, operator=None):
+        """Ставить вильоти в чергу на append у Sheet1; якщо задано operator — ще й очищає його чернетки.
+
+        Повертає Future, що завершується, коли рядки реально записані.
+        """
+        fut = Future()
+        self._q.put(("append", [dict(r) for r in rows], fut))
+        if operator is not None: self.save_drafts(operator, [])
+        return fut
+
+    def save_drafts(self, operator, rows):
+        """Замінює чернетки оператора (порожній список — видалення)."""
+        fut = Future()
+        self._q.put(("drafts", (operator, [dict(r) for r in rows]), fut))
+        return fut
+
+    def on_flush(self, fn):
+        """fn(worksheet, records) викликається після кожного успішного запису."""
+        self._listeners.append(fn)
+
+    def flush(self, timeout=None):
+        """Чекає, доки все, що вже в черзі, буде записано."""
+        fut = Future()
+        self._q.put(("barrier", None, fut))
+        return fut.result(timeout)
+
+    # --- фоновий потік ---
+    def _run(self):
+        appends, drafts = [], {}
+        while True:
+            try: item = self._q.get(timeout=RETRY_DELAY if (appends or drafts) else None)
+            except queue.Empty: item = None
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            barriers = []
+            while item is not None:
+                kind, payload, fut = item
+                if kind == "append": appends.append((payload, fut))
+                elif kind == "drafts":
+                    op, rows = payload
+                    prev = drafts.get(op)
+                    drafts[op] = (rows, (prev[1] if prev else []) + [fut])
+                else: barriers.append(fut)
+                if kind == "barrier" or sum(len(p) for p, _ in appends) >= MAX_BATCH: break
+                try: item = self._q.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty: break
+            appends, drafts = self._flush(appends, drafts)
+            for fut in barriers:
+                if appends or drafts: self._q.put(("barrier", None, fut))
+                else: fut.set_result(True)
+
+    def _flush(self, appends, drafts):
+        if appends and any(fut in self._tries for _, fut in appends):
+            # Повтор після збою: спершу прибрати рядки, що таки записались, далі — по одному
+            # Future, щоб пакет, який падає завжди, не тягнув за собою сусідні записи
+            try: appends = self._unlanded(appends) if self.landed is not None else appends
+            except Exception as e: appends = self._failed_appends(appends, drafts, e)
+            else: appends = [a for one in appends for a in self._append([one], drafts)]
+        elif appends: appends = self._append(appends, drafts)
+        # Чернетки чіпаємо лише після того, як вильоти вже в архіві: інакше збій
+        # між двома записами загубив би рядки з обох аркушів.
+        if drafts and not appends:
+            try:
+                with span("writer.flush_drafts", rows=len(drafts)): self._apply_drafts(drafts)
+            except Exception as e:
+                for op in list(drafts):
+                    key = ("drafts", op)
+                    self._tries[key] = self._tries.get(key, 0) + 1
+                    if self._tries[key] >= MAX_ATTEMPTS:
+                        del self._tries[key]
+                        for fut in drafts.pop(op)[1]: fut.set_exception(e)
+            else:
+                for op, (_, futs) in drafts.items():
+                    self._tries.pop(("drafts", op), None)
+                    for fut in futs: fut.set_result(True)
+                drafts = {}
+        return appends, drafts
+
+    def _append(self, appends, drafts):
+        """Один append пакета; повертає те, що лишилось у черзі (порожньо — записано)."""
+        records = [r for rows, _ in appends for r in rows]
+        try:
+            with span("writer.flush_flights", rows=len(records)): self.sheets.append_records(self.archive_ws, records)
+        except Exception as e: return self._failed_appends(appends, drafts, e)
+        for rows, fut in appends: self._tries.pop(fut, None); fut.set_result(len(rows))
+        self._notify(self.archive_ws, records)
+        return []
+
+    def _unlanded(self, appends):
+        """Знімає з пакета рядки, які вже в Sheet1 (записані, але відповідь загубилась)."""
+        done = iter(self.landed([r for rows, _ in appends for r in rows]))
+        out = []
+        for rows, fut in appends:
+            left = [r for r, d in zip(rows, done) if not d]
+            if left: out.append((left, fut))
+            else: self._tries.pop(fut, None); fut.set_result(len(rows))
+        return out
+
+    def _failed_appends(self, appends, drafts, err):
+        """Лічить невдалу спробу; після MAX_ATTEMPTS — виняток у Future і зняття з черги.
+
+        Разом із вильотами знімається й очищення чернеток їхніх операторів: чернетки лишаються в Drafts.
+        """
+        keep, ops = [], set()
+        for rows, fut in appends:
+            self._tries[fut] = self._tries.get(fut, 0) + 1
+            if self._tries[fut] < MAX_ATTEMPTS: keep.append((rows, fut)); continue
+            del self._tries[fut]; fut.set_exception(err)
+            ops.update(r.get("Оператор") for r in rows)
+        for op in ops:
+            if op in drafts and not drafts[op][0]:
+                for fut in drafts.pop(op)[1]: fut.set_exception(err)
+        return keep
+
+    def _apply_drafts(self, drafts):
+        """Чернетки операторів — рядками на місці, без перезапису аркуша.
+
+        Рядки оператора переписуються його новими чернетками, зайві стають порожніми місцями
+        (лише «Оператор»), бракуючі дописуються в кінець. Рядки не видаляються й не зсуваються,
+        тож записувач іншого процесу (api_server.py), що править своїх операторів, не затирає цих змін.
+        """
+        new_rows = [r for rows, _ in drafts.values() for r in rows]
+        header = self.sheets.ensure_columns(self.drafts_ws, list(dict.fromkeys(["Оператор"] + [c for r in new_rows for c in r])))
+        at = header.index("Оператор")
+        owned = {}
+        for n, row in enumerate(self.sheets.values(self.drafts_ws, start_row=2), start=2):
+            if len(row) > at and row[at] in drafts: owned.setdefault(row[at], []).append((n, row))
+        updates, extra = {}, []
+        for op, (rows, _) in drafts.items():
+            want = [[to_cell(r.get(c)) for c in header] for r in rows]
+            mine = owned.get(op, [])
+            blank = [op if c == "Оператор" else "" for c in header]
+            for i, (n, old) in enumerate(mine):
+                val = want[i] if i < len(want) else blank
+                if (old + [""] * len(header))[:len(header)] != val: updates[n] = val
+            extra += rows[len(mine):]
+        self.sheets.update_rows(self.drafts_ws, updates)
+        self.sheets.append_records(self.drafts_ws, extra)
+        self._notify(self.drafts_ws, new_rows)
+
+    def _notify(self, ws, records):
+        for fn in self._listeners:
+            try: fn(ws, records)
+            except Exception: pass
@@ -0,0 +1,80 @@
+"""Підготовка скріншотів до відправки: зменшення та перестискання.
+
+Скріншоти з телефонів важать мегабайти, а в Telegram їх однаково стиснуть.
+Кожне фото зменшується до IMG_MAX_DIM по більшій стороні й зберігається в JPEG
+з якістю IMG_QUALITY. Фото обробляються по одному (генератор), тож у пам'яті
+немає словника з усіма байтами зміни. Якщо результат не менший за оригінал
+або файл не є зображенням, іде оригінал.
+"""
+import io
+import os
+
+from PIL import Image, ImageOps
+
+IMG_MAX_DIM = int(os.environ.get("UAV_IMG_MAX_DIM", 1600))
+IMG_QUALITY = int(os.environ.get("UAV_IMG_QUALITY", 80))
+
+
+class PipelineStats:
+    def __init__(self):
+        self.count, self.original, self.sent = 0, 0, 0
+
+    @property
+    def saved(self):
+        return self.original - self.sent
+
+    def summary(self):
+        if not self.original: return ""
+        return f"{self.count} фото: {self.original / 1024:.0f} → {self.sent / 1024:.0f} КБ (−{100 * self.saved / self.original:.0f}%)"
+
+
+def _size(src):
+    if isinstance(src, (str, os.PathLike)): return os.path.getsize(src)
+    if hasattr(src, "size") and isinstance(src.size, int): return src.size
+    pos = src.tell(); src.seek(0, os.SEEK_END); n = src.tell(); src.seek(pos)
+    return n
+
+
+def _read(src):
+    if isinstance(src, (str, os.PathLike)):
+        with open(src, "rb") as fh: return fh.read()
+    src.seek(0)
+    return src.read()
+
+
+def compress_image(src, max_dim=IMG_MAX_DIM, quality=IMG_QUALITY):
+    """src — шлях або файловий об'єкт. Повертає (bytes, mime, змінено_чи_ні)."""
+    try:
+        if not isinstance(src, (str, os.PathLike)): src.seek(0)
+        with Image.open(src) as im:
+            if im.format == "JPEG": im.draft("RGB", (max_dim, max_dim))  # декодування одразу в меншому масштабі
+            im = ImageOps.exif_transpose(im)
+            im.thumbnail((max_dim, max_dim), Image.LANCZOS)
+            if im.mode in ("RGBA", "LA", "P"):
+                im = im.convert("RGBA")
+                bg = Image.new("RGB", im.size, (255, 255, 255)); bg.paste(im, mask=im.split()[-1]); im = bg
+            elif im.mode != "RGB": im = im.convert("RGB")
+            out = io.BytesIO()
+            im.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+    except Exception:
+        return None, None, False
+    data = out.getvalue()
+    if len(data) >= _size(src): return None, None, False
+    return data, "image/jpeg", True
+
+
+def iter_prepared(photos, stats=None, max_dim=IMG_MAX_DIM, quality=IMG_QUALITY):
+    """Генератор (ім'я, bytes, mime) для TelegramOutbox.enqueue_photos.
+
+    photos — об'єкти з .name/.type та файловим інтерфейсом (UploadedFile) або
+    (ім'я, шлях, mime).
+    """
+    for p in photos:
+        name, src, mime = (p.name, p, p.type) if hasattr(p, "name") and not isinstance(p, tuple) else p
+        original = _size(src)
+        data, new_mime, changed = compress_image(src, max_dim, quality)
+        if changed: name, mime = os.path.splitext(name or "photo")[0] + ".jpg", new_mime
+        else: data = _read(src)
+        if stats is not None:
+            stats.count += 1; stats.original += original; stats.sent += len(data)
+        yield name, data, mime
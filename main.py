@@ -1,12 +1,31 @@
 import streamlit as st
 from streamlit_gsheets import GSheetsConnection
 import pandas as pd
-import requests
 import time
 from datetime import datetime, time as d_time, timedelta
-import json
-import io  
+import os
 import random  
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as WriteTimeout, wait, FIRST_COMPLETED
+from sheets_io import SheetsIO
+from flight_writer import FlightWriter, draft_rows
+from archive_mirror import ArchiveMirror
+from archive_schema import normalize_archive, merge_legacy_columns
+from rollups import BUCKETS, RollupStore
+from battery_index import AKB_MAX_CYCLES, AKB_WARN, BatteryIndex
+from flight_keys import FlightKeyIndex
+from telegram_outbox import TelegramOutbox
+from image_pipeline import PipelineStats, iter_prepared
+from upload_store import UploadStore
+from archive_export import FORMATS, export_bytes
+from drone_registry import DroneRegistry
+from flight_logic import (UNITS, ADMIN_PASSWORD, UKR_MONTHS, RESULTS, smart_time_parse, calculate_duration,
+                          flight_record, archive_rows, report_text, split_midnight, cus_text)
+import perf
+from docx_reports import MAX_BATCH_DAYS, REPORTS_DIR, build_context, generate_batch, render_context
+from cus_engine import COLUMNS as CUS_COLUMNS, cus_blocks, cus_report
+from flight_checks import COLUMNS as CHECK_COLUMNS, archive_conflicts, live_conflicts
+from flight_import import parse_csv, parse_text, to_flights
+from dashboards import hours_figure, units_figure
 
 # --- 1. КОНФІГУРАЦІЯ СТОРІНКИ ---
 st.set_page_config(page_title="UAV Pilot Cabinet v7.3", layout="wide", page_icon="🛡️")
@@ -21,17 +40,7 @@ TG_TOKEN = get_secret("TELEGRAM_BOT_TOKEN")
 TG_CHAT_ID = get_secret("TELEGRAM_CHAT_ID")
 
 # --- 2. КОНСТАНТИ ТА СЛОВНИКИ ---
-UNITS = [
-    "впс Кодима", "віпс Шершенці", "віпс Загнітків", "впс Станіславка", 
-    "віпс Тимкове", "віпс Чорна", "впс Окни", "віпс Ткаченкове", 
-    "віпс Гулянка", "віпс Новосеменівка", "впс Великокомарівка", 
-    "віпс Павлівка", "впс Велика Михайлівка", "віпс Слов'яносербка", 
-    "віпс Гребеники", "впс Степанівка", "впс Кучурган", 
-    "віпс Лиманське", "віпс Лучинське", "УПЗ"
-]
-ADMIN_PASSWORD = "admin_secret"
-
-UKR_MONTHS = {1: "січень", 2: "лютий", 3: "березень", 4: "квітень", 5: "травень", 6: "червень", 7: "липень", 8: "серпень", 9: "вересень", 10: "жовтень", 11: "листопад", 12: "грудень"}
+# UNITS, ADMIN_PASSWORD, UKR_MONTHS — у flight_logic.py (спільні з api_server.py)
 
 # --- 3. ЗБЕРЕЖЕННЯ ТА ЗАВАНТАЖЕННЯ ДАНИХ (Persistence) ---
 if 'saved_credentials' not in st.session_state:
@@ -44,138 +53,175 @@ def load_user_credentials():
     return st.session_state.saved_credentials
 
 # --- 4. ДОПОМІЖНІ ФУНКЦІЇ ---
-def smart_time_parse(val):
-    if not val: return None
-    val = "".join(filter(str.isdigit, val))
-    if not val: return None
-    try:
-        if len(val) <= 2: h, m = int(val), 0
-        elif len(val) == 3: h, m = int(val[0]), int(val[1:])
-        elif len(val) == 4: h, m = int(val[:2]), int(val[2:])
-        else: return None
-        if 0 <= h < 24 and 0 <= m < 60: return d_time(h, m)
-    except: pass
-    return None
-
-def calculate_duration(start, end):
-    s, e = start.hour * 60 + start.minute, end.hour * 60 + end.minute
-    d = e - s
-    return d if d >= 0 else d + 1440
-
-def format_to_time_str(total_minutes):
-    try:
-        hours = total_minutes // 60
-        minutes = total_minutes % 60
-        return f"{int(hours):02d}:{int(minutes):02d}"
-    except: return "00:00"
-
-@st.cache_data
-def convert_df_to_excel(df):
-    mapping = {"Дрон": "БпЛА"}
-    export_df = df.copy().rename(columns=mapping)
-    
-    target_cols = [
-        "Дата", "Час завдання", "Підрозділ", "Оператор", "БпЛА", 
-        "Маршрут", "Зліт", "Посадка", "Тривалість (хв)", 
-        "Дистанція (м)", "Номер АКБ", "Цикли АКБ"
-    ]
-    final_cols = [c for c in target_cols if c in export_df.columns]
-    export_df = export_df[final_cols]
-
-    output = io.BytesIO()
-    # Саме цей блок вимагає бібліотеку xlsxwriter
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        export_df.to_excel(writer, index=False, sheet_name='Архів_Польотів')
-        
-        workbook  = writer.book
-        worksheet = writer.sheets['Архів_Польотів']
-        
-        border_format = workbook.add_format({
-            'border': 1,
-            'align': 'center',
-            'valign': 'vcenter',
-            'text_wrap': True
-        })
-        
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#2E7D32',
-            'color': 'white',
-            'border': 1,
-            'align': 'center',
-            'valign': 'vcenter'
-        })
-
-        for col_num, value in enumerate(export_df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-            # Автопідбір ширини
-            data_max = export_df[value].astype(str).map(len).max()
-            column_len = max(data_max, len(value)) + 2
-            worksheet.set_column(col_num, col_num, min(column_len, 30), border_format)
-            
-    return output.getvalue()
+# smart_time_parse, calculate_duration, format_to_time_str, report_text — у flight_logic.py
+
+def read_bytes(path):
+    # Вміст файлу для download_button (data=lambda: ...): файл закривається одразу
+    with open(path, 'rb') as fh: return fh.read()
 
 # --- 5. РОБОТА З БАЗОЮ ТА TG ---
 conn = st.connection("gsheets", type=GSheetsConnection)
 
-def load_data(ws="Sheet1"):
+@st.cache_resource
+def get_sheets():
+    return SheetsIO(conn)
+
+@st.cache_resource
+def get_writer():
+    # Один записувач на процес: усі сесії дописують у Sheet1 через нього
+    # Перед повтором після збою — чи рядки вже в Sheet1 (загублена відповідь), щоб не задвоїти
+    writer = FlightWriter(get_sheets(), landed=lambda recs: get_flight_keys().landed(recs))
+    # Після власного запису дзеркало звіряється одразу (у фоні), а не чекає SYNC_INTERVAL
+    writer.on_flush(lambda ws, recs: (get_mirror().mark_stale(ws), get_mirror().refresh(ws)))
+    return writer
+
+@st.cache_resource
+def get_mirror():
+    # Спільне для сесій і воркерів дзеркало аркушів на диску (див. archive_mirror.py)
+    return ArchiveMirror(get_sheets())
+
+@st.cache_resource
+def get_rollups():
+    # Помісячні лічильники аналітики, що оновлюються разом із дзеркалом Sheet1
+    return RollupStore(get_mirror())
+
+@st.cache_resource
+def get_batteries():
+    # Стан АКБ (цикли, наліт, останній виліт), що оновлюється разом із дзеркалом Sheet1
+    return BatteryIndex(get_mirror())
+
+@st.cache_resource
+def get_flight_keys():
+    # Ключі архівованих вильотів — відсіювання повторних відправок до запису й Telegram
+    return FlightKeyIndex(get_mirror())
+
+@st.cache_resource
+def get_perf_exporter():
+    # Файл метрик Prometheus оновлюється фоново, якщо задано UAV_PROM_INTERVAL
+    return perf.start_exporter()
+
+get_perf_exporter()
+
+def load_data(ws="Sheet1", **filters):
+    # filters: operator / unit / date_from / date_to — фільтрує SQLite, а не pandas
     try:
-        cache_ttl = 60 if ws == "Drafts" else 300
-        df = conn.read(worksheet=ws, ttl=cache_ttl)
-        if df is None or df.empty: return pd.DataFrame()
-        return df.dropna(how="all")
+        with perf.span(f"load_data:{ws}") as s:
+            df = get_mirror().query(ws, **filters)
+            if df is None or df.empty: return pd.DataFrame()
+            df = df.dropna(how="all"); s.rows = len(df)
+            return df
     except: return pd.DataFrame()
 
-@st.cache_data(ttl=600)
+WRITE_WAIT = 20  # с, скільки сесія чекає підтвердження запису
+
+@perf.cache_calls("drone_registry")
+@st.cache_resource(max_entries=2)
+@perf.cache_misses("drone_registry")
+def _drone_registry(version):
+    # Індекс DronesDB на версію дзеркала: один розбір аркуша на всі сесії й підрозділи
+    return DroneRegistry(load_data("DronesDB", sync=False))
+
+def get_registry():
+    get_mirror().refresh("DronesDB")  # у фоні: прогін не чекає Google
+    return _drone_registry(get_mirror().version("DronesDB"))
+
 def get_drones_for_unit(unit):
-    try:
-        df = load_data("DronesDB")
-        if df.empty or "Підрозділ" not in df.columns: return []
-        unit_drones = df[df['Підрозділ'] == unit]
-        if unit_drones.empty: return []
-        drones_list = []
-        for _, row in unit_drones.iterrows():
-            model = row.get('Модель БпЛА', '')
-            sn = row.get('s/n', '')
-            if pd.isna(model) or model == '': continue
-            display = f"{model} (S/N: {sn})" if pd.notna(sn) and sn != '' else model
-            drones_list.append(display)
-        return drones_list
-    except: return []
+    return get_registry().for_unit(unit)
+
+ARCHIVE_SORTS = ["Дата", "Підрозділ", "Оператор", "Дрон", "Зліт", "Тривалість (хв)", "Дистанція (м)", "Цикли АКБ", "Результат"]
+
+@perf.cache_calls("archive_keys")
+@st.cache_resource(max_entries=16)
+@perf.cache_misses("archive_keys")
+def _archive_keys(version, sort_by, descending, **filters):
+    # Відсортовані ключі під фільтром на версію дзеркала: гортання сторінок їх не перераховує
+    return get_mirror().sorted_keys("Sheet1", sort_by, descending, **filters)
+
+@st.cache_resource(max_entries=32)
+def _archive_totals(version, **filters):
+    return get_mirror().totals("Sheet1", **filters)
+
+@perf.cache_calls("archive_conflicts")
+@st.cache_resource(max_entries=8)
+@perf.cache_misses("archive_conflicts")
+def _archive_conflicts(version, date_from=None, date_to=None):
+    # Перетини за період на версію дзеркала: повторний перегляд не сканує архів
+    return archive_conflicts(get_mirror(), date_from=date_from, date_to=date_to)
+
+@perf.cache_calls("near_flights")
+@st.cache_resource(max_entries=16)
+@perf.cache_misses("near_flights")
+def _near_flights(version, date_from, date_to):
+    # Вильоти архіву для перевірки перетинів зі списком на версію дзеркала: спільні для сесій, лише для читання
+    return load_data("Sheet1", date_from=date_from, date_to=date_to, columns=CHECK_COLUMNS, sync=False)
+
+def get_near_flights(date_from, date_to):
+    # Фрагмент форми перезапускається на кожне натискання: SQLite читається лише після зміни дзеркала
+    get_mirror().refresh("Sheet1")  # у фоні: прогін не чекає Google
+    return _near_flights(get_mirror().version("Sheet1"), date_from, date_to)
+
+@perf.cache_calls("dashboard")
+@st.cache_resource(max_entries=32)
+@perf.cache_misses("dashboard")
+def _dashboard(version, kind, freq, by, operator=None, unit=None, date_from=None, date_to=None):
+    # Фігура з кошиків зведень на версію дзеркала: розмір — за кількістю кошиків, не вильотів
+    with perf.span(f"dashboard.{kind}") as s:
+        df = get_rollups().buckets(freq, by, operator, unit, date_from, date_to)
+        fig = units_figure(df, UNITS) if kind == "units" else hours_figure(df, by)
+        s.rows, s.bytes = len(df), len(fig.to_json())
+    return fig
+
+SPLASH_DEADLINE = 0.8  # с; далі вхід не чекає прогріву — він завершиться у фоні
+PREFETCH_SHEETS = ("DronesDB", "Drafts", "Sheet1")
+
+@st.cache_resource
+def get_prefetch_pool():
+    return ThreadPoolExecutor(max_workers=len(PREFETCH_SHEETS), thread_name_prefix="prefetch")
+
+def prefetch(deadline=SPLASH_DEADLINE, on_done=None):
+    # Паралельне прогрівання дзеркала для наступних екранів: реєстр БпЛА, чернетки, архів.
+    # Повертає аркуші, що встигли до дедлайну; решта догружається у фоні
+    mirror = get_mirror(); get_rollups(); get_batteries(); get_flight_keys()
+    pool = get_prefetch_pool()
+    pending = {pool.submit(mirror.sync, ws): ws for ws in PREFETCH_SHEETS}
+    ready, end = [], time.monotonic() + deadline
+    with perf.span("splash.prefetch") as sp:
+        while pending and time.monotonic() < end:
+            done, _ = wait(pending, timeout=end - time.monotonic(), return_when=FIRST_COMPLETED)
+            for fut in done:
+                ws = pending.pop(fut)
+                if fut.exception() is None: ready.append(ws)
+                if on_done: on_done(ws, len(PREFETCH_SHEETS) - len(pending))
+        sp.rows = len(ready)
+    if "DronesDB" in ready: get_registry()
+    return ready
+
+@st.cache_resource
+def get_outbox():
+    # Довговічна черга відправки в Telegram, спільна для всіх сесій процесу
+    return TelegramOutbox(TG_TOKEN)
+
+@st.cache_resource
+def get_uploads():
+    # Скріншоти зміни лежать на диску до відправки; у session_state — лише посилання
+    return UploadStore()
 
 def send_telegram_msg(all_fl):
     if not TG_TOKEN or not TG_CHAT_ID: return
-    first = all_fl[0]
-    flights_details = []
-    for i, f in enumerate(all_fl):
-        takeoff_key = "Зліт" if "Зліт" in f else "Взльот"
-        flight_text = f"{i+1}. {f[takeoff_key]}-{f['Посадка']} ({f['Тривалість (хв)']} хв)"
-        if f.get('Результат'): flight_text += f"\n   Результат: {f['Результат']}"
-        if f.get('Примітки'): flight_text += f"\n   Примітки: {f['Примітки']}"
-        flights_details.append(flight_text)
+    report = report_text(all_fl)
     
-    flights_txt = "\n".join(flights_details)
-    report = f"🚁 **Донесення: {first['Підрозділ']}**\n👤 **Пілот:** {first['Оператор']}\n📅 **Дата:** {first['Дата']}\n⏰ **Час завдання:** {first['Час завдання']}\n🛡 **БпЛА:** {first['Дрон']}\n🗺 **Маршрут:** {first['Маршрут']}\n━━━━━━━━━━━━━━━\n🚀 **Вильоти:**\n{flights_txt}"
-    
-    all_photos = []
-    for fl in all_fl:
-        if fl.get('files'):
-            for img in fl['files']: all_photos.append(img)
-    
-    if all_photos:
-        try:
-            files, media = {}, []
-            for idx, img in enumerate(all_photos):
-                files[f'photo{idx}'] = (img.name, img.getvalue(), img.type)
-                media_item = {'type': 'photo', 'media': f'attach://photo{idx}'}
-                if idx == 0: media_item['caption'], media_item['parse_mode'] = report, 'Markdown'
-                media.append(media_item)
-            requests.post(f"https://api.telegram.org/bot{TG_TOKEN}/sendMediaGroup", data={'chat_id': str(TG_CHAT_ID), 'media': json.dumps(media)}, files=files)
-        except:
-            for img in all_photos:
-                requests.post(f"https://api.telegram.org/bot{TG_TOKEN}/sendPhoto", files={'photo': (img.name, img.getvalue(), img.type)}, data={'chat_id': str(TG_CHAT_ID), 'caption': report, 'parse_mode': 'Markdown'})
-    else:
-        requests.post(f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage", data={'chat_id': str(TG_CHAT_ID), 'text': report, 'parse_mode': 'Markdown'})
+    # Лише постановка в чергу: відправляють фонові воркери outbox, пілот не чекає на Telegram.
+    # Самі HTTP-виклики міряє outbox (telegram.<метод>, з байтами)
+    outbox = get_outbox()
+    all_photos = [ref for fl in all_fl for ref in (fl.get('files') or [])]
+    with perf.span("send_telegram_msg") as sp:
+        if all_photos:
+            # Фото читаються з диска, зменшуються й стискаються по одному та діляться на альбоми по 10
+            stats = PipelineStats()
+            jobs = outbox.enqueue_photos(TG_CHAT_ID, iter_prepared(get_uploads().sources(all_photos), stats), caption=report)
+            sp.bytes = stats.sent
+            if jobs: return stats
+        outbox.enqueue(TG_CHAT_ID, "sendMessage", {'text': report, 'parse_mode': 'Markdown'})
 
 # --- 6. ІНІЦІАЛІЗАЦІЯ СТАНУ ---
 if 'temp_flights' not in st.session_state: st.session_state.temp_flights = []
@@ -186,6 +232,8 @@ if 'app_contact' not in st.session_state: st.session_state.app_contact = ""
 if 'app_phone' not in st.session_state: st.session_state.app_phone = ""
 if 'session_drone' not in st.session_state: st.session_state.session_drone = None
 if 'flight_form_counter' not in st.session_state: st.session_state.flight_form_counter = 0
+if 'session_t0' not in st.session_state: st.session_state.session_t0 = time.perf_counter()
+if 'upload_sid' not in st.session_state: st.session_state.upload_sid = os.urandom(8).hex()
 
 # --- 7. СТИЛІ ---
 st.markdown("""
@@ -225,11 +273,17 @@ if not st.session_state.splash_done:
             unsafe_allow_html=True,
         )
         my_bar = st.progress(0, text="Ініціалізація...")
-        for p in range(100): time.sleep(0.01); my_bar.progress(p + 1)
-        st.session_state.splash_done = True; st.rerun()
+        # Замість паузи — прогрівання даних; прогрес оновлюється лише на кожен готовий аркуш
+        prefetch(on_done=lambda ws, n: my_bar.progress(n / len(PREFETCH_SHEETS), text=f"Завантажено: {ws}"))
+    container.empty()
+    st.session_state.splash_done = True
 
 # --- 9. ІНТЕРФЕЙС ВХОДУ ---
 if not st.session_state.logged_in:
+    if 'tti' not in st.session_state:
+        # Час від першого прогону сесії до екрана входу (на боці сервера)
+        st.session_state.tti = time.perf_counter() - st.session_state.session_t0
+        perf.record("session.time_to_interactive", st.session_state.tti)
     st.markdown("<h2 style='text-align: center;'>🛡️ ВХІД У СИСТЕМУ</h2>", unsafe_allow_html=True)
     role = st.radio("Режим:", ["Пілот", "Адміністратор"], horizontal=True)
     with st.container(border=True):
@@ -240,9 +294,11 @@ if not st.session_state.logged_in:
             if st.button("УВІЙТИ") and n:
                 save_user_credentials(u, n)
                 st.session_state.logged_in, st.session_state.role, st.session_state.user = True, "Pilot", {"unit": u, "name": n}
-                df_d = load_data("Drafts")
-                if not df_d.empty and "Оператор" in df_d.columns:
-                    st.session_state.temp_flights.extend(df_d[df_d['Оператор'] == n].to_dict('records'))
+                df_d = load_data("Drafts", operator=n)
+                if not df_d.empty:
+                    drafts = draft_rows(merge_legacy_columns(df_d)).to_dict('records')
+                    # Чернетки вже архівованих вильотів (запис пройшов, а очищення Drafts — ні) не повертаються в список
+                    st.session_state.temp_flights.extend(f for f, known in zip(drafts, get_flight_keys().known(drafts)) if not known)
                 st.rerun()
         else:
             p = st.text_input("Пароль:", type="password")
@@ -254,13 +310,21 @@ if not st.session_state.logged_in:
 else:
     st.sidebar.markdown(f"👤 **{st.session_state.user['name'] if st.session_state.role=='Pilot' else 'Адмін'}**")
     if st.sidebar.button("Вийти"): 
-        st.session_state.logged_in, st.session_state.splash_done = False, False
+        st.session_state.logged_in = False
         st.rerun()
 
-    tab_f, tab_cus, tab_app, tab_hist, tab_stat, tab_info = st.tabs(["🚀 Польоти", "📡 ЦУС", "📋 Заявка", "📜 Архів", "📊 Аналітика", "ℹ️ Довідка"])
+    # on_change="rerun" — вкладки відстежують вибір, і важкі (ЦУС, Архів, Донесення, Аналітика)
+    # виконуються лише коли відкриті (tab.open)
+    tab_names = ["🚀 Польоти", "📡 ЦУС", "📋 Заявка", "📜 Архів", "🗂 Донесення", "📊 Аналітика", "ℹ️ Довідка"]
+    if st.session_state.role == "Admin": tab_names.append("⏱ Продуктивність")
+    tabs = st.tabs(tab_names, key="main_tabs", on_change="rerun")
+    tab_f, tab_cus, tab_app, tab_hist, tab_rep, tab_stat, tab_info = tabs[:7]
 
-    with tab_f:
+    # Фрагмент: введення в поля форми перевиконує лише форму, а не весь застосунок
+    @st.fragment
+    def flight_entry():
         st.header("Внесення польотів")
+        if st.session_state.get('last_send_note'): st.caption(st.session_state.pop('last_send_note'))
         available_drones = get_drones_for_unit(st.session_state.user['unit'])
         if not available_drones:
             st.warning(f"⚠️ Немає дронів для '{st.session_state.user['unit']}'.")
@@ -289,54 +353,86 @@ else:
             f_dist = col4.number_input("Відстань (м)", min_value=0, key=f"f_dist_{f_key}")
             cb1, cb2 = st.columns(2)
             f_akb, f_cyc = cb1.text_input("Номер АКБ", key=f"f_akb_{f_key}"), cb2.number_input("Цикли АКБ", min_value=0, key=f"f_cyc_{f_key}")
-            f_res = st.selectbox("Результат", ["Без ознак порушення", "Затримання", "Виявлення цілі"], key=f"f_res_{f_key}")
+            akb = get_batteries().get(st.session_state.user['unit'], f_akb) if f_akb.strip() else None
+            if akb:
+                cyc = "—" if pd.isna(akb['Цикли']) else int(akb['Цикли'])
+                last = datetime.strptime(akb['Останній виліт'], "%Y-%m-%d").strftime("%d.%m.%Y") if akb['Останній виліт'] else "—"
+                note = f"🔋 {akb['АКБ']}: {cyc} циклів, {akb['Вильоти']} вильотів, {akb['Наліт, год']} год, останній виліт {last}"
+                if not pd.isna(akb['Цикли']) and akb['Цикли'] >= AKB_WARN * AKB_MAX_CYCLES: st.warning(note + f" — ресурс {akb['Ресурс, %']:.0f}%")
+                else: st.caption(note)
+            elif f_akb.strip(): st.caption(f"🔋 {f_akb.strip()}: нова АКБ — вильотів ще немає")
+            f_res = st.selectbox("Результат", RESULTS, key=f"f_res_{f_key}")
             f_note = st.text_area("Примітки", key=f"f_note_{f_key}")
             f_imgs = st.file_uploader("📸 Скріншоти", accept_multiple_files=True, key=f"uploader_{st.session_state.uploader_key}")
             
             if st.button("✅ ДОДАТИ У СПИСОК"):
                 if p_off and p_land:
-                    st.session_state.temp_flights.append({
-                        "Дата": st.session_state.m_date_val.strftime("%d.%m.%Y"),
-                        "Час завдання": f"{st.session_state.m_start_val.strftime('%H:%M')} - {st.session_state.m_end_val.strftime('%H:%M')}",
-                        "Підрозділ": st.session_state.user['unit'], "Оператор": st.session_state.user['name'],
-                        "Дрон": st.session_state.session_drone, "Маршрут": st.session_state.m_route_val,
-                        "Зліт": p_off.strftime("%H:%M"), "Посадка": p_land.strftime("%H:%M"),
-                        "Тривалість (хв)": calculate_duration(p_off, p_land), "Дистанція (м)": f_dist,
-                        "Номер АКБ": f_akb, "Цикли АКБ": f_cyc, "Результат": f_res, "Примітки": f_note, "files": f_imgs
-                    })
+                    st.session_state.temp_flights.append(flight_record(
+                        st.session_state.m_date_val, st.session_state.m_start_val, st.session_state.m_end_val,
+                        st.session_state.user['unit'], st.session_state.user['name'], st.session_state.session_drone,
+                        st.session_state.m_route_val, p_off, p_land, f_dist, f_akb, f_cyc, f_res, f_note,
+                        get_uploads().put_all(st.session_state.upload_sid, f_imgs)))
                     st.session_state.flight_form_counter += 1; st.session_state.uploader_key += 1; st.rerun()
 
+        # Уся зміна одним кроком: розбір і перевірка всіх рядків разом, один перегляд, одне додавання
+        with st.expander("📋 ВНЕСТИ ЗМІНУ СПИСКОМ", expanded=False):
+            f_key = st.session_state.flight_form_counter
+            b_text = st.text_area("Вильоти, по одному в рядку", placeholder="09:00 - 09:30 - 1200 м\n930 - 1010 - 800 м АКБ 5\n2350 - 0020", key=f"bulk_text_{f_key}")
+            b_file = st.file_uploader("або CSV / журнал польотного контролера", type=["csv", "txt", "tsv"], key=f"bulk_file_{f_key}")
+            preview = parse_csv(b_file.getvalue()) if b_file else parse_text(b_text)
+            if not preview.empty:
+                bad = preview["Помилка"] != ""
+                st.dataframe(preview, hide_index=True, width='stretch')
+                if bad.any(): st.warning(f"⚠️ {int(bad.sum())} рядк(ів) з помилками — їх не буде додано.")
+                st.caption("Дата, зміна, БпЛА й маршрут — з полів вище; скріншоти до таких вильотів не додаються.")
+                if (~bad).any() and st.button(f"✅ ДОДАТИ {int((~bad).sum())} ВИЛЬОТ(ІВ) У СПИСОК"):
+                    st.session_state.temp_flights.extend(to_flights(
+                        preview, st.session_state.m_date_val, st.session_state.m_start_val, st.session_state.m_end_val,
+                        st.session_state.user['unit'], st.session_state.user['name'], st.session_state.session_drone, st.session_state.m_route_val))
+                    st.session_state.flight_form_counter += 1; st.rerun()
+
         if st.session_state.temp_flights:
             df_t = pd.DataFrame(st.session_state.temp_flights)
             st.dataframe(df_t[["Зліт", "Посадка", "Дистанція (м)", "Тривалість (хв)", "Номер АКБ"]].rename(columns={"Дистанція (м)": "Відстань"}), width='stretch')
+            # Перетини зі списком і з архівом сусідніх днів (зміна після півночі — з датою попереднього дня)
+            t_days = pd.to_datetime(df_t["Дата"], format="%d.%m.%Y", errors="coerce").dropna()
+            near = get_near_flights((t_days.min() - timedelta(days=1)).date(), (t_days.max() + timedelta(days=1)).date()) if not t_days.empty else None
+            for c in live_conflicts(st.session_state.temp_flights, near).to_dict('records'):
+                st.warning(f"⚠️ Перетин ({c['Перевірка']}: {c['Значення']}), {c['Дата']}: {c['Виліт 1']} — {c['Джерело 1']}, {c['Оператор 1']} / "
+                           f"{c['Виліт 2']} — {c['Джерело 2']}, {c['Оператор 2']}")
             cb1, cb2, cb3 = st.columns(3)
-            if cb1.button("🗑️ Видалити останній"): st.session_state.temp_flights.pop(); st.rerun()
+            if cb1.button("🗑️ Видалити останній"): get_uploads().release(st.session_state.temp_flights.pop().get('files')); st.rerun()
             
             if cb2.button("💾 Зберегти в Хмару"):
-                df_d = load_data("Drafts")
-                if not df_d.empty and "Оператор" in df_d.columns:
-                    df_d = df_d[df_d['Оператор'] != st.session_state.user['name']]
-                to_save = pd.concat([df_d, pd.DataFrame(st.session_state.temp_flights).drop(columns=['files'], errors='ignore')], ignore_index=True)
-                to_save = to_save.astype(str).replace(['None', 'nan', '<NA>'], '')
-                conn.update(worksheet="Drafts", data=to_save)
-                st.success("💾 Збережено!")
+                drafts = [{k: v for k, v in f.items() if k != 'files'} for f in st.session_state.temp_flights]
+                fut = get_writer().save_drafts(st.session_state.user['name'], drafts)
+                try: fut.result(timeout=WRITE_WAIT); st.success("💾 Збережено!")
+                except WriteTimeout: st.warning("⏳ Чернетку поставлено в чергу запису.")
+                except Exception as e: st.error(f"❌ Чернетку не збережено ({e}). Список лишається в цій сесії.")
             
             if cb3.button("🚀 ВІДПРАВИТИ ВСІ ДАНІ"):
                 all_fl = st.session_state.temp_flights
-                send_telegram_msg(all_fl)
-                final_to_db = []
-                for f in all_fl:
-                    row = f.copy(); row.pop('files', None); row["Медіа (статус)"] = "З фото" if f.get('files') else "Текст"
-                    final_to_db.append(row)
-                db_m = load_data("Sheet1")
-                to_save_final = pd.concat([db_m, pd.DataFrame(final_to_db)], ignore_index=True)
-                to_save_final = to_save_final.astype(str).replace(['None', 'nan', '<NA>'], '')
-                conn.update(worksheet="Sheet1", data=to_save_final)
-                
-                df_d = load_data("Drafts")
-                if not df_d.empty and "Оператор" in df_d.columns:
-                    df_d = df_d[df_d['Оператор'] != st.session_state.user['name']]
-                    conn.update(worksheet="Drafts", data=df_d.astype(str))
+                refs = [ref for f in all_fl for ref in (f.get('files') or [])]
+                # Уже архівовані чи поставлені в чергу (подвійне натискання, чернетки після входу) — ні в Sheet1, ні в Telegram
+                fresh = get_flight_keys().claim(all_fl)
+                if len(fresh) < len(all_fl): st.session_state.last_send_note = f"ℹ️ {len(all_fl) - len(fresh)} виліт(ів) уже було надіслано — повторно не відправлялись."
+                if fresh:
+                    # Лише append нових рядків; чернетки оператора знімаються тим самим записувачем
+                    fut = get_writer().submit_flights(archive_rows(fresh), operator=st.session_state.user['name'])
+                    keys = get_flight_keys()
+                    fut.add_done_callback(lambda f, fl=fresh: f.exception() and keys.release(fl))  # запис не вдався — можна надіслати знову
+                    try: fut.result(timeout=WRITE_WAIT)
+                    except WriteTimeout: st.warning("⏳ Таблиця відповідає повільно — вильоти в черзі й будуть дописані автоматично.")
+                    except Exception as e:
+                        # Записувач вичерпав спроби й зняв пакет з черги: список і чернетки лишаються, Telegram не шлемо
+                        st.error(f"❌ Вильоти не записано в таблицю ({e}). Список збережено — відправте ще раз пізніше.")
+                        st.stop()
+                    lost = get_uploads().missing(refs)
+                    if lost: st.warning(f"⚠️ {len(lost)} скріншот(ів) видалено зі сховища за давністю — надішліть їх окремо.")
+                    stats = send_telegram_msg(fresh)
+                    if stats and stats.original: st.session_state.last_send_note = " ".join(filter(None, [st.session_state.get('last_send_note'), f"📉 Скріншоти стиснуто — {stats.summary()}"]))
+                else: get_writer().save_drafts(st.session_state.user['name'], [])  # чернетки вже відправлених вильотів
+                get_uploads().release(refs)  # outbox уже тримає власні копії
                 
                 st.session_state.session_drone, st.session_state.temp_flights = None, []
                 # Показати випадкове підбадьорююче повідомлення після успішної відправки
@@ -344,18 +440,31 @@ else:
                 st.info(random.choice(MOTIVATION_COOKIES))
                 st.rerun()
 
-    with tab_cus:
-        st.header("📡 Дані для ЦУС")
-        if st.session_state.temp_flights:
-            s_start = st.session_state.m_start_val
-            b_m, a_m, cr = [], [], False
-            for f in st.session_state.temp_flights:
-                fs, fe = datetime.strptime(f["Зліт"], "%H:%M").time(), datetime.strptime(f['Посадка'], "%H:%M").time()
-                if cr or fe < fs or fs < s_start: cr = True; a_m.append(f)
-                else: b_m.append(f)
-            def fc(fls): return "\n".join([f"{f['Зліт']} - {f['Посадка']} - {f['Дистанція (м)']} м ({f['Тривалість (хв)']} хв)" for f in fls])
-            st.subheader("🌙 До 00:00"); st.code(fc(b_m), language="text")
-            st.subheader("☀️ Після 00:00"); st.code(fc(a_m), language="text")
+    with tab_f:
+        flight_entry()
+
+    if tab_cus.open:
+        with tab_cus:
+            st.header("📡 Дані для ЦУС")
+            if st.session_state.temp_flights:
+                s_start = st.session_state.m_start_val
+                b_m, a_m = split_midnight(st.session_state.temp_flights, s_start)
+                st.subheader("🌙 До 00:00"); st.code(cus_text(b_m), language="text")
+                st.subheader("☀️ Після 00:00"); st.code(cus_text(a_m), language="text")
+            if st.session_state.role == "Admin":
+                # Увесь архів за період для всіх підрозділів — без входу під кожним пілотом
+                cc1, cc2 = st.columns(2)
+                c_dates = cc1.date_input("Період (за датою початку зміни):", value=(datetime.now().date() - timedelta(days=1), datetime.now().date()), key="cus_dates")
+                c_units = cc2.multiselect("Підрозділи:", UNITS, placeholder="Усі підрозділи", key="cus_units")
+                c0, c1 = (c_dates[0], c_dates[-1]) if isinstance(c_dates, (list, tuple)) and c_dates else (c_dates, c_dates)
+                blocks = cus_blocks(load_data("Sheet1", date_from=c0, date_to=c1, columns=CUS_COLUMNS))
+                if c_units and not blocks.empty: blocks = blocks[blocks["Підрозділ"].isin(c_units)]
+                if blocks.empty: st.info("За період вильотів немає.")
+                else:
+                    st.dataframe(blocks.drop(columns=["Текст"]), hide_index=True, width='stretch')
+                    c_text = cus_report(blocks, c_units or UNITS)
+                    st.download_button("📥 ЦУС (TXT)", data=c_text.encode("utf-8"), file_name=f"ЦУС_{c0}_{c1}.txt", mime="text/plain")
+                    st.code(c_text, language="text")
 
     with tab_app:
         st.header("📝 Формування заявки")
@@ -374,42 +483,133 @@ else:
             f_txt = f"ЗАЯВКА НА ПОЛІТ\n1. Заявник: в/ч 2196 ({app_unit})\n2. Тип БпЛА: {d_str}\n3. Дата здійснення польоту: {dt_r}\n4. Час роботи: з {a_t1.strftime('%H:%M')} по {a_t2.strftime('%H:%M')}\n5. Населений пункт (маршрут): {app_route}\n6. Висота роботи (м): до 500 м\n7. Радіус роботи (км): до 5 км\n8. Мета польоту: патрулювання\n9. Контактна особа: {app_cont}, тел: {app_phone}"
             st.code(f_txt, language="text")
 
-    with tab_hist:
-        st.header("📜 Мій журнал")
-        df_h = load_data("Sheet1")
-        if not df_h.empty and "Оператор" in df_h.columns:
-            p_df = df_h[df_h['Оператор'] == st.session_state.user['name']] if st.session_state.role == "Pilot" else df_h
-            if not p_df.empty:
-                # Експорт в Excel через xlsxwriter
-                excel_data = convert_df_to_excel(p_df)
+    if tab_hist.open:
+        with tab_hist:
+            st.header("📜 Мій журнал")
+            # Файл будується лише після натискання кнопки (data — функція) і кешується за версією архіву
+            with st.expander("📥 ЗАВАНТАЖИТИ АРХІВ", expanded=False):
+                e1, e2, e3 = st.columns(3)
+                e_fmt = e1.selectbox("Формат:", list(FORMATS), format_func=lambda f: FORMATS[f][0], key="exp_fmt")
+                e_dates = e2.date_input("Період (необов'язково):", value=(), key="exp_dates")
+                e_unit = e3.selectbox("Підрозділ:", ["Усі"] + UNITS, key="exp_unit") if st.session_state.role != "Pilot" else "Усі"
+                e_filters = {
+                    "operator": st.session_state.user['name'] if st.session_state.role == "Pilot" else None,
+                    "unit": None if e_unit == "Усі" else e_unit,
+                    "date_from": e_dates[0] if len(e_dates) > 0 else None,
+                    "date_to": e_dates[1] if len(e_dates) > 1 else (e_dates[0] if len(e_dates) == 1 else None),
+                }
                 st.download_button(
-                    label="📥 ЗАВАНТАЖИТИ АРХІВ (Excel)",
-                    data=excel_data,
-                    file_name=f"uav_log_{st.session_state.user['name']}_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                    mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                    label=f"📥 ЗАВАНТАЖИТИ ({FORMATS[e_fmt][0]})",
+                    data=lambda: export_bytes(get_mirror(), e_fmt, **e_filters),
+                    file_name=f"uav_log_{st.session_state.user['name']}_{datetime.now().strftime('%Y%m%d')}.{e_fmt}",
+                    mime=FORMATS[e_fmt][1],
                 )
-                st.dataframe(p_df.sort_values(by="Дата", ascending=False), width='stretch')
-
-    with tab_stat:
-        st.header("📊 Аналітика")
-        df_s = load_data("Sheet1")
-        if not df_s.empty and "Оператор" in df_s.columns:
-            if st.session_state.role == "Pilot": 
-                df_s = df_s[df_s['Оператор'] == st.session_state.user['name']]
-            df_s['Дата_dt'] = pd.to_datetime(df_s['Дата'], format='%d.%m.%Y', errors='coerce')
-            df_s = df_s.dropna(subset=['Дата_dt'])
-            if not df_s.empty:
-                df_s['Рік'] = df_s['Дата_dt'].dt.year
-                df_s['Місяць_№'] = df_s['Дата_dt'].dt.month
-                rs = df_s.groupby(['Рік', 'Місяць_№']).agg(
-                    Польоти=('Дата', 'count'), 
-                    Затримання=('Результат', lambda x: (x == "Затримання").sum()),
-                    Хв=('Тривалість (хв)', 'sum')
-                ).reset_index()
-                rs['Період'] = rs.apply(lambda x: f"{UKR_MONTHS.get(int(x['Місяць_№']), '???')} {int(x['Рік'])}", axis=1)
-                rs['Наліт'] = rs['Хв'].apply(format_to_time_str)
-                rs = rs.sort_values(by=['Рік', 'Місяць_№'], ascending=False)
-                st.table(rs[['Період', 'Польоти', 'Затримання', 'Наліт']])
+            # Фільтри, сортування й підсумки виконує SQLite; у браузер іде лише видима сторінка
+            get_mirror().refresh("Sheet1")
+            a_ver, is_pilot = get_mirror().version("Sheet1"), st.session_state.role == "Pilot"
+            fc1, fc2, fc3, fc4, fc5 = st.columns(5)
+            a_unit = None if is_pilot else fc1.selectbox("Підрозділ:", ["Усі"] + UNITS, key="arch_unit")
+            a_unit = None if a_unit == "Усі" else a_unit
+            a_op = st.session_state.user['name'] if is_pilot else fc2.selectbox("Оператор:", ["Усі"] + get_rollups().operators(a_unit), key="arch_op")
+            a_dates = fc3.date_input("Період:", value=(), key="arch_dates")
+            a_res = fc4.selectbox("Результат:", ["Усі"] + RESULTS, key="arch_res")
+            a_drones = get_drones_for_unit(st.session_state.user['unit'] if is_pilot else a_unit) if (is_pilot or a_unit) else get_registry().frame["display"].tolist()
+            a_drone = fc5.selectbox("БпЛА:", ["Усі"] + a_drones, key="arch_drone")
+            a_filters = {
+                "operator": None if a_op == "Усі" else a_op, "unit": a_unit,
+                "date_from": a_dates[0] if len(a_dates) > 0 else None, "date_to": a_dates[-1] if len(a_dates) > 0 else None,
+                "result": None if a_res == "Усі" else a_res, "drone": None if a_drone == "Усі" else a_drone,
+            }
+            a_tot = _archive_totals(a_ver, **a_filters)
+            st.caption(f"Вильотів: {a_tot['Вильотів']} · Наліт: {a_tot['Хв'] // 60}:{a_tot['Хв'] % 60:02d} · Відстань: {a_tot['Метрів'] / 1000:.1f} км · "
+                       f"Затримань: {a_tot['Затримань']} · Виявлень: {a_tot['Виявлень']} · Операторів: {a_tot['Операторів']}")
+            if not is_pilot and st.toggle("🧭 Перетини вильотів (оператор / БпЛА / АКБ) за період", key="arch_overlaps"):
+                a_conf = _archive_conflicts(a_ver, a_filters["date_from"], a_filters["date_to"])
+                st.caption(f"Перетинів: {len(a_conf)}" + (" — " + ", ".join(f"{k}: {v}" for k, v in a_conf["Перевірка"].value_counts().items()) if len(a_conf) else ""))
+                if len(a_conf): st.dataframe(a_conf, hide_index=True, width='stretch')
+            if not a_tot['Вильотів']: st.info("Записів не знайдено.")
+            else:
+                sc1, sc2, sc3, sc4 = st.columns([2, 1, 1, 1])
+                a_sort = sc1.selectbox("Сортувати за:", ARCHIVE_SORTS, key="arch_sort")
+                a_desc = sc2.toggle("За спаданням", value=True, key="arch_desc")
+                a_size = sc3.selectbox("Рядків:", [25, 50, 100, 200], index=1, key="arch_size")
+                a_pages = max(1, -(-a_tot['Вильотів'] // a_size))
+                a_page = sc4.number_input(f"Сторінка (з {a_pages}):", min_value=1, max_value=a_pages, value=1, key=f"arch_page_{a_pages}")
+                a_keys, a_tables = _archive_keys(a_ver, a_sort, a_desc, **a_filters)
+                with perf.span("archive.page") as sp:
+                    a_df = normalize_archive(get_mirror().fetch("Sheet1", a_keys[(a_page - 1) * a_size:a_page * a_size], a_tables)); sp.rows = len(a_df)
+                st.dataframe(a_df, width='stretch', hide_index=True, column_config={"Дата": st.column_config.DateColumn(format="DD.MM.YYYY")})
+
+    if tab_rep.open:
+        with tab_rep:
+            st.header("🗂 Донесення про політ")
+            if st.session_state.role == "Pilot":
+                r_date = st.date_input("Дата вильотів:", datetime.now(), key="rep_date")
+                r_df = normalize_archive(load_data("Sheet1", unit=st.session_state.user['unit'], date_from=r_date, date_to=r_date))
+                if r_df.empty: st.warning("Немає записів за цю дату.")
+                else:
+                    st.success(f"Знайдено польотів: {len(r_df)}")
+                    r_ctx = build_context(st.session_state.user['unit'], r_date, r_df)
+                    st.download_button("📥 ЗАВАНТАЖИТИ ДОНЕСЕННЯ (DOCX)", data=lambda: render_context(r_ctx),
+                                       file_name=f"Донесення_{r_date.strftime('%Y%m%d')}.docx",
+                                       mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+            else:
+                rc1, rc2 = st.columns(2)
+                r_dates = rc1.date_input("Період:", value=(datetime.now() - timedelta(days=1), datetime.now()), key="rep_dates")
+                r_units = rc2.multiselect("Підрозділи (порожньо — усі):", UNITS, key="rep_units")
+                if st.button("⚙️ СФОРМУВАТИ ПАКЕТ ДОНЕСЕНЬ") and len(r_dates) == 2:
+                    # Межа до читання архіву: пакет за роки — сотні МБ на диску
+                    if (r_dates[1] - r_dates[0]).days >= MAX_BATCH_DAYS: st.error(f"⚠️ Пакет — не довше {MAX_BATCH_DAYS} днів: звузьте період.")
+                    else:
+                        os.makedirs(REPORTS_DIR, exist_ok=True)
+                        r_path = os.path.join(REPORTS_DIR, f"donesennia_{r_dates[0]:%Y%m%d}_{r_dates[1]:%Y%m%d}.zip")
+                        try:
+                            with st.spinner("Формування донесень..."):
+                                _, r_stats = generate_batch(normalize_archive(load_data("Sheet1", date_from=r_dates[0], date_to=r_dates[1])), r_units or None, r_dates[0], r_dates[1], path=r_path)
+                        except ValueError as e: st.error(f"⚠️ {e}")
+                        else: st.session_state.rep_batch = (r_path, r_stats)
+                if st.session_state.get('rep_batch'):
+                    r_path, r_stats = st.session_state.rep_batch
+                    st.caption(f"⏱ {r_stats['reports']} донесень за {r_stats['seconds']:.2f} с ({r_stats['ms_per_report']:.0f} мс/шт., процесів: {r_stats['workers']})")
+                    if r_stats['reports'] and os.path.exists(r_path):
+                        st.download_button("📥 ЗАВАНТАЖИТИ ПАКЕТ (ZIP)", data=lambda: read_bytes(r_path),
+                                           file_name=os.path.basename(r_path), mime="application/zip")
+
+    if tab_stat.open:
+        with tab_stat:
+            st.header("📊 Аналітика")
+            rollups = get_rollups()
+            if st.session_state.role == "Pilot": s_op, s_unit = st.session_state.user['name'], None
+            else:
+                sc1, sc2 = st.columns(2)
+                s_unit = sc1.selectbox("Підрозділ:", ["Усі"] + UNITS, key="stat_unit")
+                s_unit = None if s_unit == "Усі" else s_unit
+                s_op = sc2.selectbox("Оператор:", ["Усі"] + rollups.operators(s_unit), key="stat_op")
+                s_op = None if s_op == "Усі" else s_op
+            rs = rollups.monthly(operator=s_op, unit=s_unit)
+            if not rs.empty:
+                rs['Період'] = rs['Місяць'].map(UKR_MONTHS).fillna('???') + " " + rs['Рік'].astype(str)
+                rs['Наліт'] = (rs['Хв'] // 60).astype(str).str.zfill(2) + ":" + (rs['Хв'] % 60).astype(str).str.zfill(2)
+                rs = rs.sort_values(by=['Рік', 'Місяць'], ascending=False)
+                st.table(rs[['Період', 'Польоти', 'Затримання', 'Виявлення', 'Наліт']])
+            st.subheader("📈 Наліт за період")
+            gc1, gc2, gc3 = st.columns(3)
+            g_freq = gc1.selectbox("Крок:", list(BUCKETS), index=1, key="dash_freq")
+            g_by = gc2.selectbox("Розбивка:", ["Дрон", "Результат"] if st.session_state.role == "Pilot" else ["Підрозділ", "Оператор", "Дрон", "Результат"], key="dash_by")
+            g_dates = gc3.date_input("Період (необов'язково):", value=(), key="dash_dates")
+            g_range = (g_dates[0], g_dates[-1]) if len(g_dates) else (None, None)
+            s_ver = get_mirror().version("Sheet1")
+            st.plotly_chart(_dashboard(s_ver, "hours", g_freq, g_by, s_op, s_unit, *g_range), width='stretch')
+            if st.session_state.role == "Admin" and s_unit is None and s_op is None:
+                st.plotly_chart(_dashboard(s_ver, "units", g_freq, "Підрозділ", None, None, *g_range), width='stretch')
+            if st.session_state.role == "Admin":
+                st.subheader("🔋 Парк АКБ")
+                fleet = get_batteries().fleet(s_unit)
+                if fleet.empty: st.info("Вильотів із номером АКБ ще немає.")
+                else:
+                    worn = int((fleet["Цикли"] >= AKB_WARN * AKB_MAX_CYCLES).sum())
+                    st.caption(f"{len(fleet)} АКБ; близько до кінця ресурсу ({AKB_WARN:.0%} з {AKB_MAX_CYCLES} циклів): {worn}")
+                    st.dataframe(fleet, hide_index=True, width='stretch')
 
     with tab_info:
         st.header("ℹ️ Довідка")
@@ -430,12 +630,51 @@ else:
 **2. 🚀 Вкладка «Польоти»**
 * **Крок А (Завдання):** Встановіть Дату, Час зміни та оберіть БпЛА на зміну.
 * **Крок Б (Виліт):** Вкажіть час Зльоту/Посадки, Відстань, Номер АКБ та Цикли.
-* **Крок В (Управління):** Тисніть «➕ Додати у список». В кінці зміни — «🚀 ВІДПРАВИТИ ВСІ ДАНІ».
+* Після введення номера АКБ під полем з'явиться її стан: цикли, кількість вильотів і наліт.
+* Цілу зміну можна внести одразу: «📋 Внести зміну списком» — вставте рядки як у ЦУС («09:00 - 09:30 - 1200 м», час можна писати «930» чи «9») або завантажте CSV; перевірте таблицю й додайте всі вильоти одним натисканням.
+* **Крок В (Управління):** Тисніть «➕ Додати у список». Під списком з'являться попередження, якщо вильоти перетинаються в часі (той самий оператор, БпЛА чи АКБ — у списку або в архіві). В кінці зміни — «🚀 ВІДПРАВИТИ ВСІ ДАНІ» (вже надіслані вильоти повторно не записуються і не йдуть у Telegram, тож повторне натискання безпечне).
 
 **3. 📡 Вкладка «ЦУС»**
 * Система сама розбиває польоти на вікна «До 00:00» та «Після 00:00».
+* Адміністратор бачить те саме по архіву — за будь-який період і для всіх підрозділів одразу.
 
 **4. 📋 Вкладка «Заявка»**
 * УВАГА: Розділ НЕ відправляє заявки автоматично!
 * Оберіть параметри польоту та натисніть «Сформувати текст заявки».""")
-        st.markdown("<div style='text-align: center; color: black;'>Слава Україні! 🇺🇦</div>", unsafe_allow_html=True)
\ No newline at end of file
+        st.markdown("<div style='text-align: center; color: black;'>Слава Україні! 🇺🇦</div>", unsafe_allow_html=True)
+
+    if st.session_state.role == "Admin" and tabs[7].open:
+        with tabs[7]:
+            st.header("⏱ Продуктивність")
+            st.caption(f"Кванти — за останні {perf.RING_SIZE} вимірів кожної операції цього процесу; байти й рядки — за весь час.")
+            ops = perf.snapshot()
+            if ops: st.dataframe(pd.DataFrame(ops).drop(columns=["_sum", "_quantiles"]), hide_index=True, width='stretch')
+            else: st.info("Ще немає вимірів.")
+            st.subheader("🗃 Кеші")
+            caches = perf.cache_stats()
+            if caches: st.dataframe(pd.DataFrame(caches), hide_index=True, width='stretch')
+            if TG_TOKEN: st.caption(f"📨 Черга Telegram: {get_outbox().stats()}")
+            up = get_uploads().stats()
+            st.caption(f"📸 Сховище скріншотів: {up['files']} файлів, {up['bytes'] / 1048576:.1f} МБ, сесій: {up['sessions']}")
+            with st.expander("🗂 Партиції архіву"):
+                st.dataframe(get_mirror().manifest("Sheet1"), hide_index=True, width='stretch')
+            with st.expander("🧹 Дублікати архіву"):
+                ks = get_flight_keys().stats()
+                st.caption(f"Ключів вильотів: {ks['keys']}, зайвих копій: {ks['duplicates']}, у черзі запису: {ks['pending']}")
+                if st.button("🔍 ЗНАЙТИ ДУБЛІКАТИ"):
+                    get_mirror().sync("Sheet1", force=True)  # номери рядків мають відповідати аркушу зараз
+                    st.session_state.arch_dups = get_flight_keys().duplicates()
+                dups = st.session_state.get('arch_dups')
+                if dups is not None:
+                    if dups.empty: st.success("Дублікатів немає.")
+                    else:
+                        st.dataframe(dups, hide_index=True, width='stretch')
+                        if st.button(f"🗑 ВИДАЛИТИ {len(dups)} ДУБЛІКАТ(ІВ) З АРХІВУ", type="primary"):
+                            try: n = get_flight_keys().remove_duplicates(dups)
+                            except ValueError as e: st.error(f"⚠️ {e}")
+                            else: st.success(f"Видалено рядків: {n}")
+                            del st.session_state.arch_dups
+            pc1, pc2, pc3 = st.columns(3)
+            if pc1.button("📤 ЗАПИСАТИ МЕТРИКИ У ФАЙЛ"): st.success(f"Prometheus: {perf.write_prometheus()}")
+            pc2.download_button("📥 METRICS.PROM", data=perf.prometheus_text, file_name="metrics.prom", mime="text/plain")
+            if pc3.button("♻️ СКИНУТИ ЛІЧИЛЬНИКИ"): perf.reset(); st.rerun()
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""Вимірювання гарячих шляхів: тривалості операцій і влучання в кеші.
+
+Кожна операція (читання Google, запис, відправка в Telegram, експорт,
+аналітика) пише тривалість — і, де є, байти та рядки — у кільцевий буфер
+на RING_SIZE останніх вимірів; звідти рахуються p50/p95/p99. Лічильники
+кешів рахують звернення та промахи (влучання = звернення − промахи). Дані
+спільні для процесу: їх показує адмінська сторінка «⏱ Продуктивність» і
+вивантажує write_prometheus() у текстовому форматі Prometheus (для
+textfile-колектора node_exporter).
+
+    with span("sheets.append", rows=len(rows)): ...
+    @cache_calls("drone_registry") / @st.cache_resource / @cache_misses("drone_registry")
+"""
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+RING_SIZE = int(os.environ.get("UAV_PERF_RING", 2048))
+PROM_PATH = os.environ.get("UAV_PROM_PATH", os.path.join(".cache", "metrics.prom"))
+PROM_INTERVAL = float(os.environ.get("UAV_PROM_INTERVAL", 0))  # с; 0 — лише вручну зі сторінки
+QUANTILES = (0.5, 0.95, 0.99)
+
+_lock = threading.Lock()
+_ops = {}      # op -> {"ring": deque[(секунди, байти, рядки, ok)], "count", "errors", "sum", "bytes", "rows"}
+_caches = {}   # cache -> {"calls", "misses"}
+_started = time.time()
+
+
+class Span:
+    def __init__(self, name, bytes=0, rows=0):
+        self.name, self.bytes, self.rows, self.ok = name, bytes, rows, True
+
+
+def record(name, seconds, bytes=0, rows=0, ok=True):
+    with _lock:
+        op = _ops.get(name)
+        if op is None: op = _ops[name] = {"ring": deque(maxlen=RING_SIZE), "count": 0, "errors": 0, "sum": 0.0, "bytes": 0, "rows": 0}
+        op["ring"].append((seconds, bytes, rows, ok))
+        op["count"] += 1; op["sum"] += seconds; op["bytes"] += bytes; op["rows"] += rows
+        if not ok: op["errors"] += 1
+
+
+@contextmanager
+def span(name, bytes=0, rows=0):
+    """Міряє блок; s.bytes / s.rows можна дописати всередині, виняток рахується як помилка."""
+    s, t0 = Span(name, bytes, rows), time.perf_counter()
+    try: yield s
+    except BaseException:
+        s.ok = False
+        raise
+    finally: record(s.name, time.perf_counter() - t0, s.bytes, s.rows, s.ok)
+
+
+def timed(name):
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name): return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def cache_event(cache, hit):
+    with _lock:
+        c = _caches.setdefault(cache, {"calls": 0, "misses": 0})
+        c["calls"] += 1
+        if not hit: c["misses"] += 1
+
+
+def cache_calls(cache):
+    """Зовнішній декоратор над st.cache_*: рахує звернення."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _lock: _caches.setdefault(cache, {"calls": 0, "misses": 0})["calls"] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def cache_misses(cache):
+    """Внутрішній декоратор під st.cache_*: тіло виконується лише при промаху."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _lock: _caches.setdefault(cache, {"calls": 0, "misses": 0})["misses"] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def _quantile(sorted_vals, q):
+    if not sorted_vals: return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, max(0, math.ceil(q * len(sorted_vals)) - 1))]
+
+
+def snapshot():
+    """Список dict по операціях: кількість, помилки, p50/p95/p99/max (мс) за буфером, байти й рядки за весь час."""
+    with _lock: items = [(name, dict(op, ring=list(op["ring"]))) for name, op in _ops.items()]
+    out = []
+    for name, op in sorted(items):
+        secs = sorted(r[0] for r in op["ring"])
+        row = {"Операція": name, "Викликів": op["count"], "Помилок": op["errors"]}
+        for q in QUANTILES: row[f"p{int(q * 100)}, мс"] = round(1000 * _quantile(secs, q), 1)
+        row["max, мс"] = round(1000 * secs[-1], 1) if secs else 0.0
+        row["Байти"], row["Рядки"], row["_sum"] = op["bytes"], op["rows"], op["sum"]
+        row["_quantiles"] = {q: _quantile(secs, q) for q in QUANTILES}
+        out.append(row)
+    return out
+
+
+def cache_stats():
+    with _lock: items = sorted((k, dict(v)) for k, v in _caches.items())
+    return [{"Кеш": k, "Звернень": v["calls"], "Влучань": max(0, v["calls"] - v["misses"]), "Промахів": v["misses"],
+             "Влучання, %": round(100 * (v["calls"] - v["misses"]) / v["calls"], 1) if v["calls"] else 0.0} for k, v in items]
+
+
+def reset():
+    with _lock: _ops.clear(); _caches.clear()
+
+
+def _label(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    lines = [
+        "# HELP uav_op_seconds Тривалість операцій (кванти за останні виміри).", "# TYPE uav_op_seconds summary",
+    ]
+    snap = snapshot()
+    for row in snap:
+        op = _label(row["Операція"])
+        for q, v in row["_quantiles"].items(): lines.append(f'uav_op_seconds{{op="{op}",quantile="{q}"}} {v:.6f}')
+        lines.append(f'uav_op_seconds_sum{{op="{op}"}} {row["_sum"]:.6f}')
+        lines.append(f'uav_op_seconds_count{{op="{op}"}} {row["Викликів"]}')
+    lines += ["# HELP uav_op_errors_total Операції, що завершились винятком або помилкою.", "# TYPE uav_op_errors_total counter"]
+    lines += [f'uav_op_errors_total{{op="{_label(r["Операція"])}"}} {r["Помилок"]}' for r in snap]
+    lines += ["# HELP uav_op_bytes_total Передані байти (відправка в Telegram, файли експорту).", "# TYPE uav_op_bytes_total counter"]
+    lines += [f'uav_op_bytes_total{{op="{_label(r["Операція"])}"}} {r["Байти"]}' for r in snap if r["Байти"]]
+    lines += ["# HELP uav_op_rows_total Оброблені рядки аркушів.", "# TYPE uav_op_rows_total counter"]
+    lines += [f'uav_op_rows_total{{op="{_label(r["Операція"])}"}} {r["Рядки"]}' for r in snap if r["Рядки"]]
+    lines += ["# HELP uav_cache_requests_total Звернення до кешів за результатом.", "# TYPE uav_cache_requests_total counter"]
+    for c in cache_stats():
+        lines.append(f'uav_cache_requests_total{{cache="{_label(c["Кеш"])}",result="hit"}} {c["Влучань"]}')
+        lines.append(f'uav_cache_requests_total{{cache="{_label(c["Кеш"])}",result="miss"}} {c["Промахів"]}')
+    lines += ["# TYPE uav_process_start_time_seconds gauge", f"uav_process_start_time_seconds {_started:.0f}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path=PROM_PATH):
+    """Атомарно записує метрики у файл (тимчасовий файл + rename, як чекає textfile-колектор)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh: fh.write(prometheus_text())
+    os.replace(tmp, path)
+    return path
+
+
+def start_exporter(path=PROM_PATH, interval=PROM_INTERVAL):
+    """Фоновий потік, що оновлює файл метрик кожні interval с (нічого не робить при interval <= 0)."""
+    if interval <= 0: return None
+    def loop():
+        while True:
+            try: write_prometheus(path)
+            except OSError: pass
+            time.sleep(interval)
+    t = threading.Thread(target=loop, name="perf-exporter", daemon=True)
+    t.start()
+    return t
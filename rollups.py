@@ -0,0 +1,126 @@
+"""Помісячні та денні зведення для вкладки «Аналітика».
+
+Лічильники на (оператор, підрозділ, рік, місяць): вильоти, затримання, виявлення
+цілей, хвилини нальоту. Денні — на (день, підрозділ, оператор, БпЛА, результат):
+вильоти й хвилини; з них графіки збирають кошики день/тиждень/місяць. Таблиці
+живуть у тому ж SQLite, що й дзеркало архіву, і оновлюються в одній транзакції
+з ним: нові рядки Sheet1 додаються до лічильників (UPSERT), повне
+перезавантаження перераховує зведення векторно. Аналітика читає лише зведення —
+кількість рядків залежить від числа операторів і днів, а не від кількості вильотів.
+"""
+import pandas as pd
+
+from perf import span
+
+TABLE = "rollup_monthly"
+KEYS = ["Оператор", "Підрозділ", "Рік", "Місяць"]
+COUNTERS = ["Польоти", "Затримання", "Виявлення", "Хв"]
+DAILY_TABLE = "rollup_daily"
+DAILY_KEYS = ["День", "Підрозділ", "Оператор", "Дрон", "Результат"]
+DAILY_COUNTERS = ["Польоти", "Хв"]
+SOURCE_COLUMNS = ["Дата", "Підрозділ", "Оператор", "Дрон", "Результат", "Тривалість (хв)"]
+# Початок кошика з дня 'YYYY-MM-DD' (тиждень — з понеділка)
+BUCKETS = {"День": '"День"', "Тиждень": """date("День", '-6 days', 'weekday 1')""", "Місяць": """substr("День", 1, 7) || '-01'"""}
+
+
+def aggregate(df):
+    """Векторне зведення сирих рядків архіву (текстом або типізованих) до KEYS + COUNTERS."""
+    if df is None or df.empty or "Дата" not in df.columns: return pd.DataFrame(columns=KEYS + COUNTERS)
+    dates = df["Дата"] if pd.api.types.is_datetime64_any_dtype(df["Дата"]) else pd.to_datetime(df["Дата"], format="%d.%m.%Y", errors="coerce")
+    res = df["Результат"].astype(str) if "Результат" in df.columns else pd.Series("", index=df.index)
+    mins = pd.to_numeric(df["Тривалість (хв)"], errors="coerce").fillna(0) if "Тривалість (хв)" in df.columns else 0
+    flat = pd.DataFrame({
+        "Оператор": df["Оператор"].astype(str) if "Оператор" in df.columns else "",
+        "Підрозділ": df["Підрозділ"].astype(str) if "Підрозділ" in df.columns else "",
+        "Рік": dates.dt.year, "Місяць": dates.dt.month,
+        "Польоти": 1, "Затримання": (res == "Затримання").astype(int),
+        "Виявлення": (res == "Виявлення цілі").astype(int), "Хв": mins,
+    }).dropna(subset=["Рік"])
+    if flat.empty: return pd.DataFrame(columns=KEYS + COUNTERS)
+    flat[["Рік", "Місяць"]] = flat[["Рік", "Місяць"]].astype(int)
+    out = flat.groupby(KEYS, sort=False, as_index=False)[COUNTERS].sum()
+    out["Хв"] = out["Хв"].round().astype(int)
+    return out
+
+
+def aggregate_daily(df):
+    """Векторне зведення сирих рядків архіву до DAILY_KEYS + DAILY_COUNTERS (рядки без дати відкидаються)."""
+    if df is None or df.empty or "Дата" not in df.columns: return pd.DataFrame(columns=DAILY_KEYS + DAILY_COUNTERS)
+    dates = df["Дата"] if pd.api.types.is_datetime64_any_dtype(df["Дата"]) else pd.to_datetime(df["Дата"], format="%d.%m.%Y", errors="coerce")
+    flat = pd.DataFrame({"День": dates.dt.strftime("%Y-%m-%d")})
+    for c in DAILY_KEYS[1:]: flat[c] = df[c].fillna("").astype(str) if c in df.columns else ""
+    flat["Польоти"] = 1
+    flat["Хв"] = pd.to_numeric(df["Тривалість (хв)"], errors="coerce").fillna(0) if "Тривалість (хв)" in df.columns else 0
+    flat = flat.dropna(subset=["День"])
+    if flat.empty: return pd.DataFrame(columns=DAILY_KEYS + DAILY_COUNTERS)
+    out = flat.groupby(DAILY_KEYS, sort=False, as_index=False)[DAILY_COUNTERS].sum()
+    out["Хв"] = out["Хв"].round().astype(int)
+    return out
+
+
+def _names(cols):
+    return ", ".join(f'"{c}"' for c in cols)
+
+
+class RollupStore:
+    # таблиця → (ключ, лічильники, векторне зведення сирих рядків)
+    TABLES = {TABLE: (KEYS, COUNTERS, aggregate), DAILY_TABLE: (DAILY_KEYS, DAILY_COUNTERS, aggregate_daily)}
+
+    def __init__(self, mirror, ws="Sheet1"):
+        self.mirror, self.ws = mirror, ws
+        with mirror._connect(immediate=True) as db:  # побудова й запис хвоста іншим процесом — по черзі
+            for table, (keys, counters, agg) in self.TABLES.items():
+                cols = ", ".join(f'"{c}" INTEGER' if c in counters or c in ("Рік", "Місяць") else f'"{c}" TEXT' for c in keys + counters)
+                exists = db.execute("SELECT 1 FROM sqlite_master WHERE name=?", (table,)).fetchone()
+                db.execute(f"CREATE TABLE IF NOT EXISTS {table} ({cols}, PRIMARY KEY ({_names(keys)}))")
+                # Дзеркало, синхронізоване до появи зведень: одноразова побудова з нього
+                q = None if exists else mirror.select_sql(db, ws, [c for c in SOURCE_COLUMNS if c in mirror.columns(ws)])
+                if q: self._insert(db, table, agg(pd.read_sql_query(q[0], db, params=q[1])))
+        mirror.add_hook(ws, self)
+
+    def on_store(self, db, rows, full):
+        for table, (_, _, agg) in self.TABLES.items():
+            if full: db.execute(f"DELETE FROM {table}")
+            self._insert(db, table, agg(rows))
+
+    def _insert(self, db, table, agg):
+        if agg.empty: return
+        keys, counters, _ = self.TABLES[table]
+        upd = ", ".join(f'"{c}" = "{c}" + excluded."{c}"' for c in counters)
+        db.executemany(
+            f"INSERT INTO {table} ({_names(keys + counters)}) VALUES ({', '.join('?' * len(keys + counters))}) ON CONFLICT ({_names(keys)}) DO UPDATE SET {upd}",
+            agg[keys + counters].astype(object).itertuples(index=False, name=None))
+
+    def monthly(self, operator=None, unit=None, by=("Рік", "Місяць")):
+        """Зведення, згруповані за by, з фільтром по оператору/підрозділу — агрегація в SQLite."""
+        self.mirror.refresh(self.ws)
+        with span("analytics.monthly"): return self._monthly(operator, unit, by)
+
+    def _monthly(self, operator, unit, by):
+        where, params = [], []
+        if operator is not None: where.append('"Оператор" = ?'); params.append(operator)
+        if unit is not None: where.append('"Підрозділ" = ?'); params.append(unit)
+        grp = ", ".join(f'"{c}"' for c in by)
+        sums = ", ".join(f'SUM("{c}") AS "{c}"' for c in COUNTERS)
+        sql = f"SELECT {grp}, {sums} FROM {TABLE}" + (" WHERE " + " AND ".join(where) if where else "") + f" GROUP BY {grp} ORDER BY {grp}"
+        with self.mirror._connect() as db:
+            return pd.read_sql_query(sql, db, params=params)
+
+    def operators(self, unit=None):
+        sql = f'SELECT DISTINCT "Оператор" FROM {TABLE}' + (' WHERE "Підрозділ" = ?' if unit else "") + ' ORDER BY "Оператор"'
+        with self.mirror._connect() as db:
+            return [r[0] for r in db.execute(sql, (unit,) if unit else ())]
+
+    def buckets(self, freq="Тиждень", by="Підрозділ", operator=None, unit=None, date_from=None, date_to=None):
+        """Вильоти й хвилини на (кошик freq, значення by) з денних зведень; «Період» — 'YYYY-MM-DD' початку кошика."""
+        self.mirror.refresh(self.ws)
+        where, params = [], []
+        if operator is not None: where.append('"Оператор" = ?'); params.append(operator)
+        if unit is not None: where.append('"Підрозділ" = ?'); params.append(unit)
+        if date_from is not None: where.append('"День" >= ?'); params.append(str(date_from))
+        if date_to is not None: where.append('"День" <= ?'); params.append(str(date_to))
+        sql = (f'SELECT {BUCKETS[freq]} AS "Період", "{by}", SUM("Польоти") AS "Польоти", SUM("Хв") AS "Хв" FROM {DAILY_TABLE}'
+               + (" WHERE " + " AND ".join(where) if where else "") + f' GROUP BY 1, 2 ORDER BY 1, 2')
+        with span("analytics.buckets") as s, self.mirror._connect() as db:
+            df = pd.read_sql_query(sql, db, params=params); s.rows = len(df)
+        return df
@@ -0,0 +1,100 @@
+"""Тонкий шар над gspread-аркушами, що стоять за GSheetsConnection.
+
+GSheetsConnection вміє лише читати аркуш цілком і перезаписувати його цілком
+(clear + set_with_dataframe). Тут — точкові операції: дописування рядків у кінець
+аркуша (values.append на боці Google атомарний, тож паралельні записи не
+затирають один одного), перезапис окремих рядків на місці, читання заголовка
+та діапазону чи окремих рядків.
+"""
+import threading
+
+from perf import span
+
+EMPTY_MARKERS = ("None", "nan", "NaN", "<NA>", "NaT")
+
+
+def to_cell(val):
+    """Значення комірки так само, як його писав старий astype(str).replace(...)."""
+    if val is None: return ""
+    s = str(val)
+    return "" if s in EMPTY_MARKERS else s
+
+
+class SheetsIO:
+    def __init__(self, conn):
+        self.conn = conn
+        self._ws = {}
+        self._lock = threading.Lock()
+
+    def worksheet(self, ws):
+        with self._lock:
+            if ws not in self._ws:
+                self._ws[ws] = self.conn.client._select_worksheet(worksheet=ws)
+            return self._ws[ws]
+
+    def revision(self, ws):
+        """Час останньої зміни всієї таблиці (modifiedTime з Drive API) — дешева перевірка, чи є що тягнути."""
+        with span("sheets.revision"): return self.worksheet(ws).spreadsheet.get_lastUpdateTime()
+
+    def header(self, ws):
+        return [h for h in self.worksheet(ws).row_values(1)]
+
+    def ensure_columns(self, ws, columns):
+        """Дописує в заголовок колонки, яких там ще немає. Повертає актуальний заголовок."""
+        header = self.header(ws)
+        missing = [c for c in columns if c not in header]
+        if missing:
+            header = header + missing
+            self.worksheet(ws).update(range_name="A1", values=[header])
+        return header
+
+    def append_records(self, ws, records):
+        """Дописує список dict-рядків у кінець аркуша, вирівнюючи їх за заголовком."""
+        if not records: return 0
+        cols = []
+        for r in records:
+            cols.extend(c for c in r if c not in cols)
+        header = self.ensure_columns(ws, cols)
+        values = [[to_cell(r.get(c)) for c in header] for r in records]
+        with span(f"sheets.append:{ws}", rows=len(values)): self.worksheet(ws).append_rows(values, value_input_option="RAW", insert_data_option="INSERT_ROWS", table_range="A1")
+        return len(values)
+
+    def delete_rows(self, ws, rows):
+        """Видаляє рядки за номерами (1 — заголовок) одним batchUpdate; суцільні діапазони — одним запитом."""
+        rows = sorted(set(rows), reverse=True)
+        if not rows: return 0
+        runs, hi, lo = [], rows[0], rows[0]
+        for r in rows[1:]:
+            if r == lo - 1: lo = r
+            else: runs.append((lo, hi)); hi = lo = r
+        runs.append((lo, hi))
+        w = self.worksheet(ws)
+        # Знизу вгору: видалення не зсуває номери ще не видалених рядків
+        body = {"requests": [{"deleteDimension": {"range": {"sheetId": w.id, "dimension": "ROWS", "startIndex": a - 1, "endIndex": b}}} for a, b in runs]}
+        with span(f"sheets.delete_rows:{ws}", rows=len(rows)): w.spreadsheet.batch_update(body)
+        return len(rows)
+
+    def values(self, ws, start_row=1):
+        """Сирі значення аркуша (рядки як списки рядків), починаючи з start_row (1 — заголовок)."""
+        with span(f"sheets.values:{ws}") as s:
+            out = self.worksheet(ws).get_values(f"A{start_row}:ZZ"); s.rows = len(out)
+        return out
+
+    def header_and_values(self, ws, start_row):
+        """Заголовок і рядки від start_row одним запитом (batch_get)."""
+        with span(f"sheets.batch_get:{ws}") as s:
+            head, rows = self.worksheet(ws).batch_get(["A1:ZZ1", f"A{start_row}:ZZ"]); s.rows = len(rows)
+        return (head[0] if head else []), [list(r) for r in rows]
+
+    def rows(self, ws, numbers):
+        """Заголовок і рядки з номерами numbers (1 — заголовок) одним batch_get; порожній рядок — []."""
+        with span(f"sheets.rows:{ws}", rows=len(numbers)):
+            head, *out = self.worksheet(ws).batch_get(["A1:ZZ1"] + [f"A{n}:ZZ{n}" for n in numbers])
+        return (head[0] if head else []), [list(r[0]) if r else [] for r in out]
+
+    def update_rows(self, ws, rows):
+        """Перезаписує рядки на місці одним batch_update: {номер рядка: значення від колонки A}."""
+        if not rows: return 0
+        data = [{"range": f"A{n}", "values": [list(v)]} for n, v in sorted(rows.items())]
+        with span(f"sheets.update_rows:{ws}", rows=len(data)): self.worksheet(ws).batch_update(data, value_input_option="RAW")
+        return len(data)
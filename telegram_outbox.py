@@ -0,0 +1,229 @@
+"""Фонова відправка в Telegram через довговічну чергу (outbox).
+
+Кнопка «Відправити» лише кладе повідомлення в чергу (SQLite + файли фото на
+диску) і одразу повертає керування — звіт переживе й перезапуск процесу.
+Пул воркерів відправляє їх через одну requests.Session з пулом з'єднань і
+тайм-аутами. Помилки мережі та 5xx повторюються з експоненційною паузою
+(до MAX_ATTEMPTS спроб), 429 — рівно через retry_after, який повернув
+Telegram (до FLOOD_ATTEMPTS спроб, щоб чат під постійним лімітом не тримав
+воркер вічно). В один чат одночасно йде лише одне повідомлення, у порядку
+постановки, і не частіше CHAT_INTERVAL.
+"""
+import json
+import os
+import random
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from perf import record
+
+API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org")
+OUTBOX_DIR = os.environ.get("UAV_OUTBOX_DIR", os.path.join(".cache", "outbox"))
+WORKERS = 4
+TIMEOUT = (5, 60)         # с: з'єднання, читання відповіді (фото по слабкому каналу)
+MAX_ATTEMPTS = 8
+FLOOD_ATTEMPTS = 20       # спроб, якщо Telegram знову й знову відповідає 429
+BACKOFF_BASE, BACKOFF_MAX = 2.0, 300.0
+CHAT_INTERVAL = 1.0       # с між повідомленнями в один чат (ліміт Bot API)
+MEDIA_GROUP_MAX = 10      # фото в одному sendMediaGroup (ліміт Bot API)
+
+
+class TelegramOutbox:
+    def __init__(self, token, api_base=API_BASE, path=OUTBOX_DIR, workers=WORKERS):
+        self.token, self.api_base, self.path = token, api_base.rstrip("/"), path
+        os.makedirs(path, exist_ok=True)
+        self.db_path = os.path.join(path, "outbox.sqlite")
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=workers))
+        self.session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=workers))
+        self._wake = threading.Condition()
+        self._chat_next = {}
+        self._listeners = []
+        with self._connect() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id TEXT, method TEXT, data TEXT, files TEXT,
+                status TEXT DEFAULT 'pending', attempts INTEGER DEFAULT 0, next_at REAL DEFAULT 0,
+                created_at REAL, last_error TEXT)""")
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, next_at)")
+            # Після перезапуску процесу недовідправлене повертається в чергу
+            db.execute("UPDATE jobs SET status='pending' WHERE status='sending'")
+        for i in range(workers):
+            threading.Thread(target=self._run, name=f"tg-outbox-{i}", daemon=True).start()
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            yield db
+        finally: db.close()
+
+    # --- постановка в чергу ---
+    def enqueue(self, chat_id, method, data, files=()):
+        """Ставить виклик Bot API в чергу. files — (поле, ім'я, bytes, mime); байти одразу пишуться на диск."""
+        job_dir = os.path.join(self.path, uuid.uuid4().hex)
+        stored = [self._store_file(job_dir, i, name, content, mime, field) for i, (field, name, content, mime) in enumerate(files)]
+        return self._insert(chat_id, method, data, stored)
+
+    def enqueue_photos(self, chat_id, photos, caption=None, parse_mode="Markdown"):
+        """Фото звіту альбомами по MEDIA_GROUP_MAX; підпис — лише на першому фото першого альбому.
+
+        photos — ітерабельне (ім'я, bytes, mime), можна генератор: кожне фото пишеться
+        на диск, щойно його отримано, тож у пам'яті одночасно лише одне.
+        """
+        jobs, chunk, job_dir = [], [], None
+        for name, content, mime in photos:
+            if not chunk: job_dir = os.path.join(self.path, uuid.uuid4().hex)
+            chunk.append(self._store_file(job_dir, len(chunk), name, content, mime, f"photo{len(chunk)}"))
+            if len(chunk) == MEDIA_GROUP_MAX:
+                jobs.append(self._insert_album(chat_id, chunk, caption if not jobs else None, parse_mode)); chunk = []
+        if chunk: jobs.append(self._insert_album(chat_id, chunk, caption if not jobs else None, parse_mode))
+        return jobs
+
+    def _insert_album(self, chat_id, stored, caption, parse_mode):
+        if len(stored) == 1:  # sendMediaGroup приймає від 2 елементів
+            stored[0]["field"] = "photo"
+            data = {"caption": caption, "parse_mode": parse_mode} if caption else {}
+            return self._insert(chat_id, "sendPhoto", data, stored)
+        media = [{"type": "photo", "media": f"attach://{f['field']}"} for f in stored]
+        if caption: media[0].update(caption=caption, parse_mode=parse_mode)
+        return self._insert(chat_id, "sendMediaGroup", {"media": json.dumps(media, ensure_ascii=False)}, stored)
+
+    def _store_file(self, job_dir, i, name, content, mime, field):
+        os.makedirs(job_dir, exist_ok=True)
+        fp = os.path.join(job_dir, f"{i}_{os.path.basename(name or 'file')}")
+        with open(fp, "wb") as fh: fh.write(content)
+        return {"field": field, "name": name, "path": fp, "mime": mime}
+
+    def _insert(self, chat_id, method, data, stored):
+        with self._connect() as db:
+            job_id = db.execute("INSERT INTO jobs (chat_id, method, data, files, created_at) VALUES (?, ?, ?, ?, ?)",
+                                (str(chat_id), method, json.dumps(data, ensure_ascii=False), json.dumps(stored), time.time())).lastrowid
+        with self._wake: self._wake.notify_all()
+        return job_id
+
+    def on_result(self, fn):
+        """fn(job, response_json | None, error | None, elapsed_s) після кожної спроби."""
+        self._listeners.append(fn)
+
+    def stats(self):
+        with self._connect() as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def wait_idle(self, timeout=30):
+        """Чекає, доки в черзі не лишиться pending/sending (для скриптів і перевірок)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            s = self.stats()
+            if not s.get("pending") and not s.get("sending"): return True
+            time.sleep(0.05)
+        return False
+
+    # --- воркери ---
+    def _claim(self):
+        """Бере найстаршу готову задачу чату, в якому зараз нічого не відправляється."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("""
+                SELECT id, chat_id, method, data, files, attempts FROM jobs j
+                WHERE status='pending' AND next_at <= ?
+                  AND id = (SELECT MIN(id) FROM jobs WHERE chat_id = j.chat_id AND status IN ('pending', 'sending'))
+                ORDER BY id LIMIT 1""", (now,)).fetchone()
+            if row: db.execute("UPDATE jobs SET status='sending' WHERE id=?", (row[0],))
+            db.execute("COMMIT")
+        if not row: return None
+        return {"id": row[0], "chat_id": row[1], "method": row[2], "data": json.loads(row[3]),
+                "files": json.loads(row[4]), "attempts": row[5]}
+
+    def _next_due(self):
+        with self._connect() as db:
+            r = db.execute("SELECT MIN(next_at) FROM jobs WHERE status='pending'").fetchone()
+        return r[0] if r and r[0] is not None else None
+
+    def _run(self):
+        while True:
+            try: job = self._claim()
+            except sqlite3.OperationalError: job = None
+            if job is None:
+                nxt = self._next_due()
+                wait = 5.0 if nxt is None else min(5.0, max(0.05, nxt - time.time()))
+                with self._wake: self._wake.wait(wait)
+                continue
+            self._pace(job["chat_id"])
+            self._send(job)
+
+    def _pace(self, chat_id):
+        delay = self._chat_next.get(chat_id, 0) - time.monotonic()
+        if delay > 0: time.sleep(delay)
+        self._chat_next[chat_id] = time.monotonic() + CHAT_INTERVAL
+
+    def _send(self, job):
+        url = f"{self.api_base}/bot{self.token}/{job['method']}"
+        data = dict(job["data"], chat_id=job["chat_id"])
+        handles, t0, body, err = [], time.monotonic(), None, None
+        try:
+            files = {}
+            for f in job["files"]:
+                fh = open(f["path"], "rb"); handles.append(fh)
+                files[f["field"]] = (f["name"], fh, f["mime"])
+            resp = self.session.post(url, data=data, files=files or None, timeout=TIMEOUT)
+            try: body = resp.json()
+            except ValueError: body = {"ok": False, "error_code": resp.status_code, "description": resp.text[:200]}
+        except (requests.RequestException, OSError) as e:
+            err = e
+        finally:
+            for fh in handles: fh.close()
+        elapsed = time.monotonic() - t0
+        sent = len(json.dumps(data, ensure_ascii=False).encode()) + sum(os.path.getsize(f["path"]) for f in job["files"] if os.path.exists(f["path"]))
+        record(f"telegram.{job['method']}", elapsed, bytes=sent, ok=bool(body and body.get("ok")))
+        self._notify(job, body, err, elapsed)
+
+        if body and body.get("ok"): return self._finish(job, "done")
+        attempts = job["attempts"] + 1
+        code = (body or {}).get("error_code")
+        if code == 429:
+            if attempts >= FLOOD_ATTEMPTS: return self._finish(job, "failed", body.get("description"))
+            retry_after = float((body.get("parameters") or {}).get("retry_after", BACKOFF_BASE))
+            self._chat_next[job["chat_id"]] = time.monotonic() + retry_after
+            return self._retry(job, attempts, retry_after, body.get("description"))
+        if err is not None or (code and code >= 500):
+            if attempts >= MAX_ATTEMPTS: return self._finish(job, "failed", str(err or body))
+            backoff = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+            return self._retry(job, attempts, backoff, str(err or body.get("description")))
+        # 4xx — повтор не допоможе
+        self._fallback(job)
+        self._finish(job, "failed", (body or {}).get("description"))
+
+    def _fallback(self, job):
+        # Альбом відхилено — пробуємо фото поодинці, підпис лише на першому
+        if job["method"] != "sendMediaGroup" or not job["files"]: return
+        media = json.loads(job["data"].get("media", "[]"))
+        caption = next((m.get("caption") for m in media if m.get("caption")), None)
+        for i, f in enumerate(job["files"]):
+            with open(f["path"], "rb") as fh: content = fh.read()
+            job_dir = os.path.join(self.path, uuid.uuid4().hex)
+            self._insert_album(job["chat_id"], [self._store_file(job_dir, 0, f["name"], content, f["mime"], "photo")], caption if i == 0 else None, "Markdown")
+
+    def _retry(self, job, attempts, delay, error):
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET status='pending', attempts=?, next_at=?, last_error=? WHERE id=?",
+                       (attempts, time.time() + delay, error, job["id"]))
+
+    def _finish(self, job, status, error=None):
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET status=?, attempts=attempts+1, last_error=?, files='[]' WHERE id=?", (status, error, job["id"]))
+        if job["files"]: shutil.rmtree(os.path.dirname(job["files"][0]["path"]), ignore_errors=True)
+        with self._wake: self._wake.notify_all()
+
+    def _notify(self, job, body, err, elapsed):
+        for fn in self._listeners:
+            try: fn(job, body, err, elapsed)
+            except Exception: pass
@@ -0,0 +1,81 @@
+"""Два ArchiveMirror (як main.py і api_server.py) на одному файлі дзеркала.
+
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive_mirror import ArchiveMirror  # noqa: E402
+from battery_index import TABLE as BATTERY_TABLE, BatteryIndex  # noqa: E402
+from devtools.fake_sheets import FakeConnection  # noqa: E402
+from devtools.synthetic import synthetic_sheets  # noqa: E402
+from flight_keys import TABLE as KEYS_TABLE, FlightKeyIndex  # noqa: E402
+from rollups import RollupStore  # noqa: E402
+from sheets_io import SheetsIO  # noqa: E402
+
+
+class _Racing(SheetsIO):
+    """Хвіст читається обома дзеркалами до того, як будь-яке з них його запише."""
+
+    def __init__(self, conn, barrier):
+        super().__init__(conn)
+        self.barrier = barrier
+
+    def header_and_values(self, ws, start_row):
+        out = super().header_and_values(ws, start_row)
+        self.barrier.wait(timeout=10)
+        return out
+
+
+class TwoMirrorsTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "mirror.sqlite")
+        data = synthetic_sheets(35, seed=3)
+        self.tail = data["Sheet1"][31:]
+        data["Sheet1"] = data["Sheet1"][:31]
+        self.conn = FakeConnection(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _mirror(self, sheets):
+        mirror = ArchiveMirror(sheets, path=self.path)
+        RollupStore(mirror); BatteryIndex(mirror); FlightKeyIndex(mirror)
+        return mirror
+
+    def _counts(self):
+        with sqlite3.connect(self.path) as db:
+            keys = db.execute(f"SELECT SUM(n) FROM {KEYS_TABLE}").fetchone()[0]
+            flights = db.execute(f'SELECT SUM("Вильоти") FROM {BATTERY_TABLE}').fetchone()[0]
+            rollup = db.execute('SELECT SUM("Польоти") FROM rollup_daily').fetchone()[0]
+        return keys, flights, rollup
+
+    def test_concurrent_tail_sync_applies_once(self):
+        barrier = threading.Barrier(2)
+        a, b = self._mirror(_Racing(self.conn, barrier)), self._mirror(_Racing(self.conn, barrier))
+        self.assertEqual(a.sync("Sheet1", force=True), "full")
+        with self.conn.lock: self.conn.data["Sheet1"].extend(list(r) for r in self.tail)
+        modes = []
+        threads = [threading.Thread(target=lambda m=m: modes.append(m.sync("Sheet1", force=True))) for m in (a, b)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(sorted(modes), ["append", "raced"])
+        rows = len(a.query("Sheet1", sync=False))
+        self.assertEqual(rows, 35)
+        keys, flights, rollup = self._counts()
+        self.assertEqual(keys, rows)
+        self.assertEqual(rollup, rows)
+        battery_rows = int((a.query("Sheet1", sync=False, columns=["Номер АКБ"])["Номер АКБ"].fillna("") != "").sum())
+        self.assertEqual(flights, battery_rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Векторний розподіл ЦУС (cus_engine) проти построкового split_midnight.
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cus_engine import COLUMNS, PARTS, SHIFT, cus_blocks, split_frame  # noqa: E402
+from devtools.synthetic import synthetic_sheets  # noqa: E402
+from flight_logic import split_midnight  # noqa: E402
+
+
+def _archive(rows, seed):
+    head, *body = synthetic_sheets(rows, seed)["Sheet1"]
+    return pd.DataFrame(body, columns=head)
+
+
+def _by_rows(df):
+    """Частина кожного рядка за split_midnight: зміна за зміною, у порядку рядків архіву."""
+    part = {}
+    keys = df[SHIFT].fillna("").astype(str)
+    for _, idx in keys.groupby(SHIFT, sort=False).groups.items():
+        shift = df.loc[idx]
+        start = datetime.strptime(str(shift["Час завдання"].iloc[0])[:5], "%H:%M").time()
+        flights = [dict(r, _i=i) for i, r in zip(idx, shift.to_dict("records"))]
+        before, after = split_midnight(flights, start)
+        part.update({f["_i"]: 0 for f in before}); part.update({f["_i"]: 1 for f in after})
+    return pd.Series(part).sort_index()
+
+
+class SplitFrameTest(unittest.TestCase):
+    def test_matches_split_midnight(self):
+        for seed in (1, 2):
+            df = _archive(1500, seed)
+            got = split_frame(df)["Частина"]
+            want = _by_rows(df)
+            self.assertTrue(want.any(), "у синтетичному архіві мають бути вильоти після 00:00")
+            self.assertEqual(got.tolist(), want.loc[got.index].tolist())
+            self.assertEqual(len(got), len(df))
+
+    def test_shift_order_is_sticky(self):
+        df = pd.DataFrame([
+            ["01.05.2026", "20:00 - 08:00", "впс Кодима", "a", "22:00", "22:30", "100", "30"],
+            ["01.05.2026", "20:00 - 08:00", "впс Кодима", "a", "23:50", "00:20", "100", "30"],  # через північ
+            ["01.05.2026", "20:00 - 08:00", "впс Кодима", "a", "23:55", "23:58", "100", "3"],   # записаний після — теж «після»
+            ["01.05.2026", "20:00 - 08:00", "впс Кодима", "b", "23:55", "23:58", "100", "3"],   # інша зміна
+        ], columns=COLUMNS)
+        self.assertEqual(split_frame(df)["Частина"].tolist(), [0, 1, 1, 0])
+        self.assertEqual(split_frame(df)["Частина"].tolist(), _by_rows(df).tolist())
+
+    def test_rows_with_empty_shift_keys(self):
+        df = _archive(300, 4)
+        df.loc[df.index[::7], "Оператор"] = None
+        df.loc[df.index[::11], "Підрозділ"] = None
+        got = split_frame(df)
+        self.assertFalse(got["Частина"].isna().any())
+        self.assertEqual(got["Частина"].tolist(), _by_rows(df).loc[got.index].tolist())
+        blocks = cus_blocks(df)
+        self.assertEqual(int(blocks["Вильотів"].sum()), len(df))
+
+
+class CusBlocksTest(unittest.TestCase):
+    def test_blocks_count_every_flight_once(self):
+        df = _archive(2000, 5)
+        blocks = cus_blocks(df)
+        self.assertEqual(int(blocks["Вильотів"].sum()), len(df))
+        self.assertEqual(set(blocks["Частина"]), set(PARTS))
+        lines = blocks["Текст"].str.count("\n") + 1
+        self.assertEqual(lines.tolist(), blocks["Вильотів"].tolist())
+        mins = pd.to_numeric(df["Тривалість (хв)"], errors="coerce").fillna(0).sum()
+        self.assertEqual(int(blocks["Хв"].sum()), int(round(mins)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Розбір масового внесення: вставлений текст і CSV-журнал.
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+from datetime import date, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flight_import import PREVIEW, parse_csv, parse_text, to_flights  # noqa: E402
+from flight_logic import RESULTS  # noqa: E402
+
+
+def _rows(preview, *cols):
+    return [tuple(r) for r in preview[list(cols)].itertuples(index=False)]
+
+
+class ParseTextTest(unittest.TestCase):
+    def test_times_distance_and_midnight(self):
+        p = parse_text("09:00 - 09:30 - 1 200 м (30 хв)\n\n930 - 1010 - 800 м\n2350 - 0020\n9 - 9.45")
+        self.assertEqual(list(p.columns), PREVIEW)
+        self.assertEqual(_rows(p, "Рядок", "Зліт", "Посадка", "Тривалість (хв)", "Дистанція (м)"), [
+            (1, "09:00", "09:30", 30, 1200), (3, "09:30", "10:10", 40, 800),
+            (4, "23:50", "00:20", 30, 0), (5, "09:00", "09:45", 45, 0)])
+        self.assertTrue((p["Помилка"] == "").all())
+
+    def test_battery_result_and_notes(self):
+        p = parse_text("930 - 1010 - 800 м АКБ 5\n"
+                       "1000 - 1030 - 300 м АКБ №12 затримання, вітер\n"
+                       "1100 - 1130 - 100 м гроза; Виявлення цілі; АКБ#7\n"
+                       "1200 - 1230 без затримання\n"
+                       "1300 - 1330 Затриманнях")
+        self.assertEqual(_rows(p, "Номер АКБ", "Результат", "Примітки"), [
+            ("5", RESULTS[0], ""), ("12", "Затримання", "вітер"), ("7", "Виявлення цілі", "гроза"),
+            ("", RESULTS[0], "без затримання"), ("", RESULTS[0], "Затриманнях")])
+
+    def test_unparsed_lines_are_errors(self):
+        p = parse_text("09:00 - 09:30\nпривіт\n25:00 - 26:00")
+        self.assertEqual(p["Помилка"].tolist()[0], "")
+        self.assertTrue(p["Помилка"].tolist()[1].startswith("не розпізнано"))
+        self.assertIn("зліт?", p["Помилка"].tolist()[2])
+
+    def test_empty(self):
+        self.assertTrue(parse_text("").empty)
+        self.assertTrue(parse_text(" \n\n").empty)
+
+
+class ParseCsvTest(unittest.TestCase):
+    def test_controller_log_with_duration(self):
+        data = ("Takeoff Time;Flight Time (min);Max Distance (m);Battery SN;Cycle Count;Result;Comment\n"
+                "2024-05-01 21:47:12;25;1 500;B-17;120;затримання;ok\n"
+                "2024-05-01 23:50:00;40;700;B-18;;;\n").encode("utf-8")
+        p = parse_csv(data)
+        self.assertEqual(_rows(p, "Рядок", "Зліт", "Посадка", "Тривалість (хв)", "Дистанція (м)", "Номер АКБ", "Цикли АКБ", "Результат"), [
+            (2, "21:47", "22:12", 25, 1500, "B-17", 120, "Затримання"), (3, "23:50", "00:30", 40, 700, "B-18", 0, RESULTS[0])])
+
+    def test_cp1251_and_bad_values(self):
+        data = "Зліт,Посадка,Цикли,Результат\n0930,1000,abc,\n1000,1030,,щось\n".encode("cp1251")
+        p = parse_csv(data)
+        self.assertEqual(p["Помилка"].tolist(), ["цикли АКБ?", "невідомий результат"])
+
+    def test_missing_takeoff_column(self):
+        p = parse_csv(b"landing,notes\n0930,x\n")
+        self.assertTrue(p["Помилка"].str.startswith("немає колонки зльоту").all())
+
+
+class ToFlightsTest(unittest.TestCase):
+    def test_only_rows_without_errors(self):
+        p = parse_text("0900 - 0930 - 500 м АКБ 3 Затримання\nпривіт")
+        flights = to_flights(p, date(2026, 5, 1), time(8), time(20), "впс Кодима", "ст.с-т Тест", "Дрон", "Маршрут")
+        self.assertEqual(len(flights), 1)
+        f = flights[0]
+        self.assertEqual((f["Зліт"], f["Посадка"], f["Дистанція (м)"], f["Номер АКБ"], f["Результат"]),
+                         ("09:00", "09:30", 500, "3", "Затримання"))
+
+
+if __name__ == "__main__":
+    unittest.main()
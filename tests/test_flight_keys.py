@@ -0,0 +1,122 @@
+"""FlightKeyIndex: резервування після збою запису й видалення дублікатів зі зміненого аркуша.
+
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flight_writer  # noqa: E402
+from archive_mirror import ArchiveMirror  # noqa: E402
+from devtools.fake_sheets import FakeAPIError, FakeConnection  # noqa: E402
+from devtools.synthetic import synthetic_sheets  # noqa: E402
+from flight_keys import FlightKeyIndex  # noqa: E402
+from flight_writer import FlightWriter  # noqa: E402
+from sheets_io import SheetsIO  # noqa: E402
+
+FLIGHT = {"Дата": "01.05.2026", "Час завдання": "08:00 - 20:00", "Підрозділ": "впс Кодима", "Оператор": "ст.с-т Тестовий",
+          "Дрон": "Matrice 30T (S/N: T1)", "Зліт": "09:00", "Посадка": "09:30"}
+
+
+class _Base(unittest.TestCase):
+    rows = 40
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.conn = FakeConnection(self.sheets())
+        self.mirror = ArchiveMirror(SheetsIO(self.conn), path=os.path.join(self.dir, "mirror.sqlite"))
+        self.keys = FlightKeyIndex(self.mirror)
+        self.mirror.sync("Sheet1", force=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def sheets(self):
+        return synthetic_sheets(self.rows, seed=7)
+
+
+class ClaimAfterFailedWriteTest(_Base):
+    def setUp(self):
+        super().setUp()
+        self.retry = flight_writer.RETRY_DELAY
+        flight_writer.RETRY_DELAY = 0.01
+        self.writer = FlightWriter(SheetsIO(self.conn), landed=self.keys.landed)
+
+    def tearDown(self):
+        flight_writer.RETRY_DELAY = self.retry
+        super().tearDown()
+
+    def _submit(self, flights):
+        fresh = self.keys.claim(flights)
+        fut = self.writer.submit_flights(fresh)
+        fut.add_done_callback(lambda f: f.exception() and self.keys.release(fresh))
+        return fresh, fut
+
+    def test_failed_write_releases_the_claim(self):
+        self.conn.error_rate = 1.0
+        fresh, fut = self._submit([FLIGHT])
+        self.assertEqual(len(fresh), 1)
+        with self.assertRaises(FakeAPIError): fut.result(10)
+        self.conn.error_rate = 0.0
+        self.writer.flush(10)  # колбеки Future виконано в потоці записувача
+        self.assertEqual(self.keys.known([FLIGHT]), [False])
+        fresh, fut = self._submit([FLIGHT])
+        self.assertEqual(len(fresh), 1)
+        self.assertEqual(fut.result(10), 1)
+        self.assertEqual(self.keys.landed([FLIGHT]), [True])
+        self.assertEqual(self.keys.known([FLIGHT]), [True])
+
+    def test_queued_flight_is_claimed_once_but_not_known(self):
+        self.assertEqual(len(self.keys.claim([FLIGHT])), 1)
+        self.assertEqual(self.keys.claim([FLIGHT]), [])  # повторне натискання
+        self.assertEqual(self.keys.known([FLIGHT]), [False])  # ще не в архіві
+
+
+class RemoveDuplicatesTest(_Base):
+    def sheets(self):
+        data = synthetic_sheets(self.rows, seed=7)
+        rows = data["Sheet1"]
+        head = rows[0]
+        rows.append(list(rows[5])); rows.append(list(rows[9]))
+        # Старий рядок: час зльоту лише в «Взльот»
+        legacy = list(rows[12]) + [rows[12][head.index("Зліт")]]
+        legacy[head.index("Зліт")] = ""
+        data["Sheet1"] = [head + ["Взльот"]] + [r + [""] for r in rows[1:]] + [legacy]
+        return data
+
+    def _sheet(self):
+        return self.conn.data["Sheet1"]
+
+    def test_removes_the_scanned_rows(self):
+        dups = self.keys.duplicates()
+        self.assertEqual(dups["Рядок"].tolist(), [self.rows + 2, self.rows + 3, self.rows + 4])
+        self.assertEqual(self.keys.remove_duplicates(dups), 3)
+        self.assertEqual(len(self._sheet()), self.rows + 1)
+        self.assertTrue(self.keys.duplicates().empty)
+
+    def test_sheet_edited_after_scan_deletes_nothing(self):
+        dups = self.keys.duplicates()
+        with self.conn.lock:
+            self._sheet().insert(1, list(self._sheet()[3]))  # рядок вставлено вгорі: номери зсунулись
+            self.conn.touch()
+        before = [list(r) for r in self._sheet()]
+        with self.assertRaises(ValueError): self.keys.remove_duplicates(dups)
+        self.assertEqual(self._sheet(), before)
+
+    def test_sheet_sorted_after_scan_deletes_nothing(self):
+        dups = self.keys.duplicates()
+        with self.conn.lock:
+            body = self._sheet()[1:]
+            self._sheet()[1:] = body[::-1]
+            self.conn.touch()
+        before = [list(r) for r in self._sheet()]
+        with self.assertRaises(ValueError): self.keys.remove_duplicates(dups)
+        self.assertEqual(self._sheet(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""FlightWriter: повтор після збою, загублена відповідь і відмова після MAX_ATTEMPTS.
+
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flight_writer  # noqa: E402
+from archive_mirror import ArchiveMirror  # noqa: E402
+from devtools.fake_sheets import FakeAPIError, FakeConnection  # noqa: E402
+from devtools.synthetic import HEADER, synthetic_sheets  # noqa: E402
+from flight_keys import FlightKeyIndex  # noqa: E402
+from flight_writer import MAX_ATTEMPTS, FlightWriter  # noqa: E402
+from sheets_io import SheetsIO  # noqa: E402
+
+OPERATOR = "ст.с-т Тестовий"
+
+
+def _flight(off, note=""):
+    return {"Дата": "01.05.2026", "Час завдання": "08:00 - 20:00", "Підрозділ": "впс Кодима", "Оператор": OPERATOR,
+            "Дрон": "Matrice 30T (S/N: T1)", "Зліт": off, "Посадка": off[:3] + "30", "Примітки": note}
+
+
+class _Scripted(SheetsIO):
+    """append у Sheet1 за планом: "fail" — збій до запису, "lost" — записано, але відповідь загублено.
+
+    Рядок із приміткою «poison» не записується ніколи.
+    """
+
+    def __init__(self, conn):
+        super().__init__(conn)
+        self.plan = []
+
+    def append_records(self, ws, records):
+        if ws == "Sheet1":
+            if any(r.get("Примітки") == "poison" for r in records): raise FakeAPIError("fake: poison row")
+            step = self.plan.pop(0) if self.plan else "ok"
+            if step == "fail": raise FakeAPIError("fake: append failed")
+            n = super().append_records(ws, records)
+            if step == "lost": raise FakeAPIError("fake: append applied, response lost")
+            return n
+        return super().append_records(ws, records)
+
+
+class FlightWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.retry = flight_writer.RETRY_DELAY
+        flight_writer.RETRY_DELAY = 0.01
+        self.dir = tempfile.mkdtemp()
+        data = synthetic_sheets(30, seed=5)
+        draft = dict(_flight("07:00"), **{"Примітки": "чернетка"})
+        data["Drafts"] = [HEADER[:-1], [draft.get(c, "") for c in HEADER[:-1]]]
+        self.conn = FakeConnection(data)
+        self.sheets = _Scripted(self.conn)
+        mirror = ArchiveMirror(SheetsIO(self.conn), path=os.path.join(self.dir, "mirror.sqlite"))
+        self.keys = FlightKeyIndex(mirror)
+        mirror.sync("Sheet1", force=True)
+        self.writer = FlightWriter(self.sheets, landed=self.keys.landed)
+
+    def tearDown(self):
+        flight_writer.RETRY_DELAY = self.retry
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _written(self):
+        head = self.conn.data["Sheet1"][0]
+        at, off = head.index("Оператор"), head.index("Зліт")
+        return sorted(r[off] for r in self.conn.data["Sheet1"][1:] if r[at] == OPERATOR)
+
+    def _drafts(self):
+        head = self.conn.data["Drafts"][0]
+        at, off = head.index("Оператор"), head.index("Зліт")
+        return [r[off] for r in self.conn.data["Drafts"][1:] if r[at] == OPERATOR and r[off]]
+
+    def test_retry_after_lost_ack_does_not_append_twice(self):
+        self.sheets.plan = ["lost"]
+        fut = self.writer.submit_flights([_flight("09:00"), _flight("10:00")], operator=OPERATOR)
+        self.assertEqual(fut.result(10), 2)
+        self.writer.flush(10)
+        self.assertEqual(self._written(), ["09:00", "10:00"])
+        self.assertEqual(self._drafts(), [])
+
+    def test_retry_after_failure_appends_once(self):
+        self.sheets.plan = ["fail", "fail"]
+        fut = self.writer.submit_flights([_flight("09:00")])
+        self.assertEqual(fut.result(10), 1)
+        self.assertEqual(self._written(), ["09:00"])
+
+    def test_gives_up_after_max_attempts_and_keeps_drafts(self):
+        self.sheets.plan = ["fail"] * MAX_ATTEMPTS
+        fut = self.writer.submit_flights([_flight("09:00")], operator=OPERATOR)
+        with self.assertRaises(FakeAPIError): fut.result(10)
+        self.writer.flush(10)
+        self.assertEqual(self._written(), [])
+        self.assertEqual(self._drafts(), ["07:00"])  # очищення чернеток знято разом із пакетом
+        # Черга не заблокована: наступний запис проходить
+        self.assertEqual(self.writer.submit_flights([_flight("11:00")]).result(10), 1)
+        self.assertEqual(self._written(), ["11:00"])
+
+    def test_failing_batch_does_not_fail_its_neighbours(self):
+        bad = self.writer.submit_flights([_flight("09:00", "poison")])
+        good = self.writer.submit_flights([_flight("10:00")])
+        self.assertEqual(good.result(10), 1)
+        with self.assertRaises(FakeAPIError): bad.result(10)
+        self.assertEqual(self._written(), ["10:00"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""Дискове сховище скріншотів зміни до відправки.
+
+Фото, додані до вильоту, одразу копіюються на диск (порціями, без повного
+читання в пам'ять), а в session_state лишається лише посилання — dict з id,
+ім'ям, mime та розміром. Тож пам'ять сесії не росте з кількістю фото.
+Сховище обмежене: файли, яких не торкались UPLOAD_TTL, видаляються (покинуті
+сесії), а при перевищенні UPLOAD_MAX_MB першими йдуть найдавніше використані
+(LRU за mtime, який оновлюється при кожному читанні).
+
+    ref = store.put(sid, uploaded_file)
+    outbox.enqueue_photos(chat, iter_prepared(store.sources(refs)))
+    store.release(refs)
+"""
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+from perf import span
+
+UPLOAD_DIR = os.environ.get("UAV_UPLOAD_DIR", os.path.join(".cache", "uploads"))
+UPLOAD_MAX_MB = float(os.environ.get("UAV_UPLOAD_MAX_MB", 2048))
+UPLOAD_TTL = float(os.environ.get("UAV_UPLOAD_TTL", 36 * 3600))  # с: довша за нічну зміну
+EVICT_INTERVAL = 60  # с між проходами прибирання
+CHUNK = 1 << 20
+
+
+def _safe(name):
+    return re.sub(r"[^\w.\-]+", "_", os.path.basename(name or "file"))[-80:] or "file"
+
+
+class UploadStore:
+    def __init__(self, path=UPLOAD_DIR, max_mb=UPLOAD_MAX_MB, ttl=UPLOAD_TTL):
+        self.path, self.max_bytes, self.ttl = path, int(max_mb * 1024 * 1024), ttl
+        self._lock = threading.Lock()
+        self._evicted_at = 0.0
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, ref):
+        return os.path.join(self.path, ref["sid"], ref["id"])
+
+    # --- запис ---
+    def put(self, sid, upload):
+        """Копіює файл (UploadedFile або інший файловий об'єкт з .name/.type) на диск; повертає посилання."""
+        ref = {"sid": sid, "id": f"{uuid.uuid4().hex}_{_safe(getattr(upload, 'name', None))}",
+               "name": getattr(upload, "name", None) or "photo", "mime": getattr(upload, "type", None) or "application/octet-stream"}
+        fp = self._file(ref)
+        os.makedirs(os.path.dirname(fp), exist_ok=True)
+        with span("uploads.put") as s:
+            upload.seek(0)
+            with open(fp + ".tmp", "wb") as fh: shutil.copyfileobj(upload, fh, CHUNK)
+            os.replace(fp + ".tmp", fp)
+            ref["size"] = s.bytes = os.path.getsize(fp)
+        self.evict()
+        return ref
+
+    def put_all(self, sid, uploads):
+        return [self.put(sid, u) for u in uploads or []]
+
+    # --- читання ---
+    def sources(self, refs):
+        """(ім'я, шлях, mime) наявних файлів — для iter_prepared; читання оновлює LRU."""
+        for ref in refs or []:
+            fp = self._file(ref)
+            try: os.utime(fp)
+            except OSError: continue  # витіснено за TTL/обсягом
+            yield ref["name"], fp, ref["mime"]
+
+    def missing(self, refs):
+        return [r for r in refs or [] if not os.path.exists(self._file(r))]
+
+    # --- видалення ---
+    def release(self, refs):
+        """Видаляє файли посилань (після постановки в чергу outbox, що тримає власні копії)."""
+        for ref in refs or []:
+            try: os.remove(self._file(ref))
+            except OSError: pass
+
+    def _entries(self):
+        out = []
+        for d in os.scandir(self.path):
+            if not d.is_dir(): continue
+            files = list(os.scandir(d.path))
+            if not files:
+                try: os.rmdir(d.path)
+                except OSError: pass
+            for f in files:
+                try: st = f.stat()
+                except OSError: continue
+                out.append((st.st_mtime, st.st_size, f.path))
+        return out
+
+    def evict(self, force=False):
+        """Прибирає протерміновані файли, потім найдавніше використані понад ліміт. Повертає кількість видалених."""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._evicted_at < EVICT_INTERVAL: return 0
+            self._evicted_at = now
+            entries = sorted(self._entries())
+            total, removed = sum(e[1] for e in entries), 0
+            for mtime, size, fp in entries:
+                if now - mtime < self.ttl and total <= self.max_bytes: break
+                try: os.remove(fp)
+                except OSError: continue
+                total -= size; removed += 1
+            return removed
+
+    def stats(self):
+        entries = self._entries()
+        return {"files": len(entries), "bytes": sum(e[1] for e in entries),
+                "sessions": len({os.path.dirname(e[2]) for e in entries})}